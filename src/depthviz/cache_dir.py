@@ -0,0 +1,24 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to locate the cache directory shared by the caches of depthviz.
+
+It has no dependencies, so the parsers and the video modules can both use it without
+importing each other.
+"""
+
+import os
+
+
+def default_cache_dir() -> str:
+    """Returns the default cache directory of depthviz.
+
+    Returns:
+        `$XDG_CACHE_HOME/depthviz`, or `~/.cache/depthviz` if `XDG_CACHE_HOME` is not
+        set.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "depthviz")
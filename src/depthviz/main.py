@@ -16,28 +16,49 @@ Notes:
     if the package is installed.
 """
 
+import os.path
 import sys
 import argparse
+import importlib
+from typing import Optional, Union, TYPE_CHECKING, cast
 from depthviz.__version__ import __version__
 from depthviz.parsers.generic.generic_divelog_parser import (
     DiveLogParser,
     DiveLogParserError,
 )
-from depthviz.parsers.apnealizer.csv_parser import ApnealizerCsvParser
-from depthviz.parsers.shearwater.shearwater_xml_parser import ShearwaterXmlParser
-from depthviz.parsers.garmin.fit_parser import GarminFitParser
-from depthviz.parsers.suunto.fit_parser import SuuntoFitParser
-from depthviz.parsers.manual.csv_parser import ManualCsvParser
-from depthviz.video.video_creator import (
-    OverlayVideoCreatorError,
+from depthviz.video.defaults import (
     DEFAULT_FONT,
     DEFAULT_VIDEO_SIZE,
     DEFAULT_BG_COLOR,
     DEFAULT_STROKE_WIDTH,
+    DEFAULT_RENDER_THREADS,
+    DEFAULT_QUEUE_DEPTH,
+    SUBTITLE_FORMATS,
 )
-from depthviz.video.depth import DepthReportVideoCreator
-from depthviz.video.time import TimeReportVideoCreator
-from depthviz.banner import Banner
+
+if TYPE_CHECKING:
+    from depthviz.parsers.generic.parse_cache import ParseCache
+    from depthviz.video.encoder import FFmpegPipeEncoder
+    from depthviz.video.frame_cache import DiskFrameCache
+    from depthviz.video.output_cache import OutputCache
+    from depthviz.video.segment_library import SegmentLibrary
+
+# Lazy registry of the dive log parsers (source: (module, class name)).
+# The parsers and the video modules are only imported once the arguments are valid,
+# so `--help`, `--version` and invalid arguments return without loading moviepy,
+# numpy, PIL or the FIT SDK.
+DIVELOG_PARSERS = {
+    "apnealizer": ("depthviz.parsers.apnealizer.csv_parser", "ApnealizerCsvParser"),
+    "shearwater": (
+        "depthviz.parsers.shearwater.shearwater_xml_parser",
+        "ShearwaterXmlParser",
+    ),
+    "garmin": ("depthviz.parsers.garmin.fit_parser", "GarminFitParser"),
+    "suunto": ("depthviz.parsers.suunto.fit_parser", "SuuntoFitParser"),
+    "manual": ("depthviz.parsers.manual.csv_parser", "ManualCsvParser"),
+}
+# Sources whose parsing is slow enough to be cached (FIT decoding)
+CACHED_SOURCES = ("garmin", "suunto")
 
 
 class DepthvizApplication:
@@ -67,11 +88,15 @@ class DepthvizApplication:
             "--source",
             help="Source where the dive log was downloaded from. \
                 This is required to correctly parse your data.",
-            choices=["apnealizer", "shearwater", "garmin", "suunto", "manual"],
+            choices=list(DIVELOG_PARSERS),
             required=True,
         )
         self.required_args.add_argument(
-            "-o", "--output", help="Path or filename of the video file.", required=True
+            "-o",
+            "--output",
+            help="Path or filename of the video file "
+            "(or .srt, .ass, .vtt to export subtitles instead of a video).",
+            required=True,
         )
         # OPTIONAL ARGUMENTS
         self.parser.add_argument(
@@ -112,6 +137,70 @@ class DepthvizApplication:
         self.parser.add_argument(
             "--time", help="Create a time overlay video.", action="store_true"
         )
+        self.parser.add_argument(
+            "-j",
+            "--jobs",
+            help="Number of processes used to render and encode the videos. (default: 1)",
+            type=int,
+            default=1,
+        )
+        self.parser.add_argument(
+            "--render-threads",
+            help="Number of threads rasterizing the frames while ffmpeg encodes them, "
+            "0 to rasterize and encode in series. "
+            f"(default: {DEFAULT_RENDER_THREADS}, half of the CPU cores, at most 4)",
+            type=int,
+            default=DEFAULT_RENDER_THREADS,
+        )
+        self.parser.add_argument(
+            "--queue-depth",
+            help="Maximum number of rasterized frames waiting to be encoded. "
+            f"(default: {DEFAULT_QUEUE_DEPTH})",
+            type=int,
+            default=DEFAULT_QUEUE_DEPTH,
+        )
+        self.parser.add_argument(
+            "--renderer",
+            help="Renderer of the overlay texts: atlas composes the frames from "
+            "pre-rasterized glyphs, libass renders the texts as ASS subtitles in the "
+            "ffmpeg encoding pass (--jobs, --vfr and --segment-library do not apply). "
+            "(default: atlas)",
+            type=str,
+            choices=["atlas", "libass"],
+            default="atlas",
+        )
+        self.parser.add_argument(
+            "--vfr",
+            help="Encode only the frames where the overlay changes "
+            "(variable frame rate, smaller and faster to encode).",
+            action="store_true",
+        )
+        self.parser.add_argument(
+            "--cache-dir",
+            help="Directory of the parsed dive logs and rendered frames cache shared "
+            "across runs. "
+            "(default: $XDG_CACHE_HOME/depthviz or ~/.cache/depthviz)",
+            type=str,
+            default=None,
+        )
+        self.parser.add_argument(
+            "--frame-cache",
+            help="Keep the rendered frames in the cache directory and read them back on "
+            "the next runs (the first run is slower).",
+            action="store_true",
+        )
+        self.parser.add_argument(
+            "--segment-library",
+            help="Assemble the videos from clips of each overlay text, encoded once and "
+            "kept in the cache directory (no encoding once the clips are cached).",
+            action="store_true",
+        )
+        self.parser.add_argument(
+            "--no-cache",
+            help="Do not use the cached videos, rendered frames and parsed dive logs "
+            "(always render the videos again).",
+            action="store_true",
+        )
         self.parser.add_argument(
             "-v",
             "--version",
@@ -119,6 +208,153 @@ class DepthvizApplication:
             version=f"%(prog)s version {__version__}",
         )
 
+    def load_divelog_parser(self, source: str) -> type[DiveLogParser]:
+        """Import the dive log parser of a source.
+
+        Args:
+            source: The source of the dive log (a key of `DIVELOG_PARSERS`).
+
+        Returns:
+            type[DiveLogParser]: The dive log parser class.
+        """
+        module_name, class_name = DIVELOG_PARSERS[source]
+        return cast(
+            type[DiveLogParser],
+            getattr(importlib.import_module(module_name), class_name),
+        )
+
+    def create_encoder(
+        self,
+        vfr: bool = False,
+        render_threads: int = 0,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    ) -> "FFmpegPipeEncoder":
+        """Create the encoder of the overlay videos.
+
+        Args:
+            vfr: Encode only the frames where the overlay changes, tuned for static
+                content.
+            render_threads: Number of threads rasterizing the frames while ffmpeg
+                encodes them (0: in series).
+            queue_depth: Maximum number of rasterized frames waiting to be encoded.
+
+        Returns:
+            FFmpegPipeEncoder: The encoder.
+        """
+        from depthviz.video.encoder import FFmpegPipeEncoder
+
+        if vfr:
+            return FFmpegPipeEncoder(frame_rate_mode="variable", tune="stillimage")
+        return FFmpegPipeEncoder(render_threads=render_threads, queue_depth=queue_depth)
+
+    def create_disk_cache(
+        self, cache_dir: Optional[str] = None
+    ) -> Optional["DiskFrameCache"]:
+        """Create the cache of the rendered frames shared across runs.
+
+        Args:
+            cache_dir: Directory of the cache (None: the default cache directory).
+
+        Returns:
+            DiskFrameCache: The cache, or None if the cache directory cannot be created.
+        """
+        from depthviz.video.frame_cache import DiskFrameCache, FrameCacheError
+
+        try:
+            return DiskFrameCache(cache_dir=cache_dir)
+        except FrameCacheError as e:
+            print(f"{e}; the rendered frames will not be cached.")
+            return None
+
+    def create_segment_library(
+        self, cache_dir: Optional[str] = None
+    ) -> Optional["SegmentLibrary"]:
+        """Create the library of pre-encoded clips of each overlay text.
+
+        Args:
+            cache_dir: Directory of the cache (None: the default cache directory).
+
+        Returns:
+            SegmentLibrary: The library, or None if its directory cannot be created.
+        """
+        from depthviz.video.segment_library import SegmentLibrary, SegmentLibraryError
+
+        try:
+            return SegmentLibrary(encoder=self.create_encoder(), cache_dir=cache_dir)
+        except SegmentLibraryError as e:
+            print(f"{e}; the videos will be encoded.")
+            return None
+
+    def create_output_cache(
+        self, cache_dir: Optional[str] = None
+    ) -> Optional["OutputCache"]:
+        """Create the cache of the output videos shared across runs.
+
+        Args:
+            cache_dir: Directory of the cache (None: the default cache directory).
+
+        Returns:
+            OutputCache: The cache, or None if the cache directory cannot be created.
+        """
+        from depthviz.video.output_cache import OutputCache, OutputCacheError
+
+        try:
+            return OutputCache(cache_dir=cache_dir)
+        except OutputCacheError as e:
+            print(f"{e}; the videos will not be cached.")
+            return None
+
+    def create_parse_cache(
+        self, cache_dir: Optional[str] = None
+    ) -> Optional["ParseCache"]:
+        """Create the cache of the parsed dive logs shared across runs.
+
+        Args:
+            cache_dir: Directory of the cache (None: the default cache directory).
+
+        Returns:
+            ParseCache: The cache, or None if the cache directory cannot be created.
+        """
+        from depthviz.parsers.generic.parse_cache import ParseCache, ParseCacheError
+
+        try:
+            return ParseCache(cache_dir=cache_dir)
+        except ParseCacheError as e:
+            print(f"{e}; the dive log will not be cached.")
+            return None
+
+    def get_output_digest(
+        self,
+        output_cache: Optional["OutputCache"],
+        time_data: list[float],
+        depth_data: Optional[list[float]],
+        options: dict[str, Union[str, int, float, bool, None]],
+        font: str,
+    ) -> Optional[str]:
+        """Compute the digest of the inputs of a video for the output cache.
+
+        Args:
+            output_cache: The output cache (None: no cache).
+            time_data: The time data of the dive log.
+            depth_data: The depth data of the dive log (None for a time video).
+            options: The render and encoding options.
+            font: Path to the font file.
+
+        Returns:
+            str: The digest, or None if the video is not cached.
+        """
+        if output_cache is None:
+            return None
+        from depthviz.video.output_cache import OutputCacheError
+
+        try:
+            return output_cache.digest(
+                time_data=time_data, depth_data=depth_data, options=options, font=font
+            )
+        except OutputCacheError:
+            # The font error is reported by the video creator
+            return None
+
     def create_depth_video(
         self,
         divelog_parser: DiveLogParser,
@@ -128,6 +364,15 @@ class DepthvizApplication:
         no_minus: bool = False,
         bg_color: str = DEFAULT_BG_COLOR,
         stroke_width: int = DEFAULT_STROKE_WIDTH,
+        jobs: int = 1,
+        render_threads: int = 0,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        vfr: bool = False,
+        cache_dir: Optional[str] = None,
+        segment_library: bool = False,
+        no_cache: bool = False,
+        renderer: str = "atlas",
+        frame_cache: bool = False,
     ) -> int:
         """Create the depth overlay video.
 
@@ -139,13 +384,29 @@ class DepthvizApplication:
             no_minus: Hide the minus sign for depth values.
             bg_color: Background color of the video.
             stroke_width: Width of the stroke around the text in pixels.
+            jobs: Number of processes used to render and encode the video.
+            render_threads: Number of threads rasterizing the frames while ffmpeg
+                encodes them (0: in series).
+            queue_depth: Maximum number of rasterized frames waiting to be encoded.
+            vfr: Encode only the frames where the overlay changes.
+            cache_dir: Directory of the rendered frames cache (None: default directory).
+            segment_library: Assemble the video from pre-encoded clips of each text.
+            no_cache: Do not use the cached videos and rendered frames.
+            renderer: The text renderer (`atlas` or `libass`).
+            frame_cache: Keep the rendered frames in the cache directory.
 
         Returns:
             int: Return code for the depth overlay video creation.
 
         Exceptions:
             OverlayVideoCreatorError: An error occurred during the video creation.
+            VideoEncoderError: An error occurred when validating the encoder settings.
         """
+        from depthviz.video.depth import DepthReportVideoCreator
+        from depthviz.video.subtitles import SubtitleExporter
+        from depthviz.video.encoder import VideoEncoderError
+        from depthviz.video.video_creator import OverlayVideoCreatorError
+
         try:
             time_data_from_divelog = divelog_parser.get_time_data()
             depth_data_from_divelog = divelog_parser.get_depth_data()
@@ -155,7 +416,61 @@ class DepthvizApplication:
                 bg_color=bg_color,
                 stroke_width=stroke_width,
                 size=DEFAULT_VIDEO_SIZE,
+                renderer=renderer,
+                composition="timeline",
+                encoder=self.create_encoder(
+                    vfr=vfr, render_threads=render_threads, queue_depth=queue_depth
+                ),
+                jobs=jobs,
+                disk_cache=(
+                    self.create_disk_cache(cache_dir=cache_dir)
+                    if frame_cache and not no_cache
+                    else None
+                ),
+                segment_library=(
+                    self.create_segment_library(cache_dir=cache_dir)
+                    if segment_library
+                    else None
+                ),
+            )
+            if SubtitleExporter.is_subtitle_path(output_path):
+                # Export the texts as subtitles, no frame is rendered
+                depth_report_video_creator.save_subtitles(
+                    text_list=depth_report_video_creator.create_depth_text_list(
+                        time_data=time_data_from_divelog,
+                        depth_data=depth_data_from_divelog,
+                        decimal_places=decimal_places,
+                        minus_sign=not no_minus,
+                    ),
+                    path=output_path,
+                )
+                print(f"Depth subtitles successfully created: {output_path}")
+                return 0
+            output_cache = None if no_cache else self.create_output_cache(cache_dir)
+            digest = self.get_output_digest(
+                output_cache=output_cache,
+                time_data=time_data_from_divelog,
+                depth_data=depth_data_from_divelog,
+                options={
+                    "video": "depth",
+                    "decimal_places": decimal_places,
+                    "no_minus": no_minus,
+                    "bg_color": bg_color,
+                    "stroke_width": stroke_width,
+                    "size": "x".join(map(str, DEFAULT_VIDEO_SIZE)),
+                    "vfr": vfr,
+                    "segment_library": segment_library,
+                    "renderer": renderer,
+                },
+                font=font,
             )
+            if (
+                output_cache is not None
+                and digest is not None
+                and output_cache.fetch(digest, output_path)
+            ):
+                print(f"Depth video successfully created (cached): {output_path}")
+                return 0
             video = depth_report_video_creator.render_depth_report_video(
                 time_data=time_data_from_divelog,
                 depth_data=depth_data_from_divelog,
@@ -163,7 +478,9 @@ class DepthvizApplication:
                 minus_sign=not no_minus,
             )
             depth_report_video_creator.save(video=video, path=output_path)
-        except OverlayVideoCreatorError as e:
+            if output_cache is not None and digest is not None:
+                output_cache.store(digest, output_path)
+        except (OverlayVideoCreatorError, VideoEncoderError) as e:
             print(e)
             return 1
 
@@ -177,6 +494,15 @@ class DepthvizApplication:
         font: str,
         bg_color: str = DEFAULT_BG_COLOR,
         stroke_width: int = DEFAULT_STROKE_WIDTH,
+        jobs: int = 1,
+        render_threads: int = 0,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        vfr: bool = False,
+        cache_dir: Optional[str] = None,
+        segment_library: bool = False,
+        no_cache: bool = False,
+        renderer: str = "atlas",
+        frame_cache: bool = False,
     ) -> int:
         """Create the time overlay video.
 
@@ -186,13 +512,29 @@ class DepthvizApplication:
             font: Path to the font file.
             bg_color: Background color of the video.
             stroke_width: Width of the stroke around the text in pixels.
+            jobs: Number of processes used to render and encode the video.
+            render_threads: Number of threads rasterizing the frames while ffmpeg
+                encodes them (0: in series).
+            queue_depth: Maximum number of rasterized frames waiting to be encoded.
+            vfr: Encode only the frames where the overlay changes.
+            cache_dir: Directory of the rendered frames cache (None: default directory).
+            segment_library: Assemble the video from pre-encoded clips of each text.
+            no_cache: Do not use the cached videos and rendered frames.
+            renderer: The text renderer (`atlas` or `libass`).
+            frame_cache: Keep the rendered frames in the cache directory.
 
         Returns:
             int: Return code for the time overlay video creation.
 
         Exceptions:
             OverlayVideoCreatorError: An error occurred during the video creation.
+            VideoEncoderError: An error occurred when validating the encoder settings.
         """
+        from depthviz.video.time import TimeReportVideoCreator
+        from depthviz.video.subtitles import SubtitleExporter
+        from depthviz.video.encoder import VideoEncoderError
+        from depthviz.video.video_creator import OverlayVideoCreatorError
+
         try:
             time_data_from_divelog = divelog_parser.get_time_data()
             time_report_video_creator = TimeReportVideoCreator(
@@ -200,12 +542,69 @@ class DepthvizApplication:
                 bg_color=bg_color,
                 stroke_width=stroke_width,
                 size=DEFAULT_VIDEO_SIZE,
+                renderer=renderer,
+                composition="timeline",
+                encoder=self.create_encoder(
+                    vfr=vfr, render_threads=render_threads, queue_depth=queue_depth
+                ),
+                jobs=jobs,
+                disk_cache=(
+                    self.create_disk_cache(cache_dir=cache_dir)
+                    if frame_cache and not no_cache
+                    else None
+                ),
+                segment_library=(
+                    self.create_segment_library(cache_dir=cache_dir)
+                    if segment_library
+                    else None
+                ),
             )
+            if SubtitleExporter.is_subtitle_path(output_path):
+                # Export the texts as subtitles, no frame is rendered
+                time_report_video_creator.save_subtitles(
+                    text_list=time_report_video_creator.create_time_text_list(
+                        time_data=time_data_from_divelog
+                    ),
+                    path=output_path,
+                )
+                print(
+                    "Time subtitles successfully created: "
+                    f"{time_report_video_creator.to_time_output_path(output_path)}"
+                )
+                return 0
+            time_output_path = time_report_video_creator.to_time_output_path(
+                output_path
+            )
+            output_cache = None if no_cache else self.create_output_cache(cache_dir)
+            digest = self.get_output_digest(
+                output_cache=output_cache,
+                time_data=time_data_from_divelog,
+                depth_data=None,
+                options={
+                    "video": "time",
+                    "bg_color": bg_color,
+                    "stroke_width": stroke_width,
+                    "size": "x".join(map(str, DEFAULT_VIDEO_SIZE)),
+                    "vfr": vfr,
+                    "segment_library": segment_library,
+                    "renderer": renderer,
+                },
+                font=font,
+            )
+            if (
+                output_cache is not None
+                and digest is not None
+                and output_cache.fetch(digest, time_output_path)
+            ):
+                print(f"Time video successfully created (cached): {time_output_path}")
+                return 0
             video = time_report_video_creator.render_time_report_video(
                 time_data=time_data_from_divelog
             )
             time_report_video_creator.save(video=video, path=output_path)
-        except OverlayVideoCreatorError as e:
+            if output_cache is not None and digest is not None:
+                output_cache.store(digest, time_output_path)
+        except (OverlayVideoCreatorError, VideoEncoderError) as e:
             print(e)
             return 1
 
@@ -228,8 +627,14 @@ class DepthvizApplication:
             print("Invalid value for decimal places. Valid values: 0, 1, 2.")
             return False
 
-        if args.output[-4:] != ".mp4":
-            print("Invalid output file extension. Please provide a .mp4 file.")
+        if (
+            args.output[-4:] != ".mp4"
+            and os.path.splitext(args.output)[1].lower() not in SUBTITLE_FORMATS
+        ):
+            print(
+                "Invalid output file extension. "
+                "Please provide a .mp4, .srt, .ass or .vtt file."
+            )
             return False
 
         return True
@@ -264,6 +669,8 @@ class DepthvizApplication:
         args = self.parser.parse_args(sys.argv[1:])
 
         # Print the depthviz banner
+        from depthviz.banner import Banner
+
         Banner.print_banner()
 
         # Check if the user input is valid before analyzing the dive log
@@ -271,21 +678,34 @@ class DepthvizApplication:
         if not self.is_user_input_valid(args):
             return 1
 
-        divelog_parser: DiveLogParser
-        if args.source == "apnealizer":
-            divelog_parser = ApnealizerCsvParser(depth_mode=args.depth_mode)
-        elif args.source == "shearwater":
-            divelog_parser = ShearwaterXmlParser(depth_mode=args.depth_mode)
-        elif args.source == "garmin":
-            divelog_parser = GarminFitParser(depth_mode=args.depth_mode)
-        elif args.source == "suunto":
-            divelog_parser = SuuntoFitParser(depth_mode=args.depth_mode)
-        elif args.source == "manual":
-            divelog_parser = ManualCsvParser(depth_mode=args.depth_mode)
-        else:
+        if args.source not in DIVELOG_PARSERS:
             print(f"Source {args.source} not supported.")
             return 1
 
+        # The processes and threads settings are checked by the video creators and
+        # encoders as well, check them before parsing the dive log
+        if args.jobs < 1:
+            print("Invalid number of jobs; must be a positive number.")
+            return 1
+        if args.render_threads < 0:
+            print("Invalid number of render threads; must be a positive number.")
+            return 1
+        if args.queue_depth < 1:
+            print("Invalid queue depth; must be a positive number.")
+            return 1
+
+        divelog_parser_class = self.load_divelog_parser(args.source)
+        divelog_parser: DiveLogParser
+        if args.source in CACHED_SOURCES:
+            divelog_parser = divelog_parser_class(
+                depth_mode=args.depth_mode,
+                parse_cache=(
+                    None if args.no_cache else self.create_parse_cache(args.cache_dir)
+                ),
+            )
+        else:
+            divelog_parser = divelog_parser_class(depth_mode=args.depth_mode)
+
         try:
             divelog_parser.parse(file_path=args.input)
         except DiveLogParserError as e:
@@ -300,6 +720,15 @@ class DepthvizApplication:
             font=args.font,
             bg_color=args.bg_color,
             stroke_width=args.stroke_width,
+            jobs=args.jobs,
+            render_threads=args.render_threads,
+            queue_depth=args.queue_depth,
+            vfr=args.vfr,
+            cache_dir=args.cache_dir,
+            segment_library=args.segment_library,
+            no_cache=args.no_cache,
+            renderer=args.renderer,
+            frame_cache=args.frame_cache,
         )
 
         # Exit if the depth overlay video creation failed
@@ -314,6 +743,15 @@ class DepthvizApplication:
                 font=args.font,
                 bg_color=args.bg_color,
                 stroke_width=args.stroke_width,
+                jobs=args.jobs,
+                render_threads=args.render_threads,
+                queue_depth=args.queue_depth,
+                vfr=args.vfr,
+                cache_dir=args.cache_dir,
+                segment_library=args.segment_library,
+                no_cache=args.no_cache,
+                renderer=args.renderer,
+                frame_cache=args.frame_cache,
             )
 
         return ret_code
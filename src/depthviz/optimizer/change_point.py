@@ -0,0 +1,223 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""This module provides a class to find the frames where the rounded depth changes.
+
+The depth profile is piecewise linear, so between two samples the rounded depth is
+monotonic and only changes when the depth crosses a rounding threshold. Instead of
+interpolating and rounding the depth of every frame, the frame of each crossing is
+solved directly from the two samples, and then checked against the exact per-frame
+computation of `LinearInterpolationDepth` (same frame grid, same interpolation
+formula and same padding rules), so that the output is identical frame for frame.
+"""
+
+import math
+from typing import Union
+from depthviz.optimizer.linear_interpolation import LinearInterpolationDepthError
+
+
+class ChangePointDepthError(LinearInterpolationDepthError):
+    """Base class for exceptions in this module."""
+
+
+class ChangePointDepth:
+    """A class to find the segments of frames showing the same rounded depth."""
+
+    def __init__(
+        self, times: list[float], depths: list[float], fps: int, decimal_places: int
+    ) -> None:
+        """Initialize the ChangePointDepth class.
+
+        Args:
+            times: A list of time points (in seconds).
+            depths: A list of corresponding depth values (in meters).
+            fps: The target frame rate (frames per second).
+            decimal_places: The number of decimal places to round the depth values to.
+
+        Raises:
+            ChangePointDepthError:
+                - If the input times and depths are not lists.
+                - If the input times and depths do not have the same length.
+                - If the FPS is not positive.
+        """
+        self.times = times
+        self.depths = depths
+        self.fps = fps
+        self.decimal_places = decimal_places
+        self.__segments = self.__find_segments()
+
+    def __round(self, depth: float) -> Union[int, float]:
+        """Rounds a depth value to the number of decimal places."""
+        if self.decimal_places == 0:
+            return round(depth)
+        return round(depth, self.decimal_places)
+
+    def __frame_time(self, frame: int) -> float:
+        """Returns the time of a frame (same as the interpolated times)."""
+        return float(self.times[0] + (frame / self.fps))
+
+    def __depth_at(self, frame: int, pos: int) -> float:
+        """Returns the interpolated depth of a frame between the samples pos and pos + 1."""
+        t = self.__frame_time(frame)
+        t1, d1 = self.times[pos], self.depths[pos]
+        if t == t1:
+            return float(d1)
+        t2, d2 = self.times[pos + 1], self.depths[pos + 1]
+        return float(d1 + (t - t1) * (d2 - d1) / (t2 - t1))
+
+    def __first_frame_after(self, time: float, total_frames: int) -> int:
+        """Returns the first frame with a time strictly greater than `time`."""
+        frame = max(math.ceil((time - self.times[0]) * self.fps), 0)
+        while frame > 0 and self.__frame_time(frame - 1) > time:
+            frame -= 1
+        while frame < total_frames and not self.__frame_time(frame) > time:
+            frame += 1
+        return frame
+
+    def __pointer_ranges(self, total_frames: int) -> list[tuple[int, int, int]]:
+        """Returns the ranges of frames interpolated between the same pair of samples.
+
+        The interpolation walks the samples with a pointer which moves forward by at
+        most one sample per frame, when the frame time passes the next sample.
+
+        Args:
+            total_frames: The number of frames on the interpolation grid.
+
+        Returns:
+            A list of (pointer, first frame, end frame) tuples (end frame excluded).
+        """
+        ranges = []
+        pos = 0
+        start = 0
+        while start < total_frames:
+            end = total_frames
+            if pos + 2 < len(self.times):
+                end = max(
+                    self.__first_frame_after(self.times[pos + 1], total_frames),
+                    start + 1,
+                )
+                end = min(end, total_frames)
+            ranges.append((pos, start, end))
+            pos += 1
+            start = end
+        return ranges
+
+    def __run_end(self, start: int, end: int, pos: int) -> tuple[Union[int, float], int]:
+        """Finds the first frame after `start` showing a different rounded depth.
+
+        Args:
+            start: The first frame of the run.
+            end: The end frame of the pointer range (excluded).
+            pos: The pointer of the samples used to interpolate the frames.
+
+        Returns:
+            The rounded depth of the run and its end frame (excluded), at most `end`.
+        """
+        value = self.__round(self.__depth_at(start, pos))
+        t1, d1 = self.times[pos], self.depths[pos]
+        t2, d2 = self.times[pos + 1], self.depths[pos + 1]
+        if d1 == d2 or t1 == t2:
+            guess = end
+        else:
+            # Solve the time where the depth crosses the next rounding threshold
+            half_step = 0.5 * 10 ** (-self.decimal_places)
+            threshold = value + half_step if d2 > d1 else value - half_step
+            crossing = t1 + (threshold - d1) * (t2 - t1) / (d2 - d1)
+            guess = end
+            if math.isfinite(crossing):
+                guess = math.ceil((crossing - self.times[0]) * self.fps)
+        guess = min(max(guess, start + 1), end)
+
+        # Check the guess with the exact per-frame depth, then bisect if it is off:
+        # `low` shows the same value, `high` shows a different one (or is the end)
+        low, high = start, end
+        if guess < end and self.__round(self.__depth_at(guess, pos)) == value:
+            low = guess
+            if guess + 1 < end and self.__round(self.__depth_at(guess + 1, pos)) != value:
+                high = guess + 1
+        else:
+            high = guess
+            if guess - 1 > start and self.__round(self.__depth_at(guess - 1, pos)) == value:
+                low = guess - 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.__round(self.__depth_at(middle, pos)) == value:
+                low = middle
+            else:
+                high = middle
+        return value, high
+
+    def __find_segments(self) -> list[dict[str, float]]:
+        """Finds the segments of frames showing the same rounded depth.
+
+        Returns:
+            A list of dictionaries containing the rounded depth, start time and duration
+            of each segment.
+        """
+        if not (isinstance(self.times, list) and isinstance(self.depths, list)):
+            raise ChangePointDepthError("Error: Input times and depths must be lists.")
+
+        if len(self.times) != len(self.depths):
+            raise ChangePointDepthError(
+                "Error: Times and depths lists must have the same length."
+            )
+
+        if self.fps <= 0:
+            raise ChangePointDepthError("Error: FPS must be positive.")
+
+        if len(self.times) == 1:
+            # A constant depth for `fps` frames, one second apart
+            return [
+                {
+                    "depth": self.__round(float(self.depths[0])),
+                    "start": 0.0,
+                    "duration": float(self.fps),
+                }
+            ]
+
+        total_frames = math.ceil((self.times[-1] - self.times[0]) * self.fps)
+        if self.times[-1] - self.times[0] <= 1:
+            expected_len = math.ceil(self.fps * (self.times[-1] - self.times[0])) * 2
+        else:
+            expected_len = (
+                math.ceil(self.fps * (self.times[-1] - self.times[0])) + self.fps
+            )
+
+        # Runs of (rounded depth, first frame, end frame)
+        runs: list[tuple[Union[int, float], int, int]] = []
+        for pos, range_start, range_end in self.__pointer_ranges(total_frames):
+            start = range_start
+            while start < range_end:
+                value, end = self.__run_end(start, range_end, pos)
+                if runs and runs[-1][0] == value:
+                    runs[-1] = (runs[-1][0], runs[-1][1], end)
+                else:
+                    runs.append((value, start, end))
+                start = end
+
+        # The last depth is repeated until the expected length
+        if expected_len > total_frames:
+            value = self.__round(float(self.depths[-1]))
+            if runs and runs[-1][0] == value:
+                runs[-1] = (value, runs[-1][1], expected_len)
+            else:
+                runs.append((value, total_frames, expected_len))
+
+        return [
+            {
+                "depth": value,
+                "start": start / self.fps,
+                "duration": (end - start) / self.fps,
+            }
+            for value, start, end in runs
+        ]
+
+    def get_segments(self) -> list[dict[str, float]]:
+        """Returns the segments of frames showing the same rounded depth.
+
+        Returns:
+            A list of dictionaries containing the rounded depth (`depth`), the start time
+            (`start`) and the duration (`duration`) of each segment in seconds.
+        """
+        return self.__segments
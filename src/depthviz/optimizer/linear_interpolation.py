@@ -2,9 +2,18 @@
 # Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
 
 
-"""This module provides a class to perform linear interpolation on depth data."""
+"""This module provides a class to perform linear interpolation on depth data.
+
+Constants:
+    ENGINES: The available interpolation engines.
+"""
 
 import math
+from typing import Union
+import numpy as np
+from numpy.typing import NDArray
+
+ENGINES = ("numpy", "python")
 
 
 class LinearInterpolationDepthError(Exception):
@@ -14,25 +23,39 @@ class LinearInterpolationDepthError(Exception):
 class LinearInterpolationDepth:
     """A class to perform linear interpolation on depth data."""
 
-    def __init__(self, times: list[float], depths: list[float], fps: int) -> None:
+    def __init__(
+        self,
+        times: list[float],
+        depths: list[float],
+        fps: int,
+        engine: str = "numpy",
+    ) -> None:
         """Initialize the LinearInterpolationDepth class.
 
         Args:
             times: A list of time points (in seconds).
             depths: A list of corresponding depth values (in meters).
             fps: The target frame rate (frames per second).
+            engine: `numpy` interpolates all the frames at once, `python` walks the
+                frames one by one (fallback). Both produce the same values.
 
         Raises:
             LinearInterpolationDepthError:
+                - If the engine is invalid.
                 - If the input times and depths are not lists.
                 - If the input times and depths do not have the same length.
                 - If the FPS is not positive.
         """
+        if engine not in ENGINES:
+            raise LinearInterpolationDepthError(
+                f"Error: Invalid engine: {engine}; must be one of {', '.join(ENGINES)}."
+            )
         self.__current_pos = 0
         self.times = times
         self.depths = depths
         self.fps = fps
-        self.__new_times: list[float] = []
+        self.engine = engine
+        self.__new_times: NDArray[np.float64] = np.empty(0, dtype=np.float64)
         self.__interpolated_depths = self.__interpolate_depth()
 
     def __linear_interpolation(self, x: float, current_pos: int = 0) -> float:
@@ -42,7 +65,15 @@ class LinearInterpolationDepth:
         t2, d2 = self.times[i + 1], self.depths[i + 1]
         return float(d1 + (x - t1) * (d2 - d1) / (t2 - t1))
 
-    def __interpolate_depth(self) -> list[float]:
+    def __expected_length(self) -> int:
+        """Returns the number of frames of the interpolated data (including padding)."""
+        # If the total time is less than 1 second, double the length of the interpolated depth
+        if self.times[-1] - self.times[0] <= 1:
+            return math.ceil(self.fps * (self.times[-1] - self.times[0])) * 2
+        # Otherwise, add one more second to the length of the interpolated depth
+        return math.ceil(self.fps * (self.times[-1] - self.times[0])) + self.fps
+
+    def __interpolate_depth(self) -> NDArray[np.float64]:
         """Interpolates depth data.
 
         Interpolates the depth data at the target frame rate (fps) using linear interpolation.
@@ -69,17 +100,36 @@ class LinearInterpolationDepth:
         if len(self.times) == 1:
             # If there is only one data point, return a constant depth for a second
             # (according to the fps)
-            self.__new_times = [float(t) for t in range(self.fps)]
-            return [self.depths[0] for _ in range(self.fps)]
+            self.__new_times = np.arange(self.fps, dtype=np.float64)
+            return np.full(self.fps, self.depths[0], dtype=np.float64)
 
+        new_times: Union[list[float], NDArray[np.float64]]
+        interpolated_depths: Union[list[float], NDArray[np.float64]]
+        # The vectorized walk assumes the samples are sorted by time, without duplicate
+        # times (the Python engine raises if it interpolates between them)
+        if self.engine == "numpy" and all(
+            t1 < t2 for t1, t2 in zip(self.times, self.times[1:])
+        ):
+            new_times, interpolated_depths = self.__interpolate_depth_numpy()
+        else:
+            new_times, interpolated_depths = self.__interpolate_depth_python()
+        self.__new_times = np.array(new_times, dtype=np.float64)
+        return np.array(interpolated_depths, dtype=np.float64)
+
+    def __interpolate_depth_python(self) -> tuple[list[float], list[float]]:
+        """Interpolates depth data frame by frame.
+
+        Returns:
+            The interpolated time and depth data.
+        """
         interpolated_depths = []
         # Calculate the total number of frames
         total_frames = math.ceil((self.times[-1] - self.times[0]) * self.fps)
         # Generate a list of new time points for the interpolated depth data
-        self.__new_times = [self.times[0] + (i / self.fps) for i in range(total_frames)]
+        new_times = [self.times[0] + (i / self.fps) for i in range(total_frames)]
 
         # Interpolate the depth values at the new time points
-        for i, t in enumerate(self.__new_times):
+        for t in new_times:
             # If the time point is the same as the original time point, use the original depth
             if t == self.times[self.__current_pos]:
                 interpolated_depths.append(float(self.depths[self.__current_pos]))
@@ -96,22 +146,62 @@ class LinearInterpolationDepth:
                     self.__linear_interpolation(t, self.__current_pos)
                 )
 
-        # If the total time is less than 1 second, double the length of the interpolated depth
-        if self.times[-1] - self.times[0] <= 1:
-            expected_len = math.ceil(self.fps * (self.times[-1] - self.times[0])) * 2
-        else:
-            # Otherwise, add one more frame to the length of the interpolated depth
-            expected_len = (
-                math.ceil(self.fps * (self.times[-1] - self.times[0])) + self.fps
-            )
         # If the length of the interpolated depth is less than the expected length,
         # repeat the last depth value and time point
-        for i in range(total_frames, expected_len):
-            self.__new_times.append(self.__new_times[-1] + (1 / self.fps))
+        for _ in range(total_frames, self.__expected_length()):
+            new_times.append(new_times[-1] + (1 / self.fps))
             interpolated_depths.append(float(self.depths[-1]))
-        return interpolated_depths
+        return new_times, interpolated_depths
+
+    def __interpolate_depth_numpy(
+        self,
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Interpolates depth data for all the frames at once.
+
+        Note:
+            This is not a plain `np.interp`: the frame by frame walk moves its pointer
+            by at most one sample per frame, so frames right after a burst of samples
+            are interpolated between earlier samples. The same walk is reproduced here
+            (and the same formula is used), so the values are identical to the Python
+            engine.
+
+        Returns:
+            The interpolated time and depth data.
+        """
+        times = np.array(self.times, dtype=np.float64)
+        depths = np.array(self.depths, dtype=np.float64)
+        total_frames = max(math.ceil((self.times[-1] - self.times[0]) * self.fps), 0)
+        frames = np.arange(total_frames)
+        new_times = self.times[0] + (frames / self.fps)
+
+        # The pointer wants to move to the last sample before the frame time,
+        # but only moves by one sample per frame: p[k] = min(q[k], p[k - 1] + 1)
+        wanted = np.maximum(np.searchsorted(times, new_times, side="left") - 1, 0)
+        pointers = frames + np.minimum.accumulate(wanted - frames)
+        pointers = np.minimum(pointers, len(self.times) - 2)
+
+        t1, d1 = times[pointers], depths[pointers]
+        t2, d2 = times[pointers + 1], depths[pointers + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interpolated_depths = d1 + (new_times - t1) * (d2 - d1) / (t2 - t1)
+        # If the time point is the same as the original time point, use the original depth
+        interpolated_depths = np.where(new_times == t1, d1, interpolated_depths)
+
+        # Repeat the last depth value and time point up to the expected length
+        padding = self.__expected_length() - total_frames
+        if padding > 0:
+            # Accumulated one frame at a time, like the Python engine
+            padding_times = np.full(padding + 1, 1 / self.fps)
+            padding_times[0] = new_times[-1]
+            new_times = np.concatenate(
+                (new_times, np.add.accumulate(padding_times)[1:])
+            )
+            interpolated_depths = np.concatenate(
+                (interpolated_depths, np.full(padding, float(self.depths[-1])))
+            )
+        return new_times, interpolated_depths
 
-    def get_interpolated_depths(self) -> list[float]:
+    def get_interpolated_depths(self) -> NDArray[np.float64]:
         """Returns the interpolated depth data.
 
         Returns:
@@ -119,7 +209,7 @@ class LinearInterpolationDepth:
         """
         return self.__interpolated_depths
 
-    def get_interpolated_times(self) -> list[float]:
+    def get_interpolated_times(self) -> NDArray[np.float64]:
         """Returns the interpolated time data.
 
         Returns:
@@ -5,11 +5,13 @@
 """A module for parsing a FIT file containing depth data from Garmin dive computers."""
 
 import math
-from typing import cast, Union
+from array import array
+from typing import Any, cast, Optional, Union
 from datetime import datetime, timezone
-from garmin_fit_sdk import Decoder, Stream
+import numpy as np
 
-from depthviz.parsers.generic.generic_divelog_parser import DiveLogFileNotFoundError
+from depthviz.parsers.generic.parse_cache import ParseCache
+from depthviz.parsers.generic.fit.fit_reader import read_fit_dive_log
 from depthviz.parsers.generic.fit.fit_parser import (
     DiveLogFitParser,
     DiveLogFitInvalidFitFileError,
@@ -21,18 +23,24 @@ from depthviz.parsers.generic.fit.fit_parser import (
 class GarminFitParser(DiveLogFitParser):
     """A class to parse a FIT file containing depth data."""
 
-    def __init__(self, selected_dive_idx: int = -1, depth_mode: str = "raw") -> None:
+    def __init__(
+        self,
+        selected_dive_idx: int = -1,
+        depth_mode: str = "raw",
+        parse_cache: Optional[ParseCache] = None,
+    ) -> None:
         """Initializes the GarminFitParser object.
 
         Args:
             selected_dive_idx: The index of the dive to be parsed.
             depth_mode: The depth mode to use for parsing the FIT file.
+            parse_cache: The cache of the parsed FIT files (None: no cache).
 
         Note:
             If there are multiple dives in the FIT file, the user will be prompted to select a dive
             to import. The selected dive will be stored in the `__selected_dive_idx` attribute.
         """
-        super().__init__(depth_mode=depth_mode)
+        super().__init__(depth_mode=depth_mode, parse_cache=parse_cache)
         self.__margin_start_time = 2
 
         # Select the dive to be parsed (in case of multiple dives in FIT file)
@@ -116,17 +124,13 @@ class GarminFitParser(DiveLogFitParser):
 
         Note:
             The FIT file must contain 'activity' type data to be imported.
+            If a parse cache is set, a FIT file parsed before is read from the cache.
         """
-        try:
-            stream = Stream.from_file(file_path)
-            decoder = Decoder(stream)
-            messages, errors = decoder.read(convert_datetimes_to_dates=False)
-            if errors:
-                raise errors[0]
-        except RuntimeError as e:
-            raise DiveLogFitInvalidFitFileError(f"Invalid FIT file: {file_path}") from e
-        except FileNotFoundError as e:
-            raise DiveLogFileNotFoundError(f"File not found: {file_path}") from e
+        if self.__parse_cached(file_path):
+            return
+
+        # Only the file ID, record, lap and dive summary fields used below are kept
+        messages, records = read_fit_dive_log(file_path)
 
         try:
             file_id_mesgs = messages.get("file_id_mesgs", [])
@@ -167,66 +171,129 @@ class GarminFitParser(DiveLogFitParser):
                 f"Invalid FIT file: {file_path} does not contain any dive data"
             )
 
+        self.cache_dive_summary(file_path, dive_summary)
+
         # A prompt to select the dive if there are multiple dives in the FIT file
         if self.__selected_dive_idx == -1:
             self.__selected_dive_idx = self.select_dive(dive_summary)
 
-        records = messages.get("record_mesgs", [])
-        first_timestamp = None
-        max_depth_reached = False
+        self.__extract_dive(records, dive_summary[self.__selected_dive_idx])
 
-        for record in records:
-            timestamp_now = cast(int, record.get("timestamp"))
-            start_time = cast(
-                int, dive_summary[self.__selected_dive_idx].get("start_time")
-            )
-            end_time = cast(int, dive_summary[self.__selected_dive_idx].get("end_time"))
-            max_depth = cast(
-                float, dive_summary[self.__selected_dive_idx].get("max_depth")
+        if not self.time_data or not self.depth_data:
+            raise DiveLogFitDiveNotFoundError(
+                f"Invalid Dive Data: Dive data not found in FIT file: {file_path}"
             )
 
-            # Skip the records before the dive starts
-            if timestamp_now < start_time - self.__margin_start_time:
-                continue
+        # Convert depth data according to the depth mode
+        self.depth_mode_execute()
+        self.cache_dive(file_path, self.__selected_dive_idx)
+
+    def __extract_dive(
+        self, records: dict[str, "array[float]"], dive: dict[str, Any]
+    ) -> None:
+        """Extracts the time and depth data of a dive from the records.
+
+        The records of the dive window (from the start time minus a margin to the end
+        time) are found with a binary search of the sorted timestamps and sliced in
+        bulk. After the end time, the records are read one at a time until the dive
+        "actually" ends.
+
+        Args:
+            records: The timestamp and depth columns of the records in the FIT file.
+            dive: The dive summary of the dive.
+        """
+        start_time = dive["start_time"]
+        end_time = dive["end_time"]
+        timestamps = np.frombuffer(records["timestamp"], dtype=np.float64)
+        depths = np.frombuffer(records["depth"], dtype=np.float64)
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            depths = depths[order]
+
+        # Skip the records before the dive starts
+        first_idx = int(
+            np.searchsorted(
+                timestamps, start_time - self.__margin_start_time, side="left"
+            )
+        )
+        end_idx = int(np.searchsorted(timestamps, end_time, side="right"))
+        if first_idx == len(timestamps):
+            return
+        first_timestamp = float(timestamps[first_idx])
+        max_depth_reached = False
+        dive_ended = False
 
-            # Calculate the time and depth data
-            if first_timestamp is None:
-                first_timestamp = timestamp_now
+        # Append the records of the dive window, up to a depth of 0 after the max depth
+        window_depths = depths[first_idx:end_idx]
+        if window_depths.size:
+            max_depth_idx = np.flatnonzero(
+                np.floor(window_depths) == math.floor(dive["max_depth"])
+            )
+            if max_depth_idx.size:
+                max_depth_reached = True
+                surface_idx = max_depth_idx[0] + np.flatnonzero(
+                    np.abs(window_depths[max_depth_idx[0] :]) < 0.001
+                )
+                for idx in surface_idx:
+                    if round(float(window_depths[idx]), 3) == 0:
+                        end_idx = first_idx + int(idx) + 1
+                        dive_ended = True
+                        break
+            self.time_data.extend(
+                (timestamps[first_idx:end_idx] - first_timestamp).tolist()
+            )
+            self.depth_data.extend(depths[first_idx:end_idx].tolist())
+        if dive_ended:
+            return
 
-            time = float(timestamp_now - first_timestamp)
-            depth = cast(float, record.get("depth"))
+        # After the dive ends, get the depth data until the current depth > the previous depth
+        # This is to get all the depth data until the dive "actually" ends
+        for idx in range(end_idx, len(timestamps)):
+            depth = float(depths[idx])
+            time = float(timestamps[idx]) - first_timestamp
 
-            # After the dive ends, get the depth data until the current depth > the previous depth
-            # This is to get all the depth data until the dive "actually" ends
             previous_depth = self.depth_data[-1] if self.depth_data else -1
             previous_time = self.time_data[-1] if self.time_data else -1
-            if timestamp_now > end_time:
-                if depth > previous_depth:
-                    break
-                # Avoid jummping too far ahead (not the current dive anymore)
-                # Note: Garmin normally records the depth every 1s, otherwise the dive has ended.
-                if time > previous_time + 2:
-                    break
+            if depth > previous_depth:
+                break
+            # Avoid jummping too far ahead (not the current dive anymore)
+            # Note: Garmin normally records the depth every 1s, otherwise the dive has ended.
+            if time > previous_time + 2:
+                break
 
             # Append the time and depth data
             self.time_data.append(time)
             self.depth_data.append(depth)
 
             # Check if the max depth is reached to avoid stopping the dive too early
-            if not max_depth_reached and math.floor(depth) == math.floor(max_depth):
+            if not max_depth_reached and math.floor(depth) == math.floor(
+                dive["max_depth"]
+            ):
                 max_depth_reached = True
 
             # If the depth is 0 and the max depth is reached, stop getting the depth data
             if round(depth, 3) == 0 and max_depth_reached:
                 break
 
-        if not self.time_data or not self.depth_data:
-            raise DiveLogFitDiveNotFoundError(
-                f"Invalid Dive Data: Dive data not found in FIT file: {file_path}"
-            )
+    def __parse_cached(self, file_path: str) -> bool:
+        """Reads the selected dive from the parse cache.
 
-        # Convert depth data according to the depth mode
-        self.depth_mode_execute()
+        The dive is selected from the cached dive summary (prompting the user if
+        needed), so a dive which is not cached yet is not prompted for again.
+
+        Args:
+            file_path: Path to the FIT file containing depth data.
+
+        Returns:
+            True if the dive was read from the cache, False otherwise.
+        """
+        dive_summary = self.get_cached_dive_summary(file_path)
+        if not dive_summary:
+            return False
+        if self.__selected_dive_idx == -1:
+            self.__selected_dive_idx = self.select_dive(dive_summary)
+        return self.load_cached_dive(file_path, self.__selected_dive_idx)
 
     def get_time_data(self) -> list[float]:
         """Returns the time data parsed from the FIT file.
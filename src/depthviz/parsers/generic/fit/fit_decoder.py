@@ -0,0 +1,625 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""A built-in decoder for the dive log messages of FIT files.
+
+The decoder of the FIT SDK is written for every use of the FIT protocol: it decodes
+every field of every message into dictionaries, which is slow on the multi-hour
+activities of a watch. This decoder only reads what a dive log needs. Each definition
+message is compiled once into a `struct.Struct` which skips the unwanted fields of its
+data messages, the wanted fields of the record messages (e.g., timestamp and depth) are
+read into `array('d')` columns and the wanted fields of the other messages (e.g., laps,
+dive summaries) into dictionaries, with the same values as the SDK (scale and offset,
+enum names). Compressed timestamp headers, which the SDK does not support, are decoded
+as well.
+
+The data is decoded from a `memoryview`, so a memory-mapped file is decoded without
+being copied. A file truncated in the middle of a record (e.g., by a watch which died
+mid-session) is decoded up to its last complete record, without checking its CRC. The
+CRC of a large file is computed block by block with numpy (see `fit_crc`), so checking it
+costs a few milliseconds rather than dominating the decoding.
+
+Anything else the decoder does not support (e.g., an array or string field wanted) is
+raised as a `FitDecoderError`, so the caller can decode the file with the SDK instead.
+"""
+
+import math
+import struct
+from array import array
+from functools import lru_cache
+from typing import Any, Callable, Mapping, Optional, Union
+import numpy as np
+from garmin_fit_sdk import Profile
+
+# The base types of the fields: (size in bytes, struct format character, invalid value)
+# The floats are read as their bits, as their invalid values are bit patterns (NaNs)
+_BASE_TYPES: dict[int, tuple[int, str, int]] = {
+    0x00: (1, "B", 0xFF),  # enum
+    0x01: (1, "b", 0x7F),  # sint8
+    0x02: (1, "B", 0xFF),  # uint8
+    0x03: (2, "h", 0x7FFF),  # sint16
+    0x04: (2, "H", 0xFFFF),  # uint16
+    0x05: (4, "i", 0x7FFFFFFF),  # sint32
+    0x06: (4, "I", 0xFFFFFFFF),  # uint32
+    0x07: (1, "s", 0x00),  # string
+    0x08: (4, "I", 0xFFFFFFFF),  # float32
+    0x09: (8, "Q", 0xFFFFFFFFFFFFFFFF),  # float64
+    0x0A: (1, "B", 0x00),  # uint8z
+    0x0B: (2, "H", 0x0000),  # uint16z
+    0x0C: (4, "I", 0x00000000),  # uint32z
+    0x0D: (1, "B", 0xFF),  # byte
+    0x0E: (8, "q", 0x7FFFFFFFFFFFFFFF),  # sint64
+    0x0F: (8, "Q", 0xFFFFFFFFFFFFFFFF),  # uint64
+    0x10: (8, "Q", 0x0000000000000000),  # uint64z
+}
+# The (bits, float) formats of the float base types
+_FLOAT_FORMATS = {0x08: ("<I", "<f"), 0x09: ("<Q", "<d")}
+_BASE_TYPE_MASK = 0x1F
+_UINT8 = 0x02
+_STRING = 0x07
+
+# The record header bits
+_COMPRESSED_HEADER = 0x80
+_DEFINITION_HEADER = 0x40
+_DEVELOPER_DATA_FLAG = 0x20
+_LOCAL_MESG_NUM_MASK = 0x0F
+
+_TIMESTAMP_FIELD_NUM = 253
+_NUMERIC_FIELD_TYPES = frozenset(
+    (
+        "sint8",
+        "uint8",
+        "sint16",
+        "uint16",
+        "sint32",
+        "uint32",
+        "float32",
+        "float64",
+        "uint8z",
+        "uint16z",
+        "uint32z",
+        "byte",
+        "sint64",
+        "uint64",
+        "uint64z",
+    )
+)
+
+# The CRC-16 of the FIT protocol, one table entry per byte value
+_CRC_TABLE = []
+for _byte in range(256):
+    _crc = _byte
+    for _ in range(8):
+        _crc = (_crc >> 1) ^ 0xA001 if _crc & 1 else _crc >> 1
+    _CRC_TABLE.append(_crc)
+_CRC_ARRAY = np.array(_CRC_TABLE, dtype=np.uint16)
+# The data size from which the CRC is computed block by block
+_CRC_BLOCKS_MIN_SIZE = 4096
+
+
+class FitDecoderError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class FitDecoderTruncatedFileError(FitDecoderError):
+    """Exception raised when a FIT file ends in the middle of a record."""
+
+
+def fit_crc(data: Union[bytes, memoryview], crc: int = 0) -> int:
+    """Computes the CRC-16 of the FIT protocol.
+
+    A byte at a time, the CRC is a Python loop of about 10 MB/s. The CRC of a large data
+    is computed instead on blocks of bytes: the CRCs of all the blocks are computed
+    side by side with numpy (one step per byte of a block), then combined in order.
+    As the CRC is linear, the CRC after a block is the CRC of the block xor the CRC of
+    a block of zeros from the previous CRC, which is read from two tables.
+
+    Args:
+        data: The bytes to check.
+        crc: The CRC of the previous bytes.
+
+    Returns:
+        The CRC of the bytes.
+    """
+    size = len(data)
+    if size < _CRC_BLOCKS_MIN_SIZE:
+        return _bytes_crc(data, crc)
+    block_size = max(math.isqrt(size) // 4, 64)
+    num_blocks = size // block_size
+    blocks = np.frombuffer(data, dtype=np.uint8, count=num_blocks * block_size)
+    # One row per byte position of the blocks, copied so the data is not exported
+    rows = blocks.reshape(num_blocks, block_size).T.copy()
+    del blocks
+    block_crcs = np.zeros(num_blocks, dtype=np.uint16)
+    indices = np.empty(num_blocks, dtype=np.uint16)
+    entries = np.empty(num_blocks, dtype=np.uint16)
+    for row in rows:
+        np.bitwise_xor(block_crcs, row, out=indices)
+        np.bitwise_and(indices, 0xFF, out=indices)
+        np.take(_CRC_ARRAY, indices, out=entries)
+        np.right_shift(block_crcs, 8, out=block_crcs)
+        np.bitwise_xor(block_crcs, entries, out=block_crcs)
+    low_table, high_table = _zero_block_tables(block_size)
+    for block_crc in block_crcs.tolist():
+        crc = low_table[crc & 0xFF] ^ high_table[crc >> 8] ^ block_crc
+    with memoryview(data) as view:
+        return _bytes_crc(view[num_blocks * block_size :], crc)
+
+
+def _bytes_crc(data: Union[bytes, memoryview], crc: int) -> int:
+    """Computes the CRC-16 of the FIT protocol a byte at a time.
+
+    Args:
+        data: The bytes to check.
+        crc: The CRC of the previous bytes.
+
+    Returns:
+        The CRC of the bytes.
+    """
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+@lru_cache(maxsize=8)
+def _zero_block_tables(block_size: int) -> tuple[list[int], list[int]]:
+    """Returns the tables of the CRCs of a block of zeros.
+
+    The CRC of a block of zeros from a CRC is the xor of the CRCs from each of its bits,
+    so it is the xor of an entry for its low byte and an entry for its high byte.
+
+    Args:
+        block_size: The size of the block of zeros.
+
+    Returns:
+        The (low byte, high byte) tables of the CRCs of the block from a CRC.
+    """
+    zeros = bytes(block_size)
+    bit_crcs = [_bytes_crc(zeros, 1 << bit) for bit in range(16)]
+    tables: tuple[list[int], list[int]] = ([], [])
+    for table, table_bit_crcs in zip(tables, (bit_crcs[:8], bit_crcs[8:])):
+        for value in range(256):
+            crc = 0
+            for bit, bit_crc in enumerate(table_bit_crcs):
+                if value >> bit & 1:
+                    crc ^= bit_crc
+            table.append(crc)
+    return tables
+
+
+def _identity(raw: Any) -> Any:
+    """Returns a raw field value as is."""
+    return raw
+
+
+def _float_converter(
+    base_type: int, convert: Callable[[Any], Any]
+) -> Callable[[Any], Any]:
+    """Returns the function converting the bits of a float field value.
+
+    Args:
+        base_type: The base type of the field (float32 or float64).
+        convert: The function converting the float value to the field value.
+
+    Returns:
+        A function converting the bits (not invalid) to the field value.
+    """
+    bits_format, float_format = _FLOAT_FORMATS[base_type]
+    return lambda raw: convert(
+        struct.unpack(float_format, struct.pack(bits_format, raw))[0]
+    )
+
+
+def _field_converter(field_profile: dict[str, Any]) -> Callable[[Any], Any]:
+    """Returns the function converting a raw field value like the SDK decoder.
+
+    Numeric fields are scaled and offset, and the values of the other types with names
+    (e.g., enums) are converted to their names.
+
+    Args:
+        field_profile: The profile of the field (type, scale, offset).
+
+    Returns:
+        A function converting a raw value (not invalid) to the field value.
+    """
+    field_type = field_profile["type"]
+    if field_type in _NUMERIC_FIELD_TYPES:
+        if len(field_profile["scale"]) > 1:
+            return _identity
+        scale = field_profile["scale"][0] if field_profile["scale"] else 1
+        offset = field_profile["offset"][0] if field_profile["offset"] else 0
+        if scale == 1 and offset == 0:
+            return _identity
+        if scale == 1:
+            return lambda raw: raw - offset
+        return lambda raw: raw / scale - offset
+    names = Profile["types"].get(field_type)
+    if names is None:
+        return _identity
+    return lambda raw: names.get(raw, raw)
+
+
+def _column_converter(field_profile: dict[str, Any]) -> Callable[[Any], Any]:
+    """Returns the function converting a raw field value to a column value.
+
+    Args:
+        field_profile: The profile of the field (type, scale, offset).
+
+    Returns:
+        A function converting a raw value (not invalid) to the field value.
+
+    Raises:
+        FitDecoderError: If the field is not a number (e.g., an enum).
+    """
+    if field_profile["type"] == "date_time":
+        return _identity
+    if field_profile["type"] not in _NUMERIC_FIELD_TYPES:
+        raise FitDecoderError("Only numeric fields can be read as columns.")
+    return _field_converter(field_profile)
+
+
+class _MessageLayout:
+    """The compiled layout of the data messages of a definition message.
+
+    Attributes:
+        size: The size of a data message in bytes (developer fields included).
+        unpack: The function reading the values of the read fields of a data message,
+            or None if no field is read.
+        timestamp_idx: The index of the timestamp field in the values read (None: no
+            timestamp field).
+        timestamp_invalid: The invalid value of the timestamp field.
+        fields: The (name, value index, invalid value, converter) tuples of the wanted
+            fields, for the messages read as dictionaries.
+        messages: The list of the messages read as dictionaries (None: the messages
+            are not read as dictionaries).
+        columns: The (column, value index, invalid value, converter) tuples of the
+            wanted fields, for the messages read as columns.
+        missing_columns: The columns of the wanted fields the messages do not have.
+        timestamp_column: The column receiving the timestamp of a compressed timestamp
+            header (None: the messages have a timestamp field or no such column).
+        header_timestamp: Whether the messages read as dictionaries receive the
+            timestamp of a compressed timestamp header (no timestamp field).
+        is_row: Whether the messages are read as columns.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initializes a layout which reads nothing.
+
+        Args:
+            size: The size of a data message in bytes.
+        """
+        self.size = size
+        self.unpack: Optional[Callable[[memoryview, int], tuple[Any, ...]]] = None
+        self.timestamp_idx: Optional[int] = None
+        self.timestamp_invalid = 0xFFFFFFFF
+        self.fields: list[tuple[str, int, int, Callable[[Any], Any]]] = []
+        self.messages: Optional[list[dict[str, Any]]] = None
+        self.columns: list[tuple["array[float]", int, int, Callable[[Any], Any]]] = []
+        self.missing_columns: list["array[float]"] = []
+        self.timestamp_column: Optional["array[float]"] = None
+        self.header_timestamp = False
+        self.is_row = False
+
+
+class FitDecoder:
+    """A decoder of the dive log messages of FIT files.
+
+    Attributes:
+        fields: The fields to read as dictionaries, by messages key (e.g., `lap_mesgs`).
+        columns_key: The messages key of the messages read as columns.
+        columns: The fields of the messages read as columns.
+        check_crc: Whether to check the CRC of the files.
+        allow_truncated: Whether to decode a truncated file up to its last complete
+            record.
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, tuple[str, ...]],
+        columns_key: str = "record_mesgs",
+        columns: tuple[str, ...] = ("timestamp", "depth"),
+        check_crc: bool = True,
+        allow_truncated: bool = True,
+    ) -> None:
+        """Initializes the FitDecoder object.
+
+        Args:
+            fields: The fields to read as dictionaries, by messages key.
+            columns_key: The messages key of the messages read as columns.
+            columns: The fields of the messages read as columns.
+            check_crc: Whether to check the CRC of the files.
+            allow_truncated: Whether to decode a truncated file up to its last
+                complete record.
+        """
+        self.fields = fields
+        self.columns_key = columns_key
+        self.columns = columns
+        self.check_crc = check_crc
+        self.allow_truncated = allow_truncated
+
+    def decode(
+        self, data: Union[bytes, memoryview]
+    ) -> tuple[dict[str, list[dict[str, Any]]], dict[str, "array[float]"]]:
+        """Decodes the wanted messages of FIT data (one or more chained FIT files).
+
+        Args:
+            data: The FIT data (e.g., a memory-mapped file, which is not copied).
+
+        Returns:
+            A (messages, columns) tuple: the messages of each wanted type (an empty list
+            if there are none) as dictionaries of the wanted fields found in the
+            message, and the values of the fields read as columns (NaN where a message
+            has no valid value).
+
+        Raises:
+            FitDecoderTruncatedFileError: If the data is truncated and truncated files
+                are not allowed.
+            FitDecoderError: If the data is not valid FIT data or uses a feature the
+                decoder does not support.
+        """
+        messages: dict[str, list[dict[str, Any]]] = {key: [] for key in self.fields}
+        columns = {name: array("d") for name in self.columns}
+        # The views are released on return, so a memory-mapped file can be closed
+        with memoryview(data) as buffer, buffer.cast("B") as view:
+            if len(view) == 0:
+                raise FitDecoderError("The file is not a FIT file.")
+            position = 0
+            while position < len(view):
+                position = self.__decode_file(view, position, messages, columns)
+        return messages, columns
+
+    def __decode_file(
+        self,
+        view: memoryview,
+        start: int,
+        messages: dict[str, list[dict[str, Any]]],
+        columns: dict[str, "array[float]"],
+    ) -> int:
+        """Decodes a FIT file of the data.
+
+        Args:
+            view: The FIT data.
+            start: The position of the file in the data.
+            messages: The decoded messages, updated in place.
+            columns: The decoded columns, updated in place.
+
+        Returns:
+            The position of the next file (the end of the data if the file is
+            truncated).
+
+        Raises:
+            FitDecoderTruncatedFileError: If the file is truncated and truncated files
+                are not allowed.
+            FitDecoderError: If the file is not a valid FIT file or is not supported.
+        """
+        header_size = view[start]
+        if (
+            header_size not in (12, 14)
+            or len(view) < start + header_size + 2
+            or bytes(view[start + 8 : start + 12]) != b".FIT"
+        ):
+            raise FitDecoderError("The file is not a FIT file.")
+        end = (
+            start + header_size + int.from_bytes(view[start + 4 : start + 8], "little")
+        )
+        is_truncated = len(view) < end + 2
+        if is_truncated and not self.allow_truncated:
+            raise FitDecoderTruncatedFileError("The file is truncated.")
+        if is_truncated:
+            # No CRC to check: decode the records up to the last complete one
+            try:
+                self.__decode_records(
+                    view, start + header_size, min(end, len(view)), messages, columns
+                )
+            except FitDecoderTruncatedFileError:
+                pass
+            return len(view)
+        if self.check_crc and fit_crc(view[start : end + 2]) != 0:
+            raise FitDecoderError("CRC Error")
+        self.__decode_records(view, start + header_size, end, messages, columns)
+        return end + 2
+
+    def __decode_records(
+        self,
+        view: memoryview,
+        position: int,
+        end: int,
+        messages: dict[str, list[dict[str, Any]]],
+        columns: dict[str, "array[float]"],
+    ) -> None:
+        """Decodes the records of a FIT file.
+
+        Args:
+            view: The FIT data.
+            position: The position of the first record.
+            end: The end position of the records.
+            messages: The decoded messages, updated in place.
+            columns: The decoded columns, updated in place.
+
+        Raises:
+            FitDecoderTruncatedFileError: If a record ends after the end position.
+            FitDecoderError: If a record is not valid or is not supported.
+        """
+        layouts: dict[int, _MessageLayout] = {}
+        last_timestamp: Optional[int] = None
+        nan = math.nan
+        while position < end:
+            header = view[position]
+            timestamp: Optional[int] = None
+            if header & _COMPRESSED_HEADER:
+                if last_timestamp is None:
+                    raise FitDecoderError("Compressed timestamp without a reference.")
+                last_timestamp += ((header & 0x1F) - last_timestamp) & 0x1F
+                timestamp = last_timestamp
+                local_mesg_num = (header >> 5) & 0x03
+            elif header & _DEFINITION_HEADER:
+                position = self.__decode_definition(
+                    view, position, end, layouts, messages, columns
+                )
+                continue
+            else:
+                local_mesg_num = header & _LOCAL_MESG_NUM_MASK
+
+            layout = layouts.get(local_mesg_num)
+            if layout is None:
+                raise FitDecoderError("Data message without a definition.")
+            position += 1
+            if position + layout.size > end:
+                raise FitDecoderTruncatedFileError("The file is truncated.")
+            values = () if layout.unpack is None else layout.unpack(view, position)
+            position += layout.size
+            if layout.timestamp_idx is not None:
+                value = values[layout.timestamp_idx]
+                if value != layout.timestamp_invalid:
+                    last_timestamp = value
+            if layout.is_row:
+                for column, idx, invalid, convert in layout.columns:
+                    value = values[idx]
+                    column.append(nan if value == invalid else convert(value))
+                for column in layout.missing_columns:
+                    column.append(nan)
+                if layout.timestamp_column is not None:
+                    layout.timestamp_column.append(
+                        nan if timestamp is None else timestamp
+                    )
+            elif layout.messages is not None:
+                message = {
+                    name: convert(values[idx])
+                    for name, idx, invalid, convert in layout.fields
+                    if values[idx] != invalid
+                }
+                if timestamp is not None and layout.header_timestamp:
+                    message["timestamp"] = timestamp
+                layout.messages.append(message)
+
+    def __decode_definition(
+        self,
+        view: memoryview,
+        position: int,
+        end: int,
+        layouts: dict[int, _MessageLayout],
+        messages: dict[str, list[dict[str, Any]]],
+        columns: dict[str, "array[float]"],
+    ) -> int:
+        """Compiles a definition message into the layout of its data messages.
+
+        Args:
+            view: The FIT data.
+            position: The position of the definition message.
+            end: The end position of the data records of the file.
+            layouts: The layouts by local message number, updated in place.
+            messages: The decoded messages, where the layout appends its messages.
+            columns: The decoded columns, where the layout appends its rows.
+
+        Returns:
+            The position of the next record.
+
+        Raises:
+            FitDecoderTruncatedFileError: If the definition ends after the end position.
+            FitDecoderError: If the definition is not supported.
+        """
+        header = view[position]
+        if position + 6 > end:
+            raise FitDecoderTruncatedFileError("The file is truncated.")
+        big_endian = view[position + 2] != 0
+        global_mesg_num = int.from_bytes(
+            view[position + 3 : position + 5], "big" if big_endian else "little"
+        )
+        num_fields = view[position + 5]
+        position += 6
+        if position + 3 * num_fields > end:
+            raise FitDecoderTruncatedFileError("The file is truncated.")
+
+        mesg_profile = Profile["messages"].get(global_mesg_num)
+        messages_key: str = mesg_profile["messages_key"] if mesg_profile else ""
+        is_row = messages_key == self.columns_key
+        wanted_fields: tuple[str, ...] = ()
+        if is_row:
+            wanted_fields = self.columns
+        elif messages_key in self.fields:
+            wanted_fields = self.fields[messages_key]
+
+        formats = [">" if big_endian else "<"]
+        read_fields: dict[str, tuple[int, int, int, dict[str, Any]]] = {}
+        timestamp_field: Optional[tuple[int, int]] = None
+        num_values = 0
+        size = 0
+        for _ in range(num_fields):
+            field_num = view[position]
+            field_size = view[position + 1]
+            base_type = view[position + 2] & _BASE_TYPE_MASK
+            position += 3
+            if base_type not in _BASE_TYPES:
+                raise FitDecoderError("Invalid field definition base type")
+            if field_size % _BASE_TYPES[base_type][0] != 0:
+                base_type = _UINT8
+            base_size, type_code, invalid = _BASE_TYPES[base_type]
+            size += field_size
+
+            field_profile = (
+                mesg_profile["fields"].get(field_num) if mesg_profile else None
+            )
+            is_wanted = (
+                field_profile is not None and field_profile["name"] in wanted_fields
+            )
+            is_scalar = field_size == base_size and base_type != _STRING
+            if is_wanted and not is_scalar:
+                raise FitDecoderError("Array and string fields are not supported.")
+            if is_scalar and (is_wanted or field_num == _TIMESTAMP_FIELD_NUM):
+                formats.append(type_code)
+                if field_num == _TIMESTAMP_FIELD_NUM:
+                    timestamp_field = (num_values, invalid)
+                if is_wanted and field_profile is not None:
+                    read_fields[field_profile["name"]] = (
+                        num_values,
+                        invalid,
+                        base_type,
+                        field_profile,
+                    )
+                num_values += 1
+            else:
+                formats.append(f"{field_size}x")
+
+        if header & _DEVELOPER_DATA_FLAG:
+            if position >= end:
+                raise FitDecoderTruncatedFileError("The file is truncated.")
+            num_dev_fields = view[position]
+            position += 1
+            if position + 3 * num_dev_fields > end:
+                raise FitDecoderTruncatedFileError("The file is truncated.")
+            for _ in range(num_dev_fields):
+                size += view[position + 1]
+                position += 3
+
+        layout = _MessageLayout(size)
+        if num_values:
+            layout.unpack = struct.Struct("".join(formats)).unpack_from
+        if timestamp_field is not None:
+            layout.timestamp_idx, layout.timestamp_invalid = timestamp_field
+        if is_row:
+            layout.is_row = True
+            for name in self.columns:
+                if name in read_fields:
+                    idx, invalid, base_type, field_profile = read_fields[name]
+                    convert = _column_converter(field_profile)
+                    if base_type in _FLOAT_FORMATS:
+                        convert = _float_converter(base_type, convert)
+                    layout.columns.append((columns[name], idx, invalid, convert))
+                elif name == "timestamp":
+                    layout.timestamp_column = columns[name]
+                else:
+                    layout.missing_columns.append(columns[name])
+        elif messages_key in self.fields:
+            layout.messages = messages[messages_key]
+            for name, (idx, invalid, base_type, field_profile) in read_fields.items():
+                convert = _field_converter(field_profile)
+                if base_type in _FLOAT_FORMATS:
+                    convert = _float_converter(base_type, convert)
+                layout.fields.append((name, idx, invalid, convert))
+            layout.header_timestamp = (
+                "timestamp" in wanted_fields and "timestamp" not in read_fields
+            )
+        layouts[header & _LOCAL_MESG_NUM_MASK] = layout
+        return position
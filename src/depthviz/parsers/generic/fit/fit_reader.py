@@ -0,0 +1,192 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""A module to read only the messages and fields of a FIT file needed for a dive log.
+
+A watch activity stores many message types (heart rate, GPS, device info, developer
+fields...) next to the records of the dive. By default, the decoder of the FIT SDK
+keeps every message of every type as a dictionary of all its fields, and expands the
+components and subfields of every field. This module decodes the file with these
+expansions turned off and a message listener which trims every message as soon as it
+is decoded: the messages of the wanted types keep the wanted fields only, and the other
+messages are emptied, so only a small dictionary per record stays in memory.
+
+A dive log is read with the built-in decoder of the `fit_decoder` module first, which
+reads the records into columns instead of dictionaries, and falls back to the SDK for
+the files the built-in decoder does not support. The built-in decoder reads the file
+memory-mapped instead of reading it into memory, so a large activity export is decoded
+without a copy of its bytes, and the pages of the file can be reclaimed by the system.
+
+Constants:
+    DIVE_LOG_FIELDS: The fields of each message type read for a dive log.
+    RECORD_COLUMNS: The fields of the record messages read as columns for a dive log.
+"""
+
+import contextlib
+import math
+import mmap
+from array import array
+from typing import Any, Iterator, Mapping, cast
+from garmin_fit_sdk import Decoder, Profile, Stream
+
+from depthviz.parsers.generic.generic_divelog_parser import DiveLogFileNotFoundError
+from depthviz.parsers.generic.fit.fit_parser import DiveLogFitInvalidFitFileError
+from depthviz.parsers.generic.fit.fit_decoder import FitDecoder, FitDecoderError
+
+DIVE_LOG_FIELDS: dict[str, tuple[str, ...]] = {
+    "file_id_mesgs": ("type", "manufacturer"),
+    "record_mesgs": ("timestamp", "depth"),
+    "lap_mesgs": ("start_time",),
+    "dive_summary_mesgs": (
+        "reference_mesg",
+        "reference_index",
+        "max_depth",
+        "avg_depth",
+        "bottom_time",
+    ),
+}
+RECORD_COLUMNS = DIVE_LOG_FIELDS["record_mesgs"]
+
+# The messages the decoder looks up after decoding them (developer fields)
+_DECODER_MESG_NUMS = frozenset(
+    (
+        Profile["mesg_num"]["DEVELOPER_DATA_ID"],
+        Profile["mesg_num"]["FIELD_DESCRIPTION"],
+    )
+)
+
+
+@contextlib.contextmanager
+def map_fit_file(file_path: str) -> Iterator[memoryview]:
+    """Memory-maps a FIT file, read-only.
+
+    Args:
+        file_path: The path to the FIT file.
+
+    Yields:
+        A read-only view of the bytes of the file (empty for an empty file). The view
+        must not be used, and its slices must be released, after the context exits.
+
+    Raises:
+        OSError: If the file cannot be opened or memory-mapped.
+    """
+    with open(file_path, "rb") as file:
+        try:
+            file_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be memory-mapped
+            with memoryview(b"") as view:
+                yield view
+            return
+        with file_map, memoryview(file_map) as view:
+            yield view
+
+
+def read_fit_messages(
+    file_path: str,
+    fields: Mapping[str, tuple[str, ...]] = DIVE_LOG_FIELDS,
+    check_crc: bool = True,
+) -> dict[str, list[dict[str, Any]]]:
+    """Reads the given fields of the given message types from a FIT file.
+
+    Args:
+        file_path: The path to the FIT file.
+        fields: The fields to read, by messages key (e.g., `record_mesgs`).
+        check_crc: Whether to check the CRC of the file.
+
+    Returns:
+        The messages of each wanted type (an empty list if the file has none), as
+        dictionaries of the wanted fields found in the message.
+
+    Raises:
+        DiveLogFitInvalidFitFileError: If the FIT file cannot be decoded.
+        DiveLogFileNotFoundError: If the FIT file is not found.
+    """
+    mesg_fields = {
+        mesg_num: frozenset(fields[mesg_profile["messages_key"]])
+        for mesg_num, mesg_profile in Profile["messages"].items()
+        if mesg_profile["messages_key"] in fields
+    }
+
+    def trim_message(mesg_num: int, message: dict[str, Any]) -> None:
+        """Keeps the wanted fields of a decoded message, in place."""
+        if mesg_num in _DECODER_MESG_NUMS:
+            return
+        wanted_fields = mesg_fields.get(mesg_num, frozenset())
+        for name in [name for name in message if name not in wanted_fields]:
+            del message[name]
+
+    try:
+        stream = Stream.from_file(file_path)
+        decoder = Decoder(stream)
+        messages, errors = decoder.read(
+            convert_datetimes_to_dates=False,
+            enable_crc_check=check_crc,
+            expand_sub_fields=False,
+            expand_components=False,
+            merge_heart_rates=False,
+            mesg_listener=trim_message,
+        )
+        if errors:
+            raise errors[0]
+    except (RuntimeError, IndexError) as e:
+        # The SDK raises an IndexError when the file is truncated
+        raise DiveLogFitInvalidFitFileError(f"Invalid FIT file: {file_path}") from e
+    except FileNotFoundError as e:
+        raise DiveLogFileNotFoundError(f"File not found: {file_path}") from e
+    return {key: cast(list[dict[str, Any]], messages.get(key, [])) for key in fields}
+
+
+def read_fit_dive_log(
+    file_path: str,
+    native: bool = True,
+    check_crc: bool = True,
+    allow_truncated: bool = True,
+) -> tuple[dict[str, list[dict[str, Any]]], dict[str, "array[float]"]]:
+    """Reads the dive log messages of a FIT file, with the records as columns.
+
+    Args:
+        file_path: The path to the FIT file.
+        native: Whether to decode the file with the built-in decoder first (False: with
+            the SDK only).
+        check_crc: Whether to check the CRC of the file. The built-in decoder checks
+            the mapped file block by block, which costs a few milliseconds.
+        allow_truncated: Whether to read a truncated file (e.g., from a watch which
+            died mid-session) up to its last complete record, with the built-in
+            decoder.
+
+    Returns:
+        A (messages, records) tuple: the file ID, lap and dive summary messages as
+        returned by `read_fit_messages`, and the timestamp and depth values of the
+        records (NaN where a record has no valid value).
+
+    Raises:
+        DiveLogFitInvalidFitFileError: If the FIT file cannot be decoded.
+        DiveLogFileNotFoundError: If the FIT file is not found.
+    """
+    fields = {
+        key: names for key, names in DIVE_LOG_FIELDS.items() if key != "record_mesgs"
+    }
+    if native:
+        decoder = FitDecoder(
+            fields,
+            columns=RECORD_COLUMNS,
+            check_crc=check_crc,
+            allow_truncated=allow_truncated,
+        )
+        try:
+            with map_fit_file(file_path) as data:
+                return decoder.decode(data)
+        except (OSError, FitDecoderError):
+            # The SDK decodes the files the built-in decoder does not support, and
+            # reports the errors of the files it cannot decode either
+            pass
+
+    messages = read_fit_messages(file_path, check_crc=check_crc)
+    record_mesgs = messages.pop("record_mesgs")
+    records = {
+        name: array("d", (record.get(name, math.nan) for record in record_mesgs))
+        for name in RECORD_COLUMNS
+    }
+    return messages, records
@@ -18,6 +18,10 @@ Constants:
 """
 
 from abc import ABC, abstractmethod
+from typing import Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from depthviz.parsers.generic.parse_cache import ParseCache
 
 ASSUMED_DESCENT_RATE = 1  # meters per second
 ASSUMED_ASCENT_RATE = 1  # meters per second
@@ -47,11 +51,85 @@ class EmptyFileError(DiveLogParserError):
 class DiveLogParser(ABC):
     """A class to parse a dive log file containing depth data."""
 
-    def __init__(self, depth_mode: str) -> None:
-        """Initializes the DiveLogParser object."""
+    def __init__(
+        self, depth_mode: str, parse_cache: Optional["ParseCache"] = None
+    ) -> None:
+        """Initializes the DiveLogParser object.
+
+        Args:
+            depth_mode: The depth mode to use for parsing the dive log file.
+            parse_cache: The cache of the parsed dive logs (None: no cache).
+        """
         self.time_data: list[float] = []
         self.depth_data: list[float] = []
         self.depth_mode = depth_mode
+        self.parse_cache = parse_cache
+
+    def __parser_name(self) -> str:
+        """Returns the qualified name of the parser class (part of the cache keys)."""
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+
+    def get_cached_dive_summary(self, file_path: str) -> Optional[list[dict[str, Any]]]:
+        """Returns the cached dive summary list of a dive log file.
+
+        Args:
+            file_path: The path to the dive log file.
+
+        Returns:
+            The dive summary list, or None if there is no cache or it is not cached.
+        """
+        if self.parse_cache is None:
+            return None
+        return self.parse_cache.get_summary(file_path, self.__parser_name())
+
+    def cache_dive_summary(
+        self, file_path: str, dive_summary: list[dict[str, Any]]
+    ) -> None:
+        """Stores the dive summary list of a dive log file in the cache (if any).
+
+        Args:
+            file_path: The path to the dive log file.
+            dive_summary: The dive summary list.
+        """
+        if self.parse_cache is not None:
+            self.parse_cache.put_summary(file_path, self.__parser_name(), dive_summary)
+
+    def load_cached_dive(self, file_path: str, dive_idx: int) -> bool:
+        """Loads the cached time and depth data of a dive (after the depth mode).
+
+        Args:
+            file_path: The path to the dive log file.
+            dive_idx: The index of the dive in the dive log file.
+
+        Returns:
+            True if the data was loaded from the cache, False otherwise.
+        """
+        if self.parse_cache is None:
+            return False
+        dive = self.parse_cache.get_dive(
+            file_path, self.__parser_name(), self.depth_mode, dive_idx
+        )
+        if dive is None:
+            return False
+        self.time_data, self.depth_data = dive
+        return True
+
+    def cache_dive(self, file_path: str, dive_idx: int) -> None:
+        """Stores the parsed time and depth data of a dive in the cache (if any).
+
+        Args:
+            file_path: The path to the dive log file.
+            dive_idx: The index of the dive in the dive log file.
+        """
+        if self.parse_cache is not None:
+            self.parse_cache.put_dive(
+                file_path,
+                self.__parser_name(),
+                self.depth_mode,
+                dive_idx,
+                self.time_data,
+                self.depth_data,
+            )
 
     @abstractmethod
     def parse(self, file_path: str) -> None:
@@ -0,0 +1,278 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to cache the parsed dive logs across runs.
+
+Decoding a dive log (e.g., a multi-hour FIT activity) is much slower than reading back
+its result. The cache stores the dive summary list and the time and depth data of each
+parsed dive as `.npz` files, keyed by a hash of the dive log file bytes, the parser
+class, the depth mode and the selected dive, so parsing the same file again only reads
+the arrays back.
+
+Constants:
+    DEFAULT_PARSE_CACHE_SIZE: The default size limit of the parse cache in bytes.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+import numpy as np
+from depthviz.__version__ import __version__
+from depthviz.cache_dir import default_cache_dir
+
+DEFAULT_PARSE_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class ParseCacheError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class ParseCache:
+    """A persistent cache of parsed dive logs, shared across runs.
+
+    The cache is best effort: a file that cannot be read or written is treated as a
+    miss. The files are written atomically (renamed into place), so several processes
+    can share the same directory.
+
+    Attributes:
+        cache_dir: The directory of the parsed dive logs.
+        max_bytes: The size limit of the cache directory in bytes.
+        hits: The number of lookups that found a cached entry.
+        misses: The number of lookups that did not find a cached entry.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = DEFAULT_PARSE_CACHE_SIZE,
+    ) -> None:
+        """Initializes the ParseCache object and creates its directory.
+
+        Args:
+            cache_dir: The cache directory (None: `default_cache_dir()`). The dive logs
+                are stored in its `divelogs` subdirectory.
+            max_bytes: The size limit of the cache directory in bytes.
+
+        Raises:
+            ParseCacheError: If the size limit is negative.
+            ParseCacheError: If the cache directory cannot be created.
+        """
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ParseCacheError(
+                "Invalid parse cache size; must be a positive number."
+            )
+        base_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.cache_dir = os.path.join(base_dir, "divelogs")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            raise ParseCacheError(
+                f"Cannot create the parse cache directory: {self.cache_dir}"
+            ) from e
+        self.__file_digests: dict[tuple[str, int, int], str] = {}
+
+    def __file_digest(self, file_path: str) -> Optional[str]:
+        """Hashes a dive log file by content (memoized by path, size and mtime).
+
+        Args:
+            file_path: The dive log file path.
+
+        Returns:
+            The hexadecimal digest, or None if the file cannot be read.
+        """
+        try:
+            stat = os.stat(file_path)
+            file_id = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+            if file_id not in self.__file_digests:
+                digest = hashlib.sha256()
+                with open(file_path, "rb") as file:
+                    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                self.__file_digests[file_id] = digest.hexdigest()
+        except OSError:
+            return None
+        return self.__file_digests[file_id]
+
+    def __path(self, file_path: str, *key: object) -> Optional[str]:
+        """Returns the path of a cache entry of a dive log file.
+
+        Args:
+            file_path: The dive log file path.
+            key: The other parameters the entry depends on (their `repr` is hashed).
+
+        Returns:
+            The entry path, or None if the dive log file cannot be read.
+        """
+        file_digest = self.__file_digest(file_path)
+        if file_digest is None:
+            return None
+        entry_key = hashlib.sha256(
+            f"{__version__}:{file_digest}:{key!r}".encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{entry_key}.npz")
+
+    def __load(self, path: Optional[str]) -> Optional[dict[str, Any]]:
+        """Reads the arrays of a cache entry and marks it as the most recently used.
+
+        Args:
+            path: The entry path (None: a miss).
+
+        Returns:
+            A dictionary of the arrays, or None if the entry is not cached.
+        """
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as npz_file:
+                arrays = {name: npz_file[name] for name in npz_file.files}
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def __save(self, path: Optional[str], **arrays: Any) -> None:
+        """Writes the arrays of a cache entry, evicting the least recently used entries.
+
+        Args:
+            path: The entry path (None: not cached).
+            arrays: The arrays of the entry.
+        """
+        if path is None:
+            return
+        try:
+            file_descriptor, temp_path = tempfile.mkstemp(
+                suffix=".tmp", dir=self.cache_dir
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(temp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            return
+        self.prune()
+
+    def get_summary(
+        self, file_path: str, parser_name: str
+    ) -> Optional[list[dict[str, Any]]]:
+        """Reads the cached dive summary list of a dive log file.
+
+        Args:
+            file_path: The dive log file path.
+            parser_name: The name of the parser class.
+
+        Returns:
+            The dive summary list, or None if it is not cached.
+        """
+        arrays = self.__load(self.__path(file_path, parser_name, "summary"))
+        if arrays is None or "summary" not in arrays:
+            return None
+        try:
+            summary = json.loads(str(arrays["summary"]))
+        except ValueError:
+            return None
+        return summary if isinstance(summary, list) else None
+
+    def put_summary(
+        self, file_path: str, parser_name: str, dive_summary: list[dict[str, Any]]
+    ) -> None:
+        """Writes the dive summary list of a dive log file to the cache.
+
+        Only the scalar fields of the dives (start time, max depth...) are cached.
+
+        Args:
+            file_path: The dive log file path.
+            parser_name: The name of the parser class.
+            dive_summary: The dive summary list.
+        """
+        scalar_types = (str, int, float, bool, type(None))
+        summary = [
+            {
+                name: value
+                for name, value in dive.items()
+                if isinstance(value, scalar_types)
+            }
+            for dive in dive_summary
+        ]
+        self.__save(
+            self.__path(file_path, parser_name, "summary"),
+            summary=np.array(json.dumps(summary)),
+        )
+
+    def get_dive(
+        self, file_path: str, parser_name: str, depth_mode: str, dive_idx: int
+    ) -> Optional[tuple[list[float], list[float]]]:
+        """Reads the cached time and depth data of a dive.
+
+        Args:
+            file_path: The dive log file path.
+            parser_name: The name of the parser class.
+            depth_mode: The depth mode of the data.
+            dive_idx: The index of the dive in the dive log.
+
+        Returns:
+            A (time data, depth data) tuple, or None if the dive is not cached.
+        """
+        arrays = self.__load(
+            self.__path(file_path, parser_name, "dive", depth_mode, dive_idx)
+        )
+        if arrays is None or "time" not in arrays or "depth" not in arrays:
+            return None
+        return arrays["time"].tolist(), arrays["depth"].tolist()
+
+    def put_dive(
+        self,
+        file_path: str,
+        parser_name: str,
+        depth_mode: str,
+        dive_idx: int,
+        time_data: list[float],
+        depth_data: list[float],
+    ) -> None:
+        """Writes the time and depth data of a dive to the cache.
+
+        Args:
+            file_path: The dive log file path.
+            parser_name: The name of the parser class.
+            depth_mode: The depth mode of the data.
+            dive_idx: The index of the dive in the dive log.
+            time_data: The time data of the dive.
+            depth_data: The depth data of the dive.
+        """
+        self.__save(
+            self.__path(file_path, parser_name, "dive", depth_mode, dive_idx),
+            time=np.asarray(time_data, dtype=np.float64),
+            depth=np.asarray(depth_data, dtype=np.float64),
+        )
+
+    def prune(self) -> None:
+        """Deletes the least recently used entries until the cache fits its size limit."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as files:
+                for file in files:
+                    if file.name.endswith(".npz"):
+                        stat = file.stat()
+                        entries.append((stat.st_mtime, stat.st_size, file.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                total -= size
@@ -11,11 +11,14 @@ Constants:
         (used to filter out dives that are too shallow).
 """
 
-from typing import cast, Union, Any
+from array import array
+from typing import cast, Optional, Union, Any
 from datetime import datetime, timezone
-from garmin_fit_sdk import Decoder, Stream
+import numpy as np
+import numpy.typing as npt
 
-from depthviz.parsers.generic.generic_divelog_parser import DiveLogFileNotFoundError
+from depthviz.parsers.generic.parse_cache import ParseCache
+from depthviz.parsers.generic.fit.fit_reader import read_fit_dive_log
 from depthviz.parsers.generic.fit.fit_parser import (
     DiveLogFitParser,
     DiveLogFitInvalidFitFileError,
@@ -28,6 +31,23 @@ CUT_OFF_DEPTH = 1.5  # meters
 LOWEST_MAX_DEPTH = 3  # meters
 
 
+def _next_index(indices: npt.NDArray[np.intp], low: int, high: int) -> int:
+    """Returns the first of the sorted indices in a range (binary search).
+
+    Args:
+        indices: The sorted indices.
+        low: The start of the range.
+        high: The end of the range (excluded).
+
+    Returns:
+        The first index in [low, high), or high if there is none.
+    """
+    position = int(np.searchsorted(indices, low))
+    if position < len(indices) and indices[position] < high:
+        return int(indices[position])
+    return high
+
+
 class SuuntoFitParser(DiveLogFitParser):
     """A class to parse a FIT file containing depth data.
 
@@ -37,42 +57,30 @@ class SuuntoFitParser(DiveLogFitParser):
         time_data (list[float]): The time data parsed from the FIT file.
         depth_data (list[float]): The depth data parsed from the FIT file.
         __selected_dive_idx (int): The index of the dive to be parsed from the FIT file.
-        __current_dive (dict[str, Any]): The current dive being extracted from the FIT file.
-        __descended (bool): A flag to indicate if the diver has descended.
-        __ascended (bool): A flag to indicate if the diver has ascended.
     """
 
-    def __init__(self, selected_dive_idx: int = -1, depth_mode: str = "raw") -> None:
+    def __init__(
+        self,
+        selected_dive_idx: int = -1,
+        depth_mode: str = "raw",
+        parse_cache: Optional[ParseCache] = None,
+    ) -> None:
         """Initializes the SuuntoFitParser object.
 
         Args:
             selected_dive_idx: The index of the dive to be parsed.
             depth_mode: The depth mode to use for parsing the FIT file.
+            parse_cache: The cache of the parsed FIT files (None: no cache).
 
         Note:
             If there are multiple dives in the FIT file, the user will be prompted to select a dive
             to import. The selected dive will be stored in the `__selected_dive_idx` attribute.
         """
-        super().__init__(depth_mode=depth_mode)
+        super().__init__(depth_mode=depth_mode, parse_cache=parse_cache)
 
         # Select the dive to be parsed (in case of multiple dives in FIT file)
         self.__selected_dive_idx = selected_dive_idx
 
-        # Internal variables for extracting dive logs
-        self.__current_dive: dict[str, Any] = {}
-        self.__descended: bool = False
-        self.__ascended: bool = False
-
-    def __reset_dive_state(self) -> None:
-        """A helper method to reset the internal state of the dive extraction process.
-
-        Note:
-            This is used to reset the state when a new dive is detected.
-        """
-        self.__current_dive = {}
-        self.__descended = False
-        self.__ascended = False
-
     def convert_fit_epoch_to_datetime(self, fit_epoch: int) -> str:
         """Convert the epoch time in the FIT file to a human-readable datetime string.
 
@@ -150,28 +158,53 @@ class SuuntoFitParser(DiveLogFitParser):
             DiveLogFitInvalidFitFileTypeError: If the FIT file type is invalid.
                 (e.g., not 'activity')
             DiveLogFitDiveNotFoundError: If the dive data is not found in the FIT file.
+
+        Note:
+            If a parse cache is set, a FIT file parsed before is read from the cache.
         """
-        messages = self.__read_fit_file(file_path)
+        if self.__parse_cached(file_path):
+            return
+
+        messages, records = self.__read_fit_file(file_path)
         self.__validate_fit_file(messages, file_path)
-        dive_summary = self.__extract_dive_logs(messages)
+        dive_summary = self.__extract_dive_logs(records)
+        self.cache_dive_summary(file_path, dive_summary)
         self.__parse_selected_dive(dive_summary)
 
         # Convert depth data according to the depth mode
         self.depth_mode_execute()
+        self.cache_dive(file_path, self.__selected_dive_idx)
 
-    def __read_fit_file(self, file_path: str) -> dict[str, Any]:
-        """A method to read the FIT file and extract the messages from it."""
-        try:
-            stream = Stream.from_file(file_path)
-            decoder = Decoder(stream)
-            messages, errors = decoder.read(convert_datetimes_to_dates=False)
-            if errors:
-                raise errors[0]
-            return cast(dict[str, Any], messages)
-        except RuntimeError as e:
-            raise DiveLogFitInvalidFitFileError(f"Invalid FIT file: {file_path}") from e
-        except FileNotFoundError as e:
-            raise DiveLogFileNotFoundError(f"File not found: {file_path}") from e
+    def __parse_cached(self, file_path: str) -> bool:
+        """Reads the selected dive from the parse cache.
+
+        The dive is selected from the cached dive summary (prompting the user if
+        needed), so a dive which is not cached yet is not prompted for again.
+
+        Args:
+            file_path: The path to the FIT file to be parsed.
+
+        Returns:
+            True if the dive was read from the cache, False otherwise.
+        """
+        dive_summary = self.get_cached_dive_summary(file_path)
+        if not dive_summary:
+            return False
+        if self.__selected_dive_idx == -1:
+            self.__selected_dive_idx = self.select_dive(dive_summary)
+        return self.load_cached_dive(file_path, self.__selected_dive_idx)
+
+    def __read_fit_file(
+        self, file_path: str
+    ) -> tuple[dict[str, Any], dict[str, "array[float]"]]:
+        """A method to read the FIT file and extract the messages from it.
+
+        Note:
+            Only the file ID, lap and dive summary fields are kept, and the timestamp
+            and depth of the records are read as columns.
+        """
+        messages, records = read_fit_dive_log(file_path)
+        return cast(dict[str, Any], messages), records
 
     def __validate_fit_file(self, messages: dict[str, Any], file_path: str) -> None:
         """A method to validate the FIT file by checking the FIT type and manufacturer.
@@ -206,12 +239,12 @@ class SuuntoFitParser(DiveLogFitParser):
             )
 
     def __extract_dive_logs(
-        self, messages: dict[str, Any]
+        self, records: dict[str, "array[float]"]
     ) -> list[dict[str, Union[int, float, object]]]:
         """A method to extract the dive logs from the records in the FIT file.
 
         Args:
-            messages: The messages extracted from the FIT file.
+            records: The timestamp and depth columns of the records in the FIT file.
 
         Returns:
             A list of dictionaries containing the dive logs.
@@ -222,84 +255,83 @@ class SuuntoFitParser(DiveLogFitParser):
         Note:
             The dive logs are filtered based on the CUT_OFF_DEPTH and LOWEST_MAX_DEPTH.
         """
-        dive_summary = []
-        raw_extracted_dive_logs: list[dict[str, Any]] = []
-        records = messages.get("record_mesgs", [])
-
+        timestamps = np.frombuffer(records["timestamp"], dtype=np.float64)
+        depths = np.frombuffer(records["depth"], dtype=np.float64)
+
+        # The surface crossings: the runs of records deeper than 0
+        # A dive cannot go on across a record at the surface (a depth of 0)
+        crossings = np.diff((depths > 0).astype(np.int8), prepend=0, append=0)
+        run_starts = np.flatnonzero(crossings == 1)
+        run_ends = np.flatnonzero(crossings == -1)
+
+        # The CUT_OFF_DEPTH crossings and the changes of direction
+        # Detect the start and end of a dive
+        # It will not intervene with the data if the depth is more than the CUT_OFF_DEPTH
+        deeper_idx = np.flatnonzero(depths > CUT_OFF_DEPTH)
+        shallower_idx = np.flatnonzero(depths < CUT_OFF_DEPTH)
+        depth_changes = np.diff(depths)
+        ascending_idx = np.flatnonzero(depth_changes < 0) + 1
+        descending_idx = np.flatnonzero(depth_changes > 0) + 1
+
+        # The (first index, end index) of each dive log, which also starts with the
+        # record before its first record (the record that has been cut off)
+        dive_logs = []
         # Used for comparing the depth values to detect the start and end of a dive
-        previous_depth = 0
-        previous_record = None
-
-        for record in records:
-            timestamp = record.get("timestamp")
-            depth = record.get("depth")
-
-            if depth > 0:
-                # Create a new dive log if the depth is greater than 0 and the current dive is None
-                if not self.__current_dive:
-                    self.__current_dive = {
-                        "data": [],
-                        "max_depth": 0,
-                    }
-                    # Add the previous record that has been cut off to the current dive
-                    if previous_record is not None:
-                        self.__current_dive["data"].append(
-                            {
-                                "timestamp": previous_record.get("timestamp"),
-                                "depth": previous_record.get("depth"),
-                            }
-                        )
-                    raw_extracted_dive_logs.append(self.__current_dive)
-
-                # Detect the start and end of a dive
-                # It will not intervene with the data if the depth is more than the CUT_OFF_DEPTH
-                if depth > CUT_OFF_DEPTH:
-                    self.__descended = True
-                if self.__descended and depth < CUT_OFF_DEPTH:
-                    self.__ascended = True
-
+        previous_depth = 0.0
+        for run_start, run_end in zip(run_starts.tolist(), run_ends.tolist()):
+            first_idx = run_start
+            while first_idx < run_end:
+                # A dive log starts after a record at the surface or a reset, and
+                # goes on until the next reset or the end of the run
+                descended_idx = _next_index(deeper_idx, first_idx, run_end)
                 # Reset the dive state if:
                 # 1. Diver descends and ascends without reaching the CUT_OFF_DEPTH
                 # 2. After ascending past the CUT_OFF_DEPTH, the diver descends again
                 # This is to filter out surface intervals and multiple dives in the same file
-                if not self.__descended and depth < previous_depth:
-                    self.__reset_dive_state()
-                if self.__descended and self.__ascended and depth > previous_depth:
-                    self.__reset_dive_state()
-
-                # Add the depth data to the current dive if it passes the checks (not getting reset)
-                if self.__current_dive:
-                    self.__current_dive["data"].append(
-                        {"timestamp": timestamp, "depth": depth}
-                    )
-                    self.__current_dive["max_depth"] = max(
-                        self.__current_dive["max_depth"], depth
-                    )
+                if descended_idx > first_idx and depths[first_idx] < previous_depth:
+                    reset_idx = first_idx
+                else:
+                    reset_idx = _next_index(ascending_idx, first_idx + 1, descended_idx)
+                    if reset_idx == descended_idx and descended_idx < run_end:
+                        ascended_idx = _next_index(
+                            shallower_idx, descended_idx + 1, run_end
+                        )
+                        reset_idx = _next_index(descending_idx, ascended_idx, run_end)
+                dive_logs.append((first_idx, reset_idx))
 
-                # Save the previous depth for comparison
-                previous_depth = depth
-            else:
-                # Reset the dive state if the depth is 0
-                self.__reset_dive_state()
-            # Save the previous record for adding to the next dive if it is cut off but valid
-            previous_record = record
+                # The record resetting the dive state is not part of any dive log
+                previous_depth = float(
+                    depths[reset_idx - 1 if reset_idx == run_end else reset_idx]
+                )
+                first_idx = reset_idx + 1
 
         # Dive summary contains the dive logs that are deeper than LOWEST_MAX_DEPTH
-        for log in raw_extracted_dive_logs:
-            if log["max_depth"] > LOWEST_MAX_DEPTH:
-                start_time = log["data"][0]["timestamp"]
-                end_time = log["data"][-1]["timestamp"]
-                max_depth = log["max_depth"]
-                bottom_time = end_time - start_time
-                dive_summary.append(
-                    {
-                        "raw_data": log["data"],
-                        "start_time": start_time,
-                        "end_time": end_time,
-                        "max_depth": max_depth,
-                        "bottom_time": bottom_time,
-                    }
+        dive_summary = []
+        for first_idx, end_idx in dive_logs:
+            if end_idx == first_idx:
+                continue
+            max_depth = float(depths[first_idx:end_idx].max())
+            if max_depth <= LOWEST_MAX_DEPTH:
+                continue
+            start_idx = max(first_idx - 1, 0)
+            raw_data = [
+                {"timestamp": timestamp, "depth": depth}
+                for timestamp, depth in zip(
+                    timestamps[start_idx:end_idx].tolist(),
+                    depths[start_idx:end_idx].tolist(),
                 )
+            ]
+            start_time = raw_data[0]["timestamp"]
+            end_time = raw_data[-1]["timestamp"]
+            dive_summary.append(
+                {
+                    "raw_data": raw_data,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "max_depth": max_depth,
+                    "bottom_time": end_time - start_time,
+                }
+            )
         if not dive_summary:
             raise DiveLogFitDiveNotFoundError(
                 "Invalid FIT file: does not contain any dive data "
@@ -0,0 +1,35 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module with the default values of the overlay videos.
+
+This module has no dependencies, so the command line interface can use the default
+values to build its arguments without importing the video modules (moviepy, numpy...).
+
+Constants:
+    DEFAULT_FONT: The path of the default font file.
+    DEFAULT_VIDEO_SIZE: The default video size (width, height).
+    DEFAULT_VIDEO_SIZE_FOR_TESTING: A smaller video size for faster tests.
+    DEFAULT_BG_COLOR: The default background color.
+    DEFAULT_STROKE_WIDTH: The default stroke width in pixels.
+    SUBTITLE_FORMATS: The supported subtitle file extensions.
+    DEFAULT_RENDER_THREADS: The default number of threads rasterizing the frames while
+        ffmpeg encodes them (half of the CPU cores, at most 4: none on a single core CPU,
+        where the frames are rasterized in series).
+    DEFAULT_QUEUE_DEPTH: The default number of rasterized frames waiting to be encoded.
+"""
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FONT = os.path.abspath(
+    os.path.join(BASE_DIR, "../assets/fonts/Open_Sans/static/OpenSans-Bold.ttf")
+)
+DEFAULT_VIDEO_SIZE = (960, 540)
+DEFAULT_VIDEO_SIZE_FOR_TESTING = (640, 360)
+DEFAULT_BG_COLOR = "black"
+DEFAULT_STROKE_WIDTH = 5
+SUBTITLE_FORMATS = (".srt", ".ass", ".vtt")
+DEFAULT_RENDER_THREADS = min((os.cpu_count() or 1) // 2, 4)
+DEFAULT_QUEUE_DEPTH = 16
@@ -11,6 +11,7 @@ from depthviz.optimizer.linear_interpolation import (
     LinearInterpolationDepth,
     LinearInterpolationDepthError,
 )
+from depthviz.optimizer.change_point import ChangePointDepth
 
 
 class DepthReportVideoCreatorError(OverlayVideoCreatorError):
@@ -38,26 +39,140 @@ class DepthReportVideoCreator(OverlayVideoCreator):
         # Otherwise, return the difference between the current and next element
         return abs(time_data[current_pos + 1] - time_data[current_pos])
 
-    def render_depth_report_video(
+    def __depth_to_text(
+        self, depth: Union[int, float], decimal_places: int, minus_sign: bool
+    ) -> str:
+        """Converts a rounded depth value to the text shown in the video.
+
+        Args:
+            depth: The depth value rounded to the number of decimal places.
+            decimal_places: The number of decimal places of the depth value.
+            minus_sign: A boolean value to determine if the minus sign should be displayed.
+
+        Returns:
+            The depth text (e.g., -12m, -12.3m).
+        """
+        if decimal_places == 0:
+            if depth == 0:
+                return "0m"
+            return f"{'-' if minus_sign else ''}{depth}m"
+        if depth == 0:
+            return f"{0:.{decimal_places}f}m"
+        return f"{'-' if minus_sign else ''}{depth:.{decimal_places}f}m"
+
+    def __round_depth(self, depth: float, decimal_places: int) -> Union[int, float]:
+        """Rounds a depth value to the number of decimal places."""
+        if decimal_places == 0:
+            return round(depth)
+        return round(depth, decimal_places)
+
+    def __interpolated_depth_text_list(
+        self,
+        time_data: list[float],
+        depth_data: list[float],
+        decimal_places: int,
+        minus_sign: bool,
+    ) -> list[dict[str, Union[str, float]]]:
+        """Creates the depth text list by interpolating and rounding every frame.
+
+        Args:
+            time_data: An array of time values in seconds.
+            depth_data: An array of depth values in meters.
+            decimal_places: The number of decimal places to round the depth values to.
+            minus_sign: A boolean value to determine if the minus sign should be displayed.
+
+        Returns:
+            A list of dictionaries containing the text and duration of each clip.
+        """
+        interpolated_depth = LinearInterpolationDepth(
+            times=time_data, depths=depth_data, fps=self.fps
+        )
+        interpolated_depths = interpolated_depth.get_interpolated_depths().tolist()
+        interpolated_times = interpolated_depth.get_interpolated_times().tolist()
+
+        depth_frame_list: list[dict[str, Union[str, float]]] = []
+        previous_text = "NA"
+        clip_count = len(interpolated_times)
+        for i in range(clip_count):
+            duration = self.__clip_duration_in_seconds(i, interpolated_times)
+            text = self.__depth_to_text(
+                self.__round_depth(interpolated_depths[i], decimal_places),
+                decimal_places,
+                minus_sign,
+            )
+            # Check if the text is the same as the previous text to reduce the number of clips
+            # with the same text for better performance when rendering
+            if text != previous_text:
+                # Append the text and duration to the list
+                depth_frame_list.append({"text": text, "duration": duration})
+                previous_text = text
+            else:
+                # If the text is the same, just add the duration to the last clip
+                previous_duration = float(depth_frame_list[-1]["duration"])
+                depth_frame_list[-1]["duration"] = previous_duration + duration
+        return depth_frame_list
+
+    def __change_point_depth_text_list(
+        self,
+        time_data: list[float],
+        depth_data: list[float],
+        decimal_places: int,
+        minus_sign: bool,
+    ) -> list[dict[str, Union[str, float]]]:
+        """Creates the depth text list from the frames where the rounded depth changes.
+
+        Args:
+            time_data: An array of time values in seconds.
+            depth_data: An array of depth values in meters.
+            decimal_places: The number of decimal places to round the depth values to.
+            minus_sign: A boolean value to determine if the minus sign should be displayed.
+
+        Returns:
+            A list of dictionaries containing the text, start and duration of each clip.
+        """
+        change_point_depth = ChangePointDepth(
+            times=time_data,
+            depths=depth_data,
+            fps=self.fps,
+            decimal_places=decimal_places,
+        )
+        depth_frame_list: list[dict[str, Union[str, float]]] = []
+        for segment in change_point_depth.get_segments():
+            text = self.__depth_to_text(segment["depth"], decimal_places, minus_sign)
+            depth_frame_list.append(
+                {
+                    "text": text,
+                    "start": segment["start"],
+                    "duration": segment["duration"],
+                }
+            )
+        return depth_frame_list
+
+    def create_depth_text_list(
         self,
         time_data: list[float],
         depth_data: list[float],
         decimal_places: int = 0,
         minus_sign: bool = True,
-    ) -> VideoClip:
-        """Creates a video that reports the depth in meters from an array input.
+        engine: str = "change-point",
+    ) -> list[dict[str, Union[str, float]]]:
+        """Creates the list of depth texts shown in the video and their durations.
 
         Args:
             time_data: An array of time values in seconds.
             depth_data: An array of depth values in meters.
             decimal_places: The number of decimal places to round the depth values to.
             minus_sign: A boolean value to determine if the minus sign should be displayed.
+            engine: `change-point` solves the frames where the rounded depth changes
+                from the samples, `interpolation` interpolates and rounds every frame.
+                Both produce the same texts frame for frame.
 
         Returns:
-            The processed video.
+            A list of dictionaries containing the text and duration of each clip.
 
         Raises:
             DepthReportVideoCreatorError: If the decimal places value is invalid
+            DepthReportVideoCreatorError: If the engine is invalid
             DepthReportVideoCreatorError: If there is an error in the interpolation process
         """
         # Check the decimal places value
@@ -69,43 +184,53 @@ class DepthReportVideoCreator(OverlayVideoCreator):
             raise DepthReportVideoCreatorError(
                 "Invalid decimal places value; must be a number between 0 and 2."
             )
-        # Interpolate the depth data
         try:
-            interpolated_depth = LinearInterpolationDepth(
-                times=time_data, depths=depth_data, fps=self.fps
-            )
-            interpolated_depths = interpolated_depth.get_interpolated_depths()
-            interpolated_times = interpolated_depth.get_interpolated_times()
-
-            depth_frame_list: list[dict[str, Union[str, float]]] = []
-            previous_text = "NA"
-            clip_count = len(interpolated_times)
-            for i in range(clip_count):
-                duration = self.__clip_duration_in_seconds(i, interpolated_times)
-                if decimal_places == 0:
-                    rounded_current_depth = round(interpolated_depths[i])
-                    if rounded_current_depth == 0:
-                        text = "0m"
-                    else:
-                        text = f"{'-' if minus_sign else ''}{rounded_current_depth}m"
-                else:
-                    current_depth = round(interpolated_depths[i], decimal_places)
-                    if current_depth == 0:
-                        text = f"{0:.{decimal_places}f}m"
-                    else:
-                        text = f"{'-' if minus_sign else ''}{current_depth:.{decimal_places}f}m"
-                # Check if the text is the same as the previous text to reduce the number of clips
-                # with the same text for better performance when rendering
-                if text != previous_text:
-                    # Append the text and duration to the list
-                    depth_frame_list.append({"text": text, "duration": duration})
-                    previous_text = text
-                else:
-                    # If the text is the same, just add the duration to the last clip
-                    previous_duration = float(depth_frame_list[-1]["duration"])
-                    depth_frame_list[-1]["duration"] = previous_duration + duration
-
-            full_video = super().render_text_video(depth_frame_list)
-            return full_video
+            if engine == "change-point":
+                return self.__change_point_depth_text_list(
+                    time_data, depth_data, decimal_places, minus_sign
+                )
+            if engine == "interpolation":
+                return self.__interpolated_depth_text_list(
+                    time_data, depth_data, decimal_places, minus_sign
+                )
         except LinearInterpolationDepthError as e:
             raise DepthReportVideoCreatorError(f"Interpolation Error; ({e})") from e
+        raise DepthReportVideoCreatorError(
+            f"Invalid engine: {engine}; must be one of change-point, interpolation."
+        )
+
+    def render_depth_report_video(
+        self,
+        time_data: list[float],
+        depth_data: list[float],
+        decimal_places: int = 0,
+        minus_sign: bool = True,
+        engine: str = "change-point",
+    ) -> VideoClip:
+        """Creates a video that reports the depth in meters from an array input.
+
+        Args:
+            time_data: An array of time values in seconds.
+            depth_data: An array of depth values in meters.
+            decimal_places: The number of decimal places to round the depth values to.
+            minus_sign: A boolean value to determine if the minus sign should be displayed.
+            engine: The engine used to find the depth texts (`change-point` or
+                `interpolation`).
+
+        Returns:
+            The processed video.
+
+        Raises:
+            DepthReportVideoCreatorError: If the decimal places value is invalid
+            DepthReportVideoCreatorError: If the engine is invalid
+            DepthReportVideoCreatorError: If there is an error in the interpolation process
+        """
+        depth_frame_list = self.create_depth_text_list(
+            time_data=time_data,
+            depth_data=depth_data,
+            decimal_places=decimal_places,
+            minus_sign=minus_sign,
+            engine=engine,
+        )
+        full_video = super().render_text_video(depth_frame_list)
+        return full_video
@@ -0,0 +1,778 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to encode videos by piping raw frames straight into ffmpeg.
+
+`VideoClip.write_videofile` goes through moviepy's writer, which adds clip
+composition, per-frame conversions and logger callbacks on top of the encoding.
+The encoder in this module pulls the frames from the clip and writes them to the
+stdin of an ffmpeg process as memoryviews, without copying them (frames of another
+type or layout are first converted into a single preallocated RGB buffer), so the
+encoding speed is bounded by ffmpeg itself.
+
+The frames can also be rasterized by a pool of threads (PIL releases the GIL) while a
+writer thread feeds ffmpeg: the rasterized frames wait in a bounded queue, in order, so
+the rasterizers never get more than a few frames ahead of the encoder.
+
+The encoder can also split the video into chunks that start on keyframe (GOP)
+boundaries, encode the chunks in a pool of processes and join them losslessly with
+ffmpeg's concat demuxer (stream copy).
+
+In the variable frame rate mode, only the frames where the text changes are encoded:
+every distinct text is rendered once to a still image, and the concat demuxer shows
+each still for the duration of its segment (timestamps on the frame grid).
+
+Subtitles can also be burned in by ffmpeg itself: an ASS script is rendered by the
+libass `ass` filter onto a solid `color` source (or onto a background video), so the
+text rendering and the encoding happen in a single native pass.
+
+Constants:
+    DEFAULT_CODEC: The default video codec.
+    DEFAULT_PRESET: The default encoder preset.
+    DEFAULT_CRF: The default constant rate factor (quality).
+    DEFAULT_PARALLEL_GOP: The GOP size used by the parallel encoding when none is set
+        (same as the default keyframe interval of x264).
+    FRAME_RATE_MODES: The available frame rate modes.
+"""
+
+import math
+import os
+import shutil
+import queue
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from typing import IO, Callable, Optional, cast
+import numpy as np
+from numpy.typing import NDArray
+from moviepy import VideoClip
+from moviepy.config import FFMPEG_BINARY
+from PIL import Image, ImageColor
+from tqdm import tqdm
+from depthviz.video.defaults import DEFAULT_QUEUE_DEPTH
+from depthviz.video.timeline import TextTimelineClip
+
+DEFAULT_CODEC = "libx264"
+DEFAULT_PRESET = "medium"
+DEFAULT_CRF = 23
+DEFAULT_PARALLEL_GOP = 250
+FRAME_RATE_MODES = ("constant", "variable")
+
+
+class VideoEncoderError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class FFmpegPipeEncoder:
+    """Class to encode a clip by writing raw RGB frames to an ffmpeg process.
+
+    Attributes:
+        codec: The video codec (e.g., libx264, libx265).
+        preset: The encoder preset (e.g., ultrafast, medium, slow).
+        crf: The constant rate factor, lower is better quality.
+        threads: The number of encoder threads (0 lets ffmpeg decide).
+        pix_fmt: The pixel format of the output video.
+        gop: The maximum number of frames between keyframes (None lets ffmpeg decide).
+        tune: The encoder tuning (e.g., stillimage for libx264), None for no tuning.
+        frame_rate_mode: `constant` encodes every frame, `variable` only encodes the
+            frames where the text changes (timeline clips only).
+        render_threads: The number of threads rasterizing the frames while a writer
+            thread feeds ffmpeg (0 rasterizes and writes the frames in series).
+        queue_depth: The maximum number of rasterized frames waiting for the writer
+            thread.
+        ffmpeg_binary: The ffmpeg executable.
+    """
+
+    def __init__(
+        self,
+        codec: str = DEFAULT_CODEC,
+        preset: str = DEFAULT_PRESET,
+        crf: int = DEFAULT_CRF,
+        threads: int = 0,
+        pix_fmt: str = "yuv420p",
+        gop: Optional[int] = None,
+        tune: Optional[str] = None,
+        frame_rate_mode: str = "constant",
+        render_threads: int = 0,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        ffmpeg_binary: Optional[str] = None,
+    ) -> None:
+        """Initializes the FFmpegPipeEncoder object.
+
+        Args:
+            codec: The video codec.
+            preset: The encoder preset.
+            crf: The constant rate factor (0 - 51).
+            threads: The number of encoder threads (0 lets ffmpeg decide).
+            pix_fmt: The pixel format of the output video.
+            gop: The maximum number of frames between keyframes (None lets ffmpeg
+                decide). In the variable frame rate mode, only the encoded frames
+                count, so the default interval is already long in time.
+            tune: The encoder tuning (e.g., stillimage for libx264).
+            frame_rate_mode: The frame rate mode (`constant` or `variable`).
+            render_threads: The number of threads rasterizing the frames (0 rasterizes
+                the frames in the thread writing them to ffmpeg). The clips must then
+                be safe to render from several threads, as the clips of the video
+                creators are.
+            queue_depth: The maximum number of rasterized frames waiting for the writer
+                thread (the rasterizer threads wait when the queue is full).
+            ffmpeg_binary: The ffmpeg executable (default: the one used by moviepy).
+
+        Raises:
+            VideoEncoderError: If the CRF, the number of threads, the GOP, the frame
+                rate mode, the number of render threads or the queue depth is invalid.
+        """
+        if not isinstance(crf, int) or not 0 <= crf <= 51:
+            raise VideoEncoderError(
+                "Invalid CRF value; must be a number between 0 and 51."
+            )
+        if not isinstance(threads, int) or threads < 0:
+            raise VideoEncoderError(
+                "Invalid number of threads; must be a positive number."
+            )
+        if gop is not None and (not isinstance(gop, int) or gop <= 0):
+            raise VideoEncoderError("Invalid GOP size; must be a positive number.")
+        if frame_rate_mode not in FRAME_RATE_MODES:
+            raise VideoEncoderError(
+                f"Invalid frame rate mode: {frame_rate_mode}; "
+                f"must be one of {', '.join(FRAME_RATE_MODES)}."
+            )
+        if not isinstance(render_threads, int) or render_threads < 0:
+            raise VideoEncoderError(
+                "Invalid number of render threads; must be a positive number."
+            )
+        if not isinstance(queue_depth, int) or queue_depth <= 0:
+            raise VideoEncoderError("Invalid queue depth; must be a positive number.")
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.pix_fmt = pix_fmt
+        self.gop = gop
+        self.tune = tune
+        self.frame_rate_mode = frame_rate_mode
+        self.render_threads = render_threads
+        self.queue_depth = queue_depth
+        self.ffmpeg_binary = ffmpeg_binary if ffmpeg_binary else FFMPEG_BINARY
+
+    def build_command(self, path: str, size: tuple[int, int], fps: float) -> list[str]:
+        """Builds the ffmpeg command reading raw RGB frames from stdin.
+
+        Args:
+            path: The output video path.
+            size: The frame size (width, height).
+            fps: The frame rate.
+
+        Returns:
+            The ffmpeg command line.
+        """
+        width, height = size
+        return [
+            self.ffmpeg_binary,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-vcodec",
+            "rawvideo",
+            "-s",
+            f"{width}x{height}",
+            "-pix_fmt",
+            "rgb24",
+            "-r",
+            f"{fps:.02f}",
+            "-i",
+            "-",
+            *self.output_args(path),
+        ]
+
+    def output_args(self, path: str) -> list[str]:
+        """Builds the ffmpeg output arguments with the encoder settings.
+
+        Args:
+            path: The output video path.
+
+        Returns:
+            The ffmpeg output arguments.
+        """
+        tune_args = ["-tune", self.tune] if self.tune is not None else []
+        keyframe_args = ["-g", str(self.gop)] if self.gop is not None else []
+        return [
+            "-an",
+            "-vcodec",
+            self.codec,
+            "-preset",
+            self.preset,
+            "-crf",
+            str(self.crf),
+            "-threads",
+            str(self.threads),
+            "-pix_fmt",
+            self.pix_fmt,
+            *tune_args,
+            *keyframe_args,
+            path,
+        ]
+
+    def encode(
+        self,
+        video: VideoClip,
+        path: str,
+        fps: int,
+        progress_bar_config: Optional[dict[str, object]] = None,
+        progress_bar_desc: str = "Exporting",
+        frames: Optional[range] = None,
+        disable_progress_bar: bool = False,
+    ) -> None:
+        """Encodes a clip to a video file.
+
+        The frames are taken at the same times as moviepy (`i / fps` for each of the
+        `int(duration * fps)` frames).
+
+        Args:
+            video: The clip to encode.
+            path: The output video path.
+            fps: The frame rate.
+            progress_bar_config: The progress bar style (unit, color and ncols).
+            progress_bar_desc: The description for the progress bar.
+            frames: The indexes of the frames to encode (default: all the frames).
+            disable_progress_bar: Whether to hide the progress bar.
+
+        Raises:
+            VideoEncoderError: If ffmpeg cannot be started or fails to encode the video.
+        """
+        width, height = video.size
+        if frames is None:
+            frames = range(int(video.duration * fps))
+        progress_bar_config = progress_bar_config or {}
+
+        try:
+            process = subprocess.Popen(  # pylint: disable=consider-using-with
+                self.build_command(path=path, size=(width, height), fps=fps),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except OSError as e:
+            raise VideoEncoderError(f"Cannot start ffmpeg: {e}") from e
+
+        stdin = process.stdin
+        assert stdin is not None
+        try:
+            with tqdm(
+                iterable=frames,
+                desc=progress_bar_desc,
+                colour=cast(Optional[str], progress_bar_config.get("color")),
+                unit=str(progress_bar_config.get("unit", "f")),
+                ncols=cast(int, progress_bar_config.get("ncols", 80)),
+                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} ({remaining} remaining)",
+                leave=False,
+                disable=disable_progress_bar,
+            ) as progress_bar:
+                if self.render_threads > 0:
+                    self.__write_frames_threaded(
+                        video, frames, fps, stdin, progress_bar
+                    )
+                else:
+                    self.__write_frames(video, progress_bar, fps, stdin)
+        except BrokenPipeError:
+            # ffmpeg exited early, the error is reported below
+            pass
+        finally:
+            # Closes stdin (end of the stream) and waits for ffmpeg to finish
+            _, stderr = process.communicate()
+
+        if process.returncode != 0:
+            raise VideoEncoderError(
+                f"ffmpeg failed to encode the video: {stderr.decode(errors='replace').strip()}"
+            )
+
+    @staticmethod
+    def __write_frames(
+        video: VideoClip, frames: "tqdm[int]", fps: int, stdin: IO[bytes]
+    ) -> None:
+        """Rasterizes the frames and writes them to ffmpeg, in series.
+
+        Args:
+            video: The clip to encode.
+            frames: The indexes of the frames to write (wrapped in the progress bar).
+            fps: The frame rate.
+            stdin: The stdin of ffmpeg.
+        """
+        width, height = video.size
+        # A single buffer for the frames which must be converted first
+        buffer: NDArray[np.uint8] = np.empty((height, width, 3), dtype=np.uint8)
+        buffer_view = buffer.data.cast("B")
+        for i in frames:
+            frame = video.get_frame(i / fps)
+            if (
+                frame.dtype == np.uint8
+                and frame.shape == buffer.shape
+                and frame.flags.c_contiguous
+            ):
+                # e.g., the frame buffer of the glyph atlas or a cached frame
+                stdin.write(frame.data.cast("B"))
+            else:
+                np.copyto(buffer, frame, casting="unsafe")
+                stdin.write(buffer_view)
+
+    def __write_frames_threaded(
+        self,
+        video: VideoClip,
+        frames: range,
+        fps: int,
+        stdin: IO[bytes],
+        progress_bar: "tqdm[int]",
+    ) -> None:
+        """Rasterizes the frames in a pool of threads and writes them from a writer thread.
+
+        The frames are submitted to the rasterizer threads in order and their pending
+        results are put in a bounded queue: submitting waits while the queue is full
+        (back-pressure), and the writer thread takes the frames from the queue in order.
+        The frames which may be reused by the clip (writable, e.g., the frame buffer of
+        the glyph atlas) are copied into a pool of buffers, one per frame in flight.
+
+        Args:
+            video: The clip to encode (safe to render from several threads).
+            frames: The indexes of the frames to write.
+            fps: The frame rate.
+            stdin: The stdin of ffmpeg.
+            progress_bar: The progress bar, updated for every frame written.
+
+        Raises:
+            BrokenPipeError: If ffmpeg exits early.
+        """
+        width, height = video.size
+        # At most `queue_depth` frames in the queue, one being written and one waiting
+        # to be queued
+        buffers: queue.SimpleQueue[NDArray[np.uint8]] = queue.SimpleQueue()
+        for _ in range(self.queue_depth + 2):
+            buffers.put(np.empty((height, width, 3), dtype=np.uint8))
+        pending: queue.Queue[Optional[Future[tuple[NDArray[np.uint8], bool]]]] = (
+            queue.Queue(maxsize=self.queue_depth)
+        )
+        stop = threading.Event()
+        errors: list[BaseException] = []
+
+        def rasterize(i: int) -> tuple[NDArray[np.uint8], bool]:
+            """Rasterizes a frame, returns it with whether it is a pool buffer."""
+            frame = video.get_frame(i / fps)
+            if (
+                frame.dtype == np.uint8
+                and frame.shape == (height, width, 3)
+                and frame.flags.c_contiguous
+                and not frame.flags.writeable
+            ):
+                # e.g., a cached frame, which is never modified
+                return frame, False
+            buffer = buffers.get()
+            np.copyto(buffer, frame, casting="unsafe")
+            return buffer, True
+
+        def write() -> None:
+            """Writes the queued frames to ffmpeg, until the end of the queue."""
+            while (future := pending.get()) is not None:
+                if stop.is_set() and future.cancel():
+                    continue
+                try:
+                    frame, is_buffer = future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # Reported by the main thread
+                    errors.append(e)
+                    stop.set()
+                    continue
+                try:
+                    if not stop.is_set():
+                        stdin.write(frame.data.cast("B"))
+                        progress_bar.update()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    errors.append(e)
+                    stop.set()
+                finally:
+                    if is_buffer:
+                        buffers.put(frame)
+
+        with ThreadPoolExecutor(
+            max_workers=self.render_threads, thread_name_prefix="rasterizer"
+        ) as executor:
+            writer = threading.Thread(target=write, name="writer")
+            writer.start()
+            try:
+                for i in frames:
+                    if stop.is_set():
+                        break
+                    pending.put(executor.submit(rasterize, i))
+            except BaseException:
+                # The writer cancels the queued frames
+                stop.set()
+                raise
+            finally:
+                # The end of the queue
+                pending.put(None)
+                writer.join()
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def chunk_ranges(frame_count: int, jobs: int, gop: int) -> list[range]:
+        """Splits the frames into contiguous chunks starting on keyframe boundaries.
+
+        Args:
+            frame_count: The number of frames of the video.
+            jobs: The number of chunks wanted (at most).
+            gop: The number of frames between keyframes.
+
+        Returns:
+            The ranges of frame indexes of the chunks, every chunk (except the last one)
+            has a multiple of `gop` frames.
+        """
+        chunk_size = math.ceil(math.ceil(frame_count / max(jobs, 1)) / gop) * gop
+        chunk_size = max(chunk_size, gop)
+        return [
+            range(start, min(start + chunk_size, frame_count))
+            for start in range(0, frame_count, chunk_size)
+        ]
+
+    def concatenate(self, paths: list[str], path: str) -> None:
+        """Joins encoded chunks with the concat demuxer, without re-encoding.
+
+        Args:
+            paths: The paths of the chunks, in order.
+            path: The output video path.
+
+        Raises:
+            VideoEncoderError: If ffmpeg fails to join the chunks.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            list_path = os.path.join(temp_dir, "chunks.ffconcat")
+            with open(list_path, "w", encoding="utf-8") as list_file:
+                list_file.write("ffconcat version 1.0\n")
+                for chunk_path in paths:
+                    list_file.write(_concat_file_line(chunk_path))
+            self.run_ffmpeg(
+                ["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", path]
+            )
+
+    def run_ffmpeg(self, args: list[str], cwd: Optional[str] = None) -> None:
+        """Runs ffmpeg with the given arguments (overwriting the output).
+
+        Args:
+            args: The ffmpeg arguments.
+            cwd: The working directory of ffmpeg (None: the current directory).
+
+        Raises:
+            VideoEncoderError: If ffmpeg cannot be started or fails.
+        """
+        try:
+            result = subprocess.run(
+                [self.ffmpeg_binary, "-y", "-loglevel", "error", *args],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=False,
+                cwd=cwd,
+            )
+        except OSError as e:
+            raise VideoEncoderError(f"Cannot start ffmpeg: {e}") from e
+        if result.returncode != 0:
+            raise VideoEncoderError(
+                f"ffmpeg failed to encode the video: "
+                f"{result.stderr.decode(errors='replace').strip()}"
+            )
+
+    def encode_parallel(
+        self,
+        video: VideoClip,
+        clip_factory: Callable[[], VideoClip],
+        path: str,
+        fps: int,
+        jobs: int,
+        progress_bar_config: Optional[dict[str, object]] = None,
+        progress_bar_desc: str = "Exporting",
+    ) -> None:
+        """Encodes a clip in chunks, in a pool of processes.
+
+        Every chunk starts on a keyframe, so the chunks can be joined with a stream copy
+        and the result has the same GOP structure as a single encoding.
+
+        Args:
+            video: The clip to encode.
+            clip_factory: A picklable function which creates the same clip in a worker
+                process (e.g., a `functools.partial` of a module-level function).
+            path: The output video path.
+            fps: The frame rate.
+            jobs: The number of worker processes.
+            progress_bar_config: The progress bar style (unit, color and ncols).
+            progress_bar_desc: The description for the progress bar.
+
+        Raises:
+            VideoEncoderError: If ffmpeg fails to encode or join the chunks.
+        """
+        gop = self.gop if self.gop is not None else DEFAULT_PARALLEL_GOP
+        chunk_encoder = FFmpegPipeEncoder(
+            codec=self.codec,
+            preset=self.preset,
+            crf=self.crf,
+            threads=self.threads,
+            pix_fmt=self.pix_fmt,
+            gop=gop,
+            tune=self.tune,
+            ffmpeg_binary=self.ffmpeg_binary,
+        )
+        chunks = self.chunk_ranges(int(video.duration * fps), jobs, gop)
+        progress_bar_config = progress_bar_config or {}
+
+        # Keep the chunks next to the output, they can be large
+        output_dir = os.path.dirname(os.path.abspath(path))
+        with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+            chunk_paths = [
+                os.path.join(temp_dir, f"chunk_{i:05d}.mp4") for i in range(len(chunks))
+            ]
+            with (
+                ProcessPoolExecutor(max_workers=jobs) as executor,
+                tqdm(
+                    total=sum(len(chunk) for chunk in chunks),
+                    desc=progress_bar_desc,
+                    colour=cast(Optional[str], progress_bar_config.get("color")),
+                    unit=str(progress_bar_config.get("unit", "f")),
+                    ncols=cast(int, progress_bar_config.get("ncols", 80)),
+                    bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} ({remaining} remaining)",
+                    leave=False,
+                ) as progress_bar,
+            ):
+                futures = {
+                    executor.submit(
+                        _encode_chunk,
+                        chunk_encoder,
+                        clip_factory,
+                        chunk_path,
+                        fps,
+                        chunk,
+                    ): chunk
+                    for chunk_path, chunk in zip(chunk_paths, chunks)
+                }
+                for future in as_completed(futures):
+                    future.result()
+                    progress_bar.update(len(futures[future]))
+            chunk_encoder.concatenate(chunk_paths, path)
+
+    @staticmethod
+    def frame_runs(video: TextTimelineClip, fps: int) -> list[tuple[int, int, int]]:
+        """Finds the runs of frames showing the same text on the frame grid.
+
+        Args:
+            video: The timeline clip.
+            fps: The frame rate of the frame grid.
+
+        Returns:
+            A list of (text index, first frame, end frame) tuples (end frame excluded),
+            where the text index is the index in `video.texts`.
+        """
+        frame_count = int(video.duration * fps)
+        frame_times = np.arange(frame_count) / fps
+        segments = np.maximum(
+            np.searchsorted(video.starts, frame_times, side="right") - 1, 0
+        )
+        frame_texts = video.text_index[segments]
+        # The first frame of each run of frames showing the same text
+        run_starts = np.flatnonzero(np.diff(frame_texts, prepend=-1)).tolist()
+        run_ends = run_starts[1:] + [frame_count]
+        return [
+            (int(frame_texts[start]), start, end)
+            for start, end in zip(run_starts, run_ends)
+        ]
+
+    @staticmethod
+    def write_concat_list(
+        list_path: str,
+        entries: list[tuple[str, int]],
+        fps: int,
+        image_inputs: bool = False,
+    ) -> None:
+        """Writes an ffconcat list showing each file for a number of frames.
+
+        The last entry of a concat list is shown for a single frame, so the file of the
+        last entry is repeated as the last frame of the video.
+
+        Args:
+            list_path: The path of the list.
+            entries: A list of (file path, number of frames) tuples.
+            fps: The frame rate of the frame grid.
+            image_inputs: The files are still images, read with a time base on the
+                frame grid (1 / fps).
+        """
+        with open(list_path, "w", encoding="utf-8") as list_file:
+            list_file.write("ffconcat version 1.0\n")
+            for i, (path, frames) in enumerate(entries):
+                durations = [frames]
+                if i == len(entries) - 1:
+                    durations = [frames - 1, 1] if frames > 1 else [1]
+                for duration in durations:
+                    list_file.write(_concat_file_line(path))
+                    if image_inputs:
+                        list_file.write(f"option framerate {fps}\n")
+                    list_file.write(f"duration {duration / fps!r}\n")
+
+    def encode_variable(
+        self,
+        video: TextTimelineClip,
+        path: str,
+        fps: int,
+    ) -> None:
+        """Encodes a timeline clip, only the frames where the text changes.
+
+        The frames shown are the same as in the constant frame rate video: the text of
+        every frame `i / fps` is looked up, and each run of frames with the same text
+        becomes a single still frame lasting for the run.
+
+        Args:
+            video: The timeline clip to encode.
+            path: The output video path.
+            fps: The frame rate of the frame grid.
+
+        Raises:
+            VideoEncoderError: If ffmpeg fails to encode the video.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            still_paths: dict[int, str] = {}
+            entries = []
+            for text_idx, start, end in self.frame_runs(video, fps):
+                if text_idx not in still_paths:
+                    still_paths[text_idx] = os.path.join(
+                        temp_dir, f"still_{text_idx:05d}.ppm"
+                    )
+                    Image.fromarray(video.get_frame(start / fps)).save(
+                        still_paths[text_idx]
+                    )
+                entries.append((still_paths[text_idx], end - start))
+            list_path = os.path.join(temp_dir, "stills.ffconcat")
+            self.write_concat_list(list_path, entries, fps, image_inputs=True)
+            self.run_ffmpeg(
+                [
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    list_path,
+                    "-fps_mode",
+                    "vfr",
+                    # Timestamps on the frame grid
+                    "-enc_time_base",
+                    f"1:{fps}",
+                    # B-frames make the muxer misreport the duration of VFR streams
+                    "-bf",
+                    "0",
+                    *self.output_args(path),
+                ]
+            )
+
+    def burn_subtitles(
+        self,
+        script: str,
+        font: str,
+        path: str,
+        size: tuple[int, int],
+        fps: int,
+        duration: float,
+        bg_color: str = "black",
+        background: Optional[str] = None,
+    ) -> None:
+        """Renders an ASS script with libass and encodes it in a single ffmpeg pass.
+
+        The script and the font are copied to a temporary directory which is used as
+        the working directory of ffmpeg, so the filter arguments need no escaping and
+        libass finds the font without it being installed.
+
+        Args:
+            script: The ASS script.
+            font: The font file used by the script.
+            path: The output video path.
+            size: The video size (width, height).
+            fps: The video frame rate.
+            duration: The video duration in seconds.
+            bg_color: The color of the solid background.
+            background: A video to burn the subtitles onto instead of the solid
+                background (None: solid background).
+
+        Raises:
+            VideoEncoderError: If the background color is invalid.
+            VideoEncoderError: If ffmpeg fails to encode the video.
+        """
+        try:
+            red, green, blue = ImageColor.getrgb(bg_color)[:3]
+        except ValueError as e:
+            raise VideoEncoderError(f"Invalid background color: {bg_color}") from e
+        if background is None:
+            source = [
+                "-f",
+                "lavfi",
+                "-i",
+                f"color=c=0x{red:02X}{green:02X}{blue:02X}"
+                f":s={size[0]}x{size[1]}:r={fps}:d={duration!r}",
+            ]
+        else:
+            source = ["-i", os.path.abspath(background), "-t", repr(duration)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(
+                os.path.join(temp_dir, "overlay.ass"), "w", encoding="utf-8"
+            ) as script_file:
+                script_file.write(script)
+            os.mkdir(os.path.join(temp_dir, "fonts"))
+            shutil.copy(font, os.path.join(temp_dir, "fonts"))
+            self.run_ffmpeg(
+                [
+                    *source,
+                    "-vf",
+                    f"scale={size[0]}:{size[1]},ass=overlay.ass:fontsdir=fonts",
+                    "-r",
+                    str(fps),
+                    *self.output_args(os.path.abspath(path)),
+                ],
+                cwd=temp_dir,
+            )
+
+
+def _concat_file_line(path: str) -> str:
+    """Returns the `file` line of a concat list, quoting and escaping the path.
+
+    Args:
+        path: The file path.
+
+    Returns:
+        The line of the file, with its absolute path.
+    """
+    escaped_path = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped_path}'\n"
+
+
+def _encode_chunk(
+    encoder: FFmpegPipeEncoder,
+    clip_factory: Callable[[], VideoClip],
+    path: str,
+    fps: int,
+    frames: range,
+) -> None:
+    """Encodes a chunk of a clip in a worker process.
+
+    Args:
+        encoder: The encoder of the chunk.
+        clip_factory: A function which creates the clip.
+        path: The chunk path.
+        fps: The frame rate.
+        frames: The indexes of the frames of the chunk.
+    """
+    encoder.encode(
+        video=clip_factory(),
+        path=path,
+        fps=fps,
+        frames=frames,
+        disable_progress_bar=True,
+    )
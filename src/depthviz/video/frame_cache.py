@@ -0,0 +1,354 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to cache the rendered frames of the overlay texts.
+
+A dive profile shows the same depth on the way down and on the way up, and the same
+text may appear in many segments of a video. The cache keeps every distinct rendered
+frame once, keyed by the text and the style it was rendered with, so that each frame
+is only rasterized the first time it is shown. The least recently used frames are
+evicted when the cache grows past its memory cap.
+
+The frames can also be kept on disk and shared across runs: the disk cache stores
+every frame as a raw `.npy` array named after a hash of the font file bytes, the style
+parameters and the text, so a warm run reads the frames back instead of rasterizing
+them. The least recently used files are deleted when the cache directory grows past
+its size limit. Reading a raw array back is cheaper than rasterizing it with the glyph
+atlas, but writing it is not, so the disk cache only pays off on warm runs and it is
+not used unless asked for.
+
+Constants:
+    DEFAULT_FRAME_CACHE_SIZE: The default memory cap of the cache in bytes.
+    DEFAULT_DISK_CACHE_SIZE: The default size limit of the disk cache in bytes.
+"""
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, cast
+import numpy as np
+from numpy.typing import NDArray
+from depthviz.cache_dir import default_cache_dir
+
+DEFAULT_FRAME_CACHE_SIZE = 256 * 1024 * 1024
+DEFAULT_DISK_CACHE_SIZE = 512 * 1024 * 1024
+
+
+class FrameCacheError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class FrameCache:
+    """A least recently used (LRU) cache of rendered frames with a memory cap.
+
+    The cached frames are read-only, so a frame can be shared by every segment showing
+    the same text without being copied. The cache can be shared by several threads (the
+    frames are rendered outside of its lock).
+
+    Attributes:
+        max_bytes: The memory cap of the cache in bytes (0 disables the cache).
+        hits: The number of lookups that found a cached frame.
+        misses: The number of lookups that did not find a cached frame.
+        evictions: The number of frames evicted to stay under the memory cap.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_FRAME_CACHE_SIZE) -> None:
+        """Initializes the FrameCache object.
+
+        Args:
+            max_bytes: The memory cap of the cache in bytes (0 disables the cache).
+
+        Raises:
+            FrameCacheError: If the memory cap is negative.
+        """
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise FrameCacheError(
+                "Invalid frame cache size; must be a positive number."
+            )
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__frames: OrderedDict[Hashable, NDArray[np.uint8]] = OrderedDict()
+        self.__nbytes = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of cached frames."""
+        return len(self.__frames)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the cached frames in bytes."""
+        return self.__nbytes
+
+    def get(self, key: Hashable) -> Optional[NDArray[np.uint8]]:
+        """Returns a cached frame and marks it as the most recently used.
+
+        Args:
+            key: The key of the frame.
+
+        Returns:
+            The cached frame, or None if the frame is not cached.
+        """
+        with self.__lock:
+            frame = self.__frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.__frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: Hashable, frame: NDArray[np.uint8]) -> NDArray[np.uint8]:
+        """Adds a frame to the cache, evicting the least recently used frames if needed.
+
+        The frame is stored as is (not copied) and made read-only, the caller must not
+        reuse its buffer. A frame larger than the memory cap is not cached.
+
+        Args:
+            key: The key of the frame.
+            frame: The frame to cache.
+
+        Returns:
+            The frame.
+        """
+        if frame.nbytes > self.max_bytes:
+            return frame
+        frame.setflags(write=False)
+        with self.__lock:
+            previous = self.__frames.pop(key, None)
+            if previous is not None:
+                self.__nbytes -= previous.nbytes
+            self.__frames[key] = frame
+            self.__nbytes += frame.nbytes
+            while self.__nbytes > self.max_bytes:
+                _, evicted = self.__frames.popitem(last=False)
+                self.__nbytes -= evicted.nbytes
+                self.evictions += 1
+        return frame
+
+    def get_or_render(
+        self, key: Hashable, render: Callable[[], NDArray[np.uint8]]
+    ) -> NDArray[np.uint8]:
+        """Returns a cached frame, rendering and caching it on a miss.
+
+        Args:
+            key: The key of the frame.
+            render: A function which renders a new frame (owned by the cache).
+
+        Returns:
+            The frame.
+        """
+        frame = self.get(key)
+        if frame is None:
+            frame = self.put(key, render())
+        return frame
+
+    def clear(self) -> None:
+        """Removes every frame from the cache (the counters are kept)."""
+        with self.__lock:
+            self.__frames.clear()
+            self.__nbytes = 0
+
+    def __repr__(self) -> str:
+        """Returns a summary of the cache usage."""
+        return (
+            f"FrameCache(frames={len(self)}, nbytes={self.nbytes}, "
+            f"max_bytes={self.max_bytes}, hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions})"
+        )
+
+
+class DiskFrameCache:
+    """A persistent cache of rendered frames, shared across runs.
+
+    The cache is best effort: a file that cannot be read or written is treated as a
+    miss. The files are written atomically (renamed into place), so several processes
+    can share the same directory. The cache can be shared by several threads (the files
+    are read and written outside of its lock), and sent to other processes (e.g., the
+    workers of the parallel encoding), which keep their own counters.
+
+    Attributes:
+        cache_dir: The directory of the cached frames.
+        max_bytes: The size limit of the cache directory in bytes.
+        hits: The number of lookups that found a cached frame.
+        misses: The number of lookups that did not find a cached frame.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = DEFAULT_DISK_CACHE_SIZE,
+    ) -> None:
+        """Initializes the DiskFrameCache object and creates its directory.
+
+        Args:
+            cache_dir: The cache directory (None: `default_cache_dir()`). The frames are
+                stored in its `frames` subdirectory.
+            max_bytes: The size limit of the cache directory in bytes.
+
+        Raises:
+            FrameCacheError: If the size limit is negative.
+            FrameCacheError: If the cache directory cannot be created.
+        """
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise FrameCacheError("Invalid disk cache size; must be a positive number.")
+        base_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.cache_dir = os.path.join(base_dir, "frames")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            raise FrameCacheError(
+                f"Cannot create the cache directory: {self.cache_dir}"
+            ) from e
+        self.__nbytes = sum(size for _, size, _ in self.__entries())
+        self.__font_digests: dict[tuple[str, int, int], str] = {}
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the cached frames in bytes."""
+        return self.__nbytes
+
+    def __getstate__(self) -> dict[str, object]:
+        """Returns the state of the cache to send it to another process (no lock)."""
+        state = self.__dict__.copy()
+        del state["_DiskFrameCache__lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        """Restores the state of the cache in another process, with a new lock."""
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def __entries(self) -> list[tuple[str, int, float]]:
+        """Lists the cached frames.
+
+        Returns:
+            A list of (path, size in bytes, last use time) tuples.
+        """
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as files:
+                for file in files:
+                    if file.name.endswith(".npy"):
+                        stat = file.stat()
+                        entries.append((file.path, stat.st_size, stat.st_mtime))
+        except OSError:
+            return []
+        return entries
+
+    def style_digest(self, font: str, style: tuple[object, ...]) -> str:
+        """Hashes a font file and the style parameters of the frames.
+
+        The font is hashed by content (not by path), so a font that changes on disk
+        does not reuse stale frames.
+
+        Args:
+            font: The font file path.
+            style: The other parameters the frames depend on (their `repr` is hashed).
+
+        Returns:
+            The hexadecimal digest.
+
+        Raises:
+            FrameCacheError: If the font file cannot be read.
+        """
+        try:
+            stat = os.stat(font)
+            font_id = (os.path.abspath(font), stat.st_size, stat.st_mtime_ns)
+            if font_id not in self.__font_digests:
+                with open(font, "rb") as font_file:
+                    self.__font_digests[font_id] = hashlib.sha256(
+                        font_file.read()
+                    ).hexdigest()
+        except OSError as e:
+            raise FrameCacheError(f"Cannot read the font file: {font}") from e
+        digest = hashlib.sha256(self.__font_digests[font_id].encode())
+        digest.update(repr(style).encode())
+        return digest.hexdigest()
+
+    def __path(self, style_digest: str, text: str) -> str:
+        """Returns the path of a cached frame."""
+        key = hashlib.sha256(f"{style_digest}:{text}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, style_digest: str, text: str) -> Optional[NDArray[np.uint8]]:
+        """Reads a cached frame and marks it as the most recently used.
+
+        Args:
+            style_digest: The digest of the font and style (see `style_digest`).
+            text: The text of the frame.
+
+        Returns:
+            The frame (H x W x 3, uint8), or None if the frame is not cached.
+        """
+        path = self.__path(style_digest, text)
+        try:
+            frame = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (OSError, ValueError, EOFError):
+            frame = None
+        with self.__lock:
+            if frame is None or frame.dtype != np.uint8 or frame.ndim != 3:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return cast(NDArray[np.uint8], frame)
+
+    def put(self, style_digest: str, text: str, frame: NDArray[np.uint8]) -> None:
+        """Writes a frame to the cache, evicting the least recently used frames if needed.
+
+        Args:
+            style_digest: The digest of the font and style (see `style_digest`).
+            text: The text of the frame.
+            frame: The frame (H x W x 3, uint8).
+        """
+        path = self.__path(style_digest, text)
+        try:
+            file_descriptor, temp_path = tempfile.mkstemp(
+                suffix=".tmp", dir=self.cache_dir
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                np.save(file, frame, allow_pickle=False)
+            size = os.path.getsize(temp_path)
+            with self.__lock:
+                # The size of the file replaced, if the frame was already cached
+                try:
+                    replaced_size = os.path.getsize(path)
+                except OSError:
+                    replaced_size = 0
+                os.replace(temp_path, path)
+                self.__nbytes += size - replaced_size
+                over_limit = self.__nbytes > self.max_bytes
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            return
+        if over_limit:
+            self.prune()
+
+    def prune(self) -> None:
+        """Deletes the least recently used frames until the cache fits its size limit."""
+        with self.__lock:
+            entries = sorted(self.__entries(), key=lambda entry: entry[2])
+            self.__nbytes = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if self.__nbytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.__nbytes -= size
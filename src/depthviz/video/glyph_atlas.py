@@ -0,0 +1,422 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to render overlay text frames from a pre-rasterized glyph atlas.
+
+Every character of a font/size/stroke/colour combination is rasterized once with PIL
+and kept as a pair of NumPy arrays (premultiplied colour and inverse alpha). A frame
+is then composed by blitting the glyphs of the text into a reusable frame buffer,
+instead of laying out and rasterizing the whole text again for every clip.
+
+Composing a frame allocates no array: the glyphs are blended in a preallocated
+scratch buffer. The layout of the previous text is kept, and only the glyph cells that
+changed are cleared and drawn again (e.g., only the last digit from "-23m" to "-24m"),
+so the cost of a new frame is proportional to the number of changed characters. When
+the width of the text changes, the text is centered again and every cell changes.
+
+Constants:
+    DEFAULT_CHARSET: The characters rasterized up front (depth and time overlays).
+"""
+
+import math
+from typing import Optional
+import numpy as np
+from numpy.typing import NDArray
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+DEFAULT_CHARSET = "0123456789-.m:"
+
+
+class GlyphAtlasError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class Glyph:
+    """A rasterized glyph ready to be blitted onto a frame.
+
+    Attributes:
+        advance: The horizontal advance of the glyph in (fractional) pixels.
+        left: The horizontal offset of the glyph cell from the pen position.
+        top: The vertical offset of the glyph cell from the baseline.
+        premultiplied: The glyph colour premultiplied by its alpha (uint16, H x W x 3).
+        inverse_alpha: The remaining background weight, 255 - alpha (uint16, H x W x 1).
+    """
+
+    def __init__(
+        self,
+        advance: float,
+        left: int,
+        top: int,
+        premultiplied: NDArray[np.uint16],
+        inverse_alpha: NDArray[np.uint16],
+    ) -> None:
+        """Initializes the Glyph object.
+
+        Args:
+            advance: The horizontal advance of the glyph in (fractional) pixels.
+            left: The horizontal offset of the glyph cell from the pen position.
+            top: The vertical offset of the glyph cell from the baseline.
+            premultiplied: The glyph colour premultiplied by its alpha.
+            inverse_alpha: The remaining background weight (255 - alpha).
+        """
+        self.advance = advance
+        self.left = left
+        self.top = top
+        self.premultiplied = premultiplied
+        self.inverse_alpha = inverse_alpha
+
+    @property
+    def width(self) -> int:
+        """The width of the glyph cell in pixels."""
+        return int(self.premultiplied.shape[1])
+
+    @property
+    def height(self) -> int:
+        """The height of the glyph cell in pixels."""
+        return int(self.premultiplied.shape[0])
+
+
+class GlyphAtlas:
+    """Class to compose text frames from glyphs that are rasterized only once.
+
+    The layout mimics moviepy's `TextClip` (label method, centered): the text box spans
+    from the pen origin to the sum of the advances (plus the stroke), and it is centered
+    horizontally and vertically (around the middle anchor) in the frame.
+
+    Note:
+        The frame returned by `render` is a reusable buffer, it is only valid until the
+        next call to `render`.
+    """
+
+    def __init__(
+        self,
+        font: str,
+        font_size: int,
+        color: str,
+        stroke_color: str,
+        stroke_width: int,
+        bg_color: str,
+        size: tuple[int, int],
+        charset: str = DEFAULT_CHARSET,
+    ) -> None:
+        """Initializes the GlyphAtlas object and rasterizes the charset.
+
+        Args:
+            font: The font file path.
+            font_size: The font size in pixels.
+            color: The text color.
+            stroke_color: The stroke color.
+            stroke_width: The stroke width in pixels.
+            bg_color: The background color.
+            size: The frame size (width, height).
+            charset: The characters to rasterize up front.
+
+        Raises:
+            GlyphAtlasError: If the font file or one of the colors cannot be loaded.
+        """
+        try:
+            self.__font = ImageFont.truetype(font, font_size)
+        except (OSError, ValueError) as e:
+            raise GlyphAtlasError(f"Error loading font file: {font}") from e
+        self.__fill = self.__parse_color(color)
+        self.__stroke_fill = self.__parse_color(stroke_color)
+        self.__bg = self.__parse_color(bg_color)
+        self.stroke_width = stroke_width
+        self.size = size
+
+        # Offset from the middle anchor (used by TextClip) down to the baseline
+        self.__baseline_offset = int(
+            self.__font.getbbox("0", anchor="lm")[1]
+            - self.__font.getbbox("0", anchor="ls")[1]
+        )
+        # Blending buffer, grown to the largest glyph cell
+        self.__scratch: NDArray[np.uint16] = np.empty((0, 0, 3), dtype=np.uint16)
+        self.__glyphs: dict[str, Glyph] = {}
+        for char in charset:
+            self.get_glyph(char)
+
+        width, height = size
+        self.__frame: NDArray[np.uint8] = np.empty((height, width, 3), dtype=np.uint8)
+        self.__frame[:] = self.__bg
+        self.__text: Optional[str] = None
+        # Layout of the current text, to redraw only the glyph cells that change
+        self.__layout: list[tuple[Glyph, int, int]] = []
+
+    @staticmethod
+    def __parse_color(color: str) -> tuple[int, int, int]:
+        """Converts a color name or hexadecimal string to an RGB tuple.
+
+        Args:
+            color: The color name or hexadecimal string.
+
+        Returns:
+            The RGB tuple.
+
+        Raises:
+            GlyphAtlasError: If the color is invalid.
+        """
+        try:
+            rgb = ImageColor.getrgb(color)
+        except ValueError as e:
+            raise GlyphAtlasError(f"Invalid color: {color}") from e
+        return (int(rgb[0]), int(rgb[1]), int(rgb[2]))
+
+    def __rasterize(self, char: str) -> Glyph:
+        """Rasterizes a single character with its stroke.
+
+        The glyph is drawn twice into grayscale masks (with and without the stroke), the
+        same way PIL draws a stroked text: the stroke first, then the fill on top of it.
+
+        Args:
+            char: The character to rasterize.
+
+        Returns:
+            The rasterized glyph.
+        """
+        advance = float(self.__font.getlength(char))
+        left, top, right, bottom = self.__font.getbbox(
+            char, stroke_width=self.stroke_width, anchor="ls"
+        )
+        # Pad the cell to catch any ink outside of the advance box
+        pad = self.stroke_width + int(self.__font.size) // 4
+        cell_width = int(right - left) + 2 * pad
+        cell_height = int(bottom - top) + 2 * pad
+        origin = (pad - int(left), pad - int(top))
+
+        stroke_mask = Image.new("L", (cell_width, cell_height), 0)
+        ImageDraw.Draw(stroke_mask).text(
+            origin,
+            char,
+            font=self.__font,
+            fill=255,
+            stroke_width=self.stroke_width,
+            stroke_fill=255,
+            anchor="ls",
+        )
+        fill_mask = Image.new("L", (cell_width, cell_height), 0)
+        ImageDraw.Draw(fill_mask).text(
+            origin, char, font=self.__font, fill=255, anchor="ls"
+        )
+
+        # Crop the cell to the ink
+        ink_box = stroke_mask.getbbox()
+        if ink_box is None:
+            empty = np.zeros((0, 0, 3), dtype=np.uint16)
+            return Glyph(advance, 0, 0, empty, np.zeros((0, 0, 1), dtype=np.uint16))
+        stroke_alpha = np.asarray(stroke_mask.crop(ink_box), dtype=np.float32) / 255
+        fill_alpha = np.asarray(fill_mask.crop(ink_box), dtype=np.float32) / 255
+        stroke_alpha = stroke_alpha[..., np.newaxis]
+        fill_alpha = fill_alpha[..., np.newaxis]
+
+        fill = np.array(self.__fill, dtype=np.float32)
+        stroke_fill = np.array(self.__stroke_fill, dtype=np.float32)
+        premultiplied = fill * fill_alpha + stroke_fill * stroke_alpha * (1 - fill_alpha)
+        inverse_alpha = 255 * (1 - stroke_alpha) * (1 - fill_alpha)
+        return Glyph(
+            advance=advance,
+            left=int(ink_box[0]) - origin[0],
+            top=int(ink_box[1]) - origin[1],
+            premultiplied=np.rint(premultiplied).astype(np.uint16),
+            inverse_alpha=np.rint(inverse_alpha).astype(np.uint16),
+        )
+
+    def get_glyph(self, char: str) -> Glyph:
+        """Returns the glyph of a character, rasterizing it on first use.
+
+        Args:
+            char: The character.
+
+        Returns:
+            The rasterized glyph.
+        """
+        glyph = self.__glyphs.get(char)
+        if glyph is None:
+            glyph = self.__rasterize(char)
+            self.__glyphs[char] = glyph
+            scratch_height, scratch_width = self.__scratch.shape[:2]
+            if glyph.height > scratch_height or glyph.width > scratch_width:
+                self.__scratch = np.empty(
+                    (
+                        max(glyph.height, scratch_height),
+                        max(glyph.width, scratch_width),
+                        3,
+                    ),
+                    dtype=np.uint16,
+                )
+        return glyph
+
+    def layout(self, text: str) -> list[tuple[Glyph, int, int]]:
+        """Computes the position of every glyph of a text in the frame.
+
+        Args:
+            text: The text to lay out.
+
+        Returns:
+            A list of (glyph, x, y) tuples, where x and y are the top-left corner of the
+            glyph cell in the frame (may be outside of the frame).
+        """
+        glyphs = [self.get_glyph(char) for char in text]
+        if not glyphs:
+            return []
+        text_width = int(sum(glyph.advance for glyph in glyphs) + 2 * self.stroke_width)
+
+        # Same placement as TextClip: center the text box, anchored at the middle
+        width, height = self.size
+        baseline_y = int(height / 2) + self.__baseline_offset
+
+        # The pen moves by the exact advances, and each glyph is placed at the nearest
+        # pixel of its pen position (like PIL), so the rounding errors do not add up
+        pen_x = (width - text_width) / 2
+        positions = []
+        for glyph in glyphs:
+            x = math.floor(pen_x + 0.5) + glyph.left
+            positions.append((glyph, x, baseline_y + glyph.top))
+            pen_x += glyph.advance
+        return positions
+
+    @staticmethod
+    def clip_box(
+        frame: NDArray[np.uint8],
+        glyph: Glyph,
+        x: int,
+        y: int,
+        clip: Optional[tuple[int, int, int, int]] = None,
+    ) -> Optional[tuple[int, int, int, int]]:
+        """Clips the cell of a glyph at the given position to a frame.
+
+        Args:
+            frame: The frame (H x W x 3, uint8).
+            glyph: The glyph.
+            x: The left position of the glyph cell.
+            y: The top position of the glyph cell.
+            clip: A (top, bottom, left, right) box of the frame to clip to as well.
+
+        Returns:
+            The (top, bottom, left, right) box of the cell in the frame, or None if the
+            cell is outside of the frame (or of the clip box).
+        """
+        top, bottom, left, right = clip or (0, frame.shape[0], 0, frame.shape[1])
+        x0, y0 = max(x, left), max(y, top)
+        x1 = min(x + glyph.width, right)
+        y1 = min(y + glyph.height, bottom)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return y0, y1, x0, x1
+
+    def blit(
+        self,
+        frame: NDArray[np.uint8],
+        glyph: Glyph,
+        x: int,
+        y: int,
+        clip: Optional[tuple[int, int, int, int]] = None,
+    ) -> None:
+        """Blends a glyph onto a frame at the given position (clipped to the frame).
+
+        The glyph is blended in place, through the scratch buffer of the atlas (no
+        array is allocated).
+
+        Args:
+            frame: The frame to draw on (H x W x 3, uint8).
+            glyph: The glyph to draw.
+            x: The left position of the glyph cell.
+            y: The top position of the glyph cell.
+            clip: A (top, bottom, left, right) box of the frame to draw in only.
+        """
+        box = self.clip_box(frame, glyph, x, y, clip)
+        if box is None:
+            return
+        y0, y1, x0, x1 = box
+        region = frame[y0:y1, x0:x1]
+        cell = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        blended = self.__scratch[: y1 - y0, : x1 - x0]
+        np.multiply(region, glyph.inverse_alpha[cell], out=blended)
+        blended += 127
+        blended //= 255
+        blended += glyph.premultiplied[cell]
+        np.copyto(region, blended, casting="unsafe")
+
+    def render(self, text: str) -> NDArray[np.uint8]:
+        """Composes a frame showing the text.
+
+        Args:
+            text: The text to render.
+
+        Returns:
+            The frame (H x W x 3, uint8). This is a reusable buffer which is only valid
+            until the next call to `render`.
+        """
+        if text == self.__text:
+            return self.__frame
+        layout = self.layout(text)
+
+        # The cells of the glyphs that changed, before and after the change
+        dirty_boxes = []
+        for i in range(max(len(self.__layout), len(layout))):
+            previous = self.__layout[i] if i < len(self.__layout) else None
+            current = layout[i] if i < len(layout) else None
+            if previous == current:
+                continue
+            for placed in (previous, current):
+                if placed is not None:
+                    box = self.clip_box(self.__frame, *placed)
+                    if box is not None:
+                        dirty_boxes.append(box)
+
+        # Clear the dirty boxes, then draw every glyph overlapping them (clipped to
+        # them, in the text order) to blend the neighbours' strokes the same way
+        for top, bottom, left, right in self.__merge_boxes(dirty_boxes):
+            self.__frame[top:bottom, left:right] = self.__bg
+            for glyph, x, y in layout:
+                self.blit(self.__frame, glyph, x, y, clip=(top, bottom, left, right))
+        self.__text = text
+        self.__layout = layout
+        return self.__frame
+
+    @staticmethod
+    def __merge_boxes(
+        boxes: list[tuple[int, int, int, int]],
+    ) -> list[tuple[int, int, int, int]]:
+        """Merges overlapping boxes, so that no pixel is drawn twice.
+
+        Args:
+            boxes: A list of (top, bottom, left, right) boxes.
+
+        Returns:
+            A list of disjoint boxes covering the boxes.
+        """
+        merged: list[tuple[int, int, int, int]] = []
+        for box in boxes:
+            overlapping = True
+            while overlapping:
+                overlapping = False
+                for other in merged:
+                    if (
+                        box[0] < other[1]
+                        and other[0] < box[1]
+                        and box[2] < other[3]
+                        and other[2] < box[3]
+                    ):
+                        merged.remove(other)
+                        box = (
+                            min(box[0], other[0]),
+                            max(box[1], other[1]),
+                            min(box[2], other[2]),
+                            max(box[3], other[3]),
+                        )
+                        overlapping = True
+                        break
+            merged.append(box)
+        return merged
+
+    def render_copy(self, text: str) -> NDArray[np.uint8]:
+        """Composes a frame showing the text into a new array.
+
+        Args:
+            text: The text to render.
+
+        Returns:
+            A new frame (H x W x 3, uint8) owned by the caller.
+        """
+        return self.render(text).copy()
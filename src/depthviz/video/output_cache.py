@@ -0,0 +1,172 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to cache the output videos by the content they are made from.
+
+A video is fully determined by the dive log data, the render options, the font and the
+version of depthviz. The cache names every output video after a digest of these inputs,
+so running depthviz again on the same inputs copies the cached video to the output path
+instead of rendering it again. The videos are copied, not linked: a video rendered
+later to the same output path must not change the cached video.
+
+Constants:
+    DEFAULT_OUTPUT_CACHE_SIZE: The default size limit of the output cache in bytes.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+import numpy as np
+from depthviz.__version__ import __version__
+from depthviz.cache_dir import default_cache_dir
+
+DEFAULT_OUTPUT_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+
+class OutputCacheError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class OutputCache:
+    """A content-addressed cache of output videos, shared across runs.
+
+    The cache is best effort: a video that cannot be copied is treated as a miss.
+
+    Attributes:
+        cache_dir: The directory of the cached videos.
+        max_bytes: The size limit of the cache directory in bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = DEFAULT_OUTPUT_CACHE_SIZE,
+    ) -> None:
+        """Initializes the OutputCache object and creates its directory.
+
+        Args:
+            cache_dir: The cache directory (None: `default_cache_dir()`). The videos are
+                stored in its `outputs` subdirectory.
+            max_bytes: The size limit of the cache directory in bytes.
+
+        Raises:
+            OutputCacheError: If the directory cannot be created.
+        """
+        base_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.cache_dir = os.path.join(base_dir, "outputs")
+        self.max_bytes = max_bytes
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            raise OutputCacheError(
+                f"Cannot create the output cache directory: {self.cache_dir}"
+            ) from e
+
+    @staticmethod
+    def digest(
+        time_data: list[float],
+        depth_data: Optional[list[float]],
+        options: dict[str, Union[str, int, float, bool, None]],
+        font: str,
+    ) -> str:
+        """Computes the digest of the inputs of a video.
+
+        Args:
+            time_data: The time data of the dive log.
+            depth_data: The depth data of the dive log (None for a time video).
+            options: The render and encoding options (JSON serializable).
+            font: The font file path (hashed by content).
+
+        Returns:
+            The hexadecimal digest.
+
+        Raises:
+            OutputCacheError: If the font file cannot be read.
+        """
+        digest = hashlib.sha256(__version__.encode())
+        digest.update(np.asarray(time_data, dtype=np.float64).tobytes())
+        if depth_data is not None:
+            digest.update(b"depth")
+            digest.update(np.asarray(depth_data, dtype=np.float64).tobytes())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        try:
+            with open(font, "rb") as font_file:
+                digest.update(hashlib.sha256(font_file.read()).digest())
+        except OSError as e:
+            raise OutputCacheError(f"Cannot read the font file: {font}") from e
+        return digest.hexdigest()
+
+    @staticmethod
+    def __copy(source: str, destination: str) -> None:
+        """Copies a file to a destination, which is replaced atomically.
+
+        Args:
+            source: The source file.
+            destination: The destination file.
+
+        Raises:
+            OSError: If the file cannot be copied.
+        """
+        with tempfile.TemporaryDirectory(
+            prefix=".depthviz-", dir=os.path.dirname(os.path.abspath(destination))
+        ) as temp_dir:
+            temp_path = os.path.join(temp_dir, os.path.basename(destination))
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, destination)
+
+    def fetch(self, digest: str, path: str) -> bool:
+        """Copies a cached video to a path.
+
+        Args:
+            digest: The digest of the inputs of the video.
+            path: The output video path.
+
+        Returns:
+            True if the video was in the cache, False otherwise.
+        """
+        cached_path = os.path.join(self.cache_dir, f"{digest}.mp4")
+        if not os.path.isfile(cached_path):
+            return False
+        try:
+            self.__copy(cached_path, path)
+            os.utime(cached_path)
+        except OSError:
+            return False
+        return True
+
+    def store(self, digest: str, path: str) -> None:
+        """Adds a video to the cache, evicting the least recently used videos if needed.
+
+        Args:
+            digest: The digest of the inputs of the video.
+            path: The video path.
+        """
+        try:
+            self.__copy(path, os.path.join(self.cache_dir, f"{digest}.mp4"))
+        except OSError:
+            return
+        self.prune()
+
+    def prune(self) -> None:
+        """Deletes the least recently used videos until the cache fits its size limit."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as files:
+                for file in files:
+                    if file.name.endswith(".mp4"):
+                        stat = file.stat()
+                        entries.append((stat.st_mtime, stat.st_size, file.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                total -= size
@@ -0,0 +1,153 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to assemble overlay videos from pre-encoded clips of each text.
+
+The number of distinct texts of an overlay is bounded (e.g., 0m to -130m), so every
+distinct frame is encoded once as a single intra frame clip and kept in a library on
+disk. A video is then assembled by the concat demuxer of ffmpeg, which shows each clip
+for the duration of its segment and copies the encoded frames as they are: once the
+clips are in the library, a video of any length is produced without encoding.
+
+The clips are keyed by a hash of the frame pixels, the frame rate and the encoder
+settings, so a clip is reused by any video showing the same frame.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Optional
+import numpy as np
+from numpy.typing import NDArray
+from PIL import Image
+from depthviz.cache_dir import default_cache_dir
+from depthviz.video.encoder import FFmpegPipeEncoder
+from depthviz.video.timeline import TextTimelineClip
+
+
+class SegmentLibraryError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class SegmentLibrary:
+    """A library of pre-encoded single frame clips, shared across runs.
+
+    Attributes:
+        encoder: The encoder of the clips (codec, preset, quality...).
+        cache_dir: The directory of the clips.
+        hits: The number of clips found in the library.
+        misses: The number of clips encoded and added to the library.
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[FFmpegPipeEncoder] = None,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        """Initializes the SegmentLibrary object and creates its directory.
+
+        Args:
+            encoder: The encoder of the clips (None: a default `FFmpegPipeEncoder`).
+            cache_dir: The cache directory (None: `default_cache_dir()`). The clips are
+                stored in its `segments` subdirectory.
+
+        Raises:
+            SegmentLibraryError: If the directory cannot be created.
+        """
+        self.encoder = encoder if encoder is not None else FFmpegPipeEncoder()
+        base_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.cache_dir = os.path.join(base_dir, "segments")
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            raise SegmentLibraryError(
+                f"Cannot create the segment library directory: {self.cache_dir}"
+            ) from e
+
+    def __key(self, frame: NDArray[np.uint8], fps: int) -> str:
+        """Hashes a frame with the frame rate and the encoder settings."""
+        digest = hashlib.sha256(np.ascontiguousarray(frame).data)
+        digest.update(
+            repr(
+                (
+                    frame.shape,
+                    fps,
+                    self.encoder.codec,
+                    self.encoder.preset,
+                    self.encoder.crf,
+                    self.encoder.pix_fmt,
+                    self.encoder.tune,
+                )
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def segment(self, frame: NDArray[np.uint8], fps: int) -> str:
+        """Returns the clip of a frame, encoding it if it is not in the library yet.
+
+        Args:
+            frame: The frame (H x W x 3, uint8).
+            fps: The frame rate of the videos using the clip.
+
+        Returns:
+            The path of the clip.
+
+        Raises:
+            VideoEncoderError: If ffmpeg fails to encode the clip.
+        """
+        path = os.path.join(self.cache_dir, f"{self.__key(frame, fps)}.mp4")
+        if os.path.isfile(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        # Encode in a temporary directory, then move the clip into place
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as temp_dir:
+            still_path = os.path.join(temp_dir, "still.ppm")
+            clip_path = os.path.join(temp_dir, "segment.mp4")
+            Image.fromarray(frame).save(still_path)
+            self.encoder.run_ffmpeg(
+                [
+                    "-framerate",
+                    str(fps),
+                    "-i",
+                    still_path,
+                    "-frames:v",
+                    "1",
+                    *self.encoder.output_args(clip_path),
+                ]
+            )
+            os.replace(clip_path, path)
+        return path
+
+    def assemble(self, video: TextTimelineClip, path: str, fps: int) -> None:
+        """Assembles a timeline clip from the clips of its frames (stream copy).
+
+        The frames shown are the same as in the constant frame rate video: each run of
+        frames showing the same text on the frame grid is the clip of its frame, shown
+        for the duration of the run.
+
+        Args:
+            video: The timeline clip.
+            path: The output video path.
+            fps: The frame rate of the frame grid.
+
+        Raises:
+            VideoEncoderError: If ffmpeg fails to encode a clip or to assemble the video.
+        """
+        segment_paths: dict[int, str] = {}
+        entries = []
+        for text_idx, start, end in self.encoder.frame_runs(video, fps):
+            if text_idx not in segment_paths:
+                segment_paths[text_idx] = self.segment(
+                    video.get_frame(start / fps), fps
+                )
+            entries.append((segment_paths[text_idx], end - start))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            list_path = os.path.join(temp_dir, "segments.ffconcat")
+            self.encoder.write_concat_list(list_path, entries, fps)
+            self.encoder.run_ffmpeg(
+                ["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", path]
+            )
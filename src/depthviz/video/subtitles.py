@@ -0,0 +1,265 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to export the overlay texts as subtitles (SRT, ASS or WebVTT).
+
+The subtitles are built from the same text list as the overlay videos, so the texts
+and their timing are the same as in the video, without rendering any frame.
+The supported file extensions are listed in `depthviz.video.defaults.SUBTITLE_FORMATS`.
+"""
+
+import os.path
+from typing import Union
+from PIL import ImageColor, ImageFont
+from depthviz.video.defaults import SUBTITLE_FORMATS
+
+
+class SubtitleExporterError(Exception):
+    """Base class for exceptions in this module."""
+
+
+class SubtitleExporter:
+    """Class to export a text list as subtitles.
+
+    Attributes:
+        font: The font file path.
+        font_size: The font size in pixels (em size, as used for the video).
+        color: The text color.
+        stroke_color: The stroke color.
+        stroke_width: The stroke width in pixels.
+        bg_color: The background color.
+        size: The video size (width, height), used as the ASS script resolution.
+    """
+
+    def __init__(
+        self,
+        font: str,
+        font_size: int,
+        color: str,
+        stroke_color: str,
+        stroke_width: int,
+        bg_color: str,
+        size: tuple[int, int],
+    ) -> None:
+        """Initializes the SubtitleExporter object.
+
+        Args:
+            font: The font file path.
+            font_size: The font size in pixels.
+            color: The text color.
+            stroke_color: The stroke color.
+            stroke_width: The stroke width in pixels.
+            bg_color: The background color.
+            size: The video size (width, height).
+        """
+        self.font = font
+        self.font_size = font_size
+        self.color = color
+        self.stroke_color = stroke_color
+        self.stroke_width = stroke_width
+        self.bg_color = bg_color
+        self.size = size
+
+    @staticmethod
+    def is_subtitle_path(path: str) -> bool:
+        """Checks if a path has a subtitle file extension.
+
+        Args:
+            path: The file path.
+
+        Returns:
+            True if the path ends with .srt, .ass or .vtt.
+        """
+        return os.path.splitext(path)[1].lower() in SUBTITLE_FORMATS
+
+    @staticmethod
+    def __segment_times(
+        text_list: list[dict[str, Union[str, float]]],
+    ) -> list[tuple[str, float, float]]:
+        """Returns the text, start and end time of each segment in seconds.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration (and
+                optionally the start time) of each segment.
+
+        Returns:
+            A list of (text, start, end) tuples.
+        """
+        segments = []
+        elapsed = 0.0
+        has_starts = all("start" in item for item in text_list)
+        for item in text_list:
+            start = float(item["start"]) if has_starts else elapsed
+            end = start + float(item["duration"])
+            segments.append((str(item["text"]), start, end))
+            elapsed = end
+        return segments
+
+    @staticmethod
+    def __format_time(
+        seconds: float, separator: str, digits: int = 3, hour_digits: int = 2
+    ) -> str:
+        """Formats a time as HH:MM:SS with a fraction of a second.
+
+        Args:
+            seconds: The time in seconds.
+            separator: The separator between the seconds and the fraction.
+            digits: The number of digits of the fraction.
+            hour_digits: The minimum number of digits of the hours (zero padded).
+
+        Returns:
+            The formatted time.
+        """
+        units = round(seconds * 10**digits)
+        fraction = units % 10**digits
+        total_seconds = units // 10**digits
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, secs = divmod(remainder, 60)
+        return (
+            f"{hours:0{hour_digits}d}:{minutes:02d}:{secs:02d}"
+            f"{separator}{fraction:0{digits}d}"
+        )
+
+    def __ass_color(self, color: str) -> str:
+        """Converts a color name or hexadecimal string to an ASS color (&HAABBGGRR).
+
+        Args:
+            color: The color name or hexadecimal string.
+
+        Returns:
+            The ASS color.
+
+        Raises:
+            SubtitleExporterError: If the color is invalid.
+        """
+        try:
+            rgb = ImageColor.getrgb(color)
+        except ValueError as e:
+            raise SubtitleExporterError(f"Invalid color: {color}") from e
+        return f"&H00{rgb[2]:02X}{rgb[1]:02X}{rgb[0]:02X}"
+
+    def to_srt(self, text_list: list[dict[str, Union[str, float]]]) -> str:
+        """Creates SubRip (SRT) subtitles.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment.
+
+        Returns:
+            The SRT subtitles.
+        """
+        cues = []
+        for i, (text, start, end) in enumerate(self.__segment_times(text_list)):
+            cues.append(
+                f"{i + 1}\n"
+                f"{self.__format_time(start, ',')} --> {self.__format_time(end, ',')}\n"
+                f"{text}\n"
+            )
+        return "\n".join(cues)
+
+    def to_vtt(self, text_list: list[dict[str, Union[str, float]]]) -> str:
+        """Creates WebVTT subtitles.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment.
+
+        Returns:
+            The WebVTT subtitles.
+        """
+        cues = ["WEBVTT\n"]
+        for text, start, end in self.__segment_times(text_list):
+            cues.append(
+                f"{self.__format_time(start, '.')} --> {self.__format_time(end, '.')}\n"
+                f"{text}\n"
+            )
+        return "\n".join(cues)
+
+    def to_ass(self, text_list: list[dict[str, Union[str, float]]]) -> str:
+        """Creates Advanced SubStation Alpha (ASS) subtitles with the video style.
+
+        The text is centered in a script of the video size, with the font, colors and
+        stroke of the video. The background color is used as the back color of the
+        style (the subtitles themselves have no background).
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment.
+
+        Returns:
+            The ASS subtitles.
+
+        Raises:
+            SubtitleExporterError: If the font file cannot be loaded.
+            SubtitleExporterError: If one of the colors is invalid.
+        """
+        try:
+            font = ImageFont.truetype(self.font, self.font_size)
+        except (OSError, ValueError) as e:
+            raise SubtitleExporterError(f"Error loading font file: {self.font}") from e
+        font_name, font_style = font.getname()
+        # ASS font sizes are line heights (ascent + descent), not em sizes
+        ascent, descent = font.getmetrics()
+        bold = -1 if font_style and "Bold" in font_style else 0
+        italic = -1 if font_style and "Italic" in font_style else 0
+        width, height = self.size
+
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, "
+            "ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+            "MarginL, MarginR, MarginV, Encoding",
+            f"Style: Default,{font_name},{ascent + descent},"
+            f"{self.__ass_color(self.color)},{self.__ass_color(self.color)},"
+            f"{self.__ass_color(self.stroke_color)},{self.__ass_color(self.bg_color)},"
+            f"{bold},{italic},0,0,100,100,0,0,1,{self.stroke_width},0,5,0,0,0,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, "
+            "Effect, Text",
+        ]
+        for text, start, end in self.__segment_times(text_list):
+            # ASS times are in centiseconds (H:MM:SS.cc)
+            ass_start = self.__format_time(start, ".", digits=2, hour_digits=1)
+            ass_end = self.__format_time(end, ".", digits=2, hour_digits=1)
+            lines.append(f"Dialogue: 0,{ass_start},{ass_end},Default,,0,0,0,,{text}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, text_list: list[dict[str, Union[str, float]]], path: str) -> None:
+        """Saves the subtitles to a file, the format is chosen by the file extension.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment.
+            path: The subtitle file path (.srt, .ass or .vtt).
+
+        Raises:
+            FileNotFoundError: If the parent directory does not exist.
+            SubtitleExporterError: If the file extension is not supported.
+        """
+        parent_dir = os.path.dirname(path)
+        if parent_dir and not os.path.isdir(parent_dir):
+            raise FileNotFoundError(f"Parent directory does not exist: {parent_dir}")
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".srt":
+            content = self.to_srt(text_list)
+        elif extension == ".ass":
+            content = self.to_ass(text_list)
+        elif extension == ".vtt":
+            content = self.to_vtt(text_list)
+        else:
+            raise SubtitleExporterError(
+                "Invalid file format: The file format must be one of "
+                f"{', '.join(SUBTITLE_FORMATS)}"
+            )
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
@@ -5,7 +5,7 @@
 """Module to create a timer video."""
 
 import math
-from typing import Union
+from typing import Optional, Union
 from moviepy import VideoClip
 from depthviz.video.video_creator import (
     OverlayVideoCreator,
@@ -15,6 +15,9 @@ from depthviz.video.video_creator import (
     DEFAULT_STROKE_WIDTH,
     DEFAULT_VIDEO_SIZE,
 )
+from depthviz.video.encoder import FFmpegPipeEncoder
+from depthviz.video.frame_cache import DiskFrameCache, FrameCache
+from depthviz.video.segment_library import SegmentLibrary
 
 
 class TimeReportVideoCreatorError(OverlayVideoCreatorError):
@@ -30,6 +33,13 @@ class TimeReportVideoCreator(OverlayVideoCreator):
         bg_color: str = DEFAULT_BG_COLOR,
         stroke_width: int = DEFAULT_STROKE_WIDTH,
         size: tuple[int, int] = DEFAULT_VIDEO_SIZE,
+        renderer: str = "atlas",
+        composition: str = "concatenate",
+        encoder: Optional[FFmpegPipeEncoder] = None,
+        jobs: int = 1,
+        frame_cache: Optional[FrameCache] = None,
+        disk_cache: Optional[DiskFrameCache] = None,
+        segment_library: Optional[SegmentLibrary] = None,
     ):
         """Initializes the TimeReportVideoCreator object.
 
@@ -38,6 +48,14 @@ class TimeReportVideoCreator(OverlayVideoCreator):
             bg_color: The background color in hexadecimal format or color name.
             stroke_width: The stroke width.
             size: The video size.
+            renderer: The text renderer (`atlas`, `textclip` or `libass`).
+            composition: How the texts are put together (`concatenate` or `timeline`).
+            encoder: The encoder used to save the video (None: moviepy).
+            jobs: The number of processes used to render and encode the video.
+            frame_cache: The cache of the rendered frames (None: a new cache).
+            disk_cache: The persistent cache of the rendered frames (None: disabled).
+            segment_library: The library of pre-encoded clips to assemble the video
+                from (None: the video is encoded).
         """
         super().__init__(
             font=font,
@@ -45,6 +63,13 @@ class TimeReportVideoCreator(OverlayVideoCreator):
             stroke_width=stroke_width,
             size=size,
             fps=4,  # Set the frame rate to 4 fps
+            renderer=renderer,
+            composition=composition,
+            encoder=encoder,
+            jobs=jobs,
+            frame_cache=frame_cache,
+            disk_cache=disk_cache,
+            segment_library=segment_library,
         )
 
     def _convert_time_to_text(self, time: float) -> str:
@@ -60,17 +85,21 @@ class TimeReportVideoCreator(OverlayVideoCreator):
         seconds = int(time % 60)
         return f"{minutes:02d}:{seconds:02d}"
 
-    def render_time_report_video(
-        self,
-        time_data: list[float],
-    ) -> VideoClip:
-        """Creates a video that reports the depth in meters from an array input.
+    def create_time_text_list(
+        self, time_data: list[float]
+    ) -> list[dict[str, Union[str, float]]]:
+        """Creates the texts of the time report video, one per displayed second.
 
         Args:
             time_data: An array of time values in seconds.
 
         Returns:
-            The processed video.
+            A list of dictionaries containing the text, start time and duration of each
+            second.
+
+        Raises:
+            TimeReportVideoCreatorError: If the time data is empty.
+            TimeReportVideoCreatorError: If the time data contains negative values.
         """
         # Check the time data is not empty
         if not time_data:
@@ -80,15 +109,33 @@ class TimeReportVideoCreator(OverlayVideoCreator):
         if any(time < 0 for time in time_data):
             raise TimeReportVideoCreatorError("The time data contains negative values.")
 
-        # Create a list of time frames
+        # Create a list of time frames, one per displayed second
         time_frame_list: list[dict[str, Union[str, float]]] = []
         start = 0
         end = math.ceil(time_data[-1] - time_data[0])
         for time in range(start, end + 1):
-            for _ in range(self.fps):
-                time_frame_list.append(
-                    {"text": self._convert_time_to_text(time), "duration": 1 / self.fps}
-                )
+            time_frame_list.append(
+                {
+                    "text": self._convert_time_to_text(time),
+                    "start": float(time),
+                    "duration": 1.0,
+                }
+            )
+        return time_frame_list
+
+    def render_time_report_video(
+        self,
+        time_data: list[float],
+    ) -> VideoClip:
+        """Creates a video that reports the depth in meters from an array input.
+
+        Args:
+            time_data: An array of time values in seconds.
+
+        Returns:
+            The processed video.
+        """
+        time_frame_list = self.create_time_text_list(time_data)
         full_video = super().render_text_video(time_frame_list)
         return full_video
 
@@ -118,3 +165,17 @@ class TimeReportVideoCreator(OverlayVideoCreator):
         # Add a suffix `_time` to the file name
         path = self.to_time_output_path(path)
         super().save(video=video, path=path, progress_bar_desc=progress_bar_desc)
+
+    def save_subtitles(
+        self, text_list: list[dict[str, Union[str, float]]], path: str
+    ) -> None:
+        """Save the texts as subtitles.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment.
+            path: The path to save the subtitles to.
+        """
+        # Add a suffix `_time` to the file name
+        path = self.to_time_output_path(path)
+        super().save_subtitles(text_list=text_list, path=path)
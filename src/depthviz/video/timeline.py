@@ -0,0 +1,123 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Module to create a single clip from a timeline of texts.
+
+Instead of concatenating one clip per text (moviepy walks every clip boundary for
+each frame and keeps every sub-clip alive), the timeline clip keeps a sorted array
+of segment start times and finds the active segment of a frame with a binary search.
+"""
+
+import threading
+from bisect import bisect_right
+from typing import Callable, Union
+import numpy as np
+from numpy.typing import NDArray
+from moviepy import VideoClip
+
+
+class TextTimelineClip(VideoClip):  # type: ignore
+    """A clip showing a sequence of static texts.
+
+    The frames can be rendered by several threads (e.g., the rasterizer threads of the
+    encoder): every thread keeps the frame of its own current text, so a thread never
+    returns a frame another thread is rendering or reusing.
+
+    Attributes:
+        texts: The distinct texts of the timeline.
+        text_index: The index in `texts` of the text of each segment.
+        starts: The start time of each segment in seconds (sorted).
+        durations: The duration of each segment in seconds.
+    """
+
+    def __init__(
+        self,
+        text_list: list[dict[str, Union[str, float]]],
+        render_frame: Callable[[str], NDArray[np.uint8]],
+    ) -> None:
+        """Initializes the TextTimelineClip object.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration of each
+                segment. When the dictionaries also have a `start` time, it is used
+                as the start of the segment (e.g., exact frame boundaries).
+            render_frame: A function that renders the frame of a text.
+        """
+        self.texts: list[str] = []
+        indexes: dict[str, int] = {}
+        text_index = []
+        for item in text_list:
+            text = str(item["text"])
+            if text not in indexes:
+                indexes[text] = len(self.texts)
+                self.texts.append(text)
+            text_index.append(indexes[text])
+        self.text_index: NDArray[np.int32] = np.array(text_index, dtype=np.int32)
+        self.durations: NDArray[np.float64] = np.array(
+            [float(item["duration"]) for item in text_list], dtype=np.float64
+        )
+        # Same timings as moviepy's concatenate_videoclips
+        timings = np.cumsum(np.concatenate(([0.0], self.durations)))
+        self.starts: NDArray[np.float64] = timings[:-1]
+        if text_list and all("start" in item for item in text_list):
+            self.starts = np.array(
+                [float(item["start"]) for item in text_list], dtype=np.float64
+            )
+            timings[-1] = self.starts[-1] + self.durations[-1]
+        self.__start_list: list[float] = self.starts.tolist()
+        self.__render_frame = render_frame
+        # The current text index and frame of each thread
+        self.__current = threading.local()
+        super().__init__(frame_function=self.__frame_at, duration=float(timings[-1]))
+
+    def segment_at(self, t: float) -> int:
+        """Returns the index of the segment shown at a given time.
+
+        Args:
+            t: The time in seconds.
+
+        Returns:
+            The index of the segment (the last one that starts at or before `t`).
+        """
+        return max(bisect_right(self.__start_list, t) - 1, 0)
+
+    def text_at(self, t: float) -> str:
+        """Returns the text shown at a given time.
+
+        Args:
+            t: The time in seconds.
+
+        Returns:
+            The text shown at `t`.
+        """
+        return self.texts[int(self.text_index[self.segment_at(t)])]
+
+    def __frame_at(self, t: float) -> NDArray[np.uint8]:
+        """Returns the frame shown at a given time.
+
+        The frame of the current text is cached until the text changes (per thread).
+
+        Args:
+            t: The time in seconds.
+
+        Returns:
+            The frame shown at `t`.
+        """
+        text_idx = int(self.text_index[self.segment_at(t)])
+        current = self.__current
+        if getattr(current, "text_idx", -1) != text_idx:
+            current.frame = self.__render_frame(self.texts[text_idx])
+            current.text_idx = text_idx
+        frame: NDArray[np.uint8] = current.frame
+        return frame
+
+    @property
+    def text_list(self) -> list[dict[str, Union[str, float]]]:
+        """The segments of the timeline as a list of text, start and duration."""
+        return [
+            {"text": self.texts[text_idx], "start": start, "duration": duration}
+            for text_idx, start, duration in zip(
+                self.text_index.tolist(), self.__start_list, self.durations.tolist()
+            )
+        ]
@@ -5,20 +5,34 @@
 """Generic video creator module to create a video from an array input."""
 
 import os.path
-from typing import Tuple, cast, Union
+import tempfile
+import threading
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, Tuple, cast, Union
 from moviepy import TextClip, VideoClip, concatenate_videoclips
+import numpy as np
+from numpy.typing import NDArray
+from PIL import ImageColor, ImageFont
 from tqdm import tqdm
 from depthviz.video.logger import DepthVizProgessBarLogger
+from depthviz.video.glyph_atlas import GlyphAtlas, GlyphAtlasError
+from depthviz.video.timeline import TextTimelineClip
+from depthviz.video.encoder import FFmpegPipeEncoder, VideoEncoderError
+from depthviz.video.frame_cache import DiskFrameCache, FrameCache, FrameCacheError
+from depthviz.video.segment_library import SegmentLibrary
+from depthviz.video.subtitles import SubtitleExporter, SubtitleExporterError
 
-# Default values
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DEFAULT_FONT = os.path.abspath(
-    os.path.join(BASE_DIR, "../assets/fonts/Open_Sans/static/OpenSans-Bold.ttf")
+# The default values are re-exported for the modules which import them from here
+from depthviz.video.defaults import (
+    DEFAULT_FONT as DEFAULT_FONT,
+    DEFAULT_VIDEO_SIZE as DEFAULT_VIDEO_SIZE,
+    DEFAULT_VIDEO_SIZE_FOR_TESTING,
+    DEFAULT_BG_COLOR as DEFAULT_BG_COLOR,
+    DEFAULT_STROKE_WIDTH as DEFAULT_STROKE_WIDTH,
 )
-DEFAULT_VIDEO_SIZE = (960, 540)
-DEFAULT_VIDEO_SIZE_FOR_TESTING = (640, 360)
-DEFAULT_BG_COLOR = "black"
-DEFAULT_STROKE_WIDTH = 5
+
+RENDERERS = ("atlas", "textclip", "libass")
+COMPOSITIONS = ("concatenate", "timeline")
 
 
 class OverlayVideoCreatorError(Exception):
@@ -33,6 +47,31 @@ class VideoFormatError(OverlayVideoCreatorError):
     """Exception raised for invalid video format errors."""
 
 
+class GlyphTextClip(VideoClip):  # type: ignore
+    """A clip showing a static text, composed from a glyph atlas.
+
+    Attributes:
+        text: The text shown in the clip.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        render_frame: Callable[[str], NDArray[np.uint8]],
+        duration: float,
+    ) -> None:
+        """Initializes the GlyphTextClip object.
+
+        Args:
+            text: The text to show.
+            render_frame: A function that renders the frame of a text (e.g., from the
+                glyph atlas, through the frame cache).
+            duration: The duration of the clip in seconds.
+        """
+        super().__init__(frame_function=lambda _: render_frame(text), duration=duration)
+        self.text = text
+
+
 class OverlayVideoCreator:
     """Generic class to create an overlay video from an array input."""
 
@@ -48,6 +87,13 @@ class OverlayVideoCreator:
         size: Tuple[int, int] = DEFAULT_VIDEO_SIZE_FOR_TESTING,
         bitrate: str = "5000k",
         fps: int = 25,
+        renderer: str = "atlas",
+        composition: str = "concatenate",
+        encoder: Optional[FFmpegPipeEncoder] = None,
+        jobs: int = 1,
+        frame_cache: Optional[FrameCache] = None,
+        disk_cache: Optional[DiskFrameCache] = None,
+        segment_library: Optional[SegmentLibrary] = None,
     ):
         """Initializes the video creator.
 
@@ -62,11 +108,41 @@ class OverlayVideoCreator:
             size: The video size.
             bitrate: The video bitrate.
             fps: The video frame rate.
+            renderer: The text renderer, `atlas` composes the frames from glyphs
+                rasterized once, `textclip` rasterizes every clip with moviepy's TextClip,
+                `libass` saves a timeline video by rendering its texts as ASS subtitles
+                with ffmpeg's libass filter in the encoding pass (the frames of the clip
+                itself are composed like `atlas`).
+            composition: How the texts are put together, `concatenate` concatenates one
+                clip per text, `timeline` creates a single clip which looks up the text
+                of each frame in a sorted index of the start times.
+            encoder: The encoder used to save the video, frames are piped straight into
+                ffmpeg. If None, the video is saved with moviepy's `write_videofile`.
+                With a variable frame rate encoder, a timeline video is saved with
+                only the frames where the text changes.
+            jobs: The number of processes used to render and encode a timeline video.
+                With more than one job, the video is split into chunks at keyframe
+                boundaries which are encoded in parallel (with the encoder, or a
+                default `FFmpegPipeEncoder`) and joined without re-encoding.
+            frame_cache: The cache of the rendered frames, keyed by the text and the
+                video style, so each distinct text is rasterized once (None: a new cache
+                with the default memory cap). A cache can be shared by several video
+                creators.
+            disk_cache: The persistent cache of the rendered frames, shared across runs
+                and keyed by a hash of the font file and the video style. The frames
+                missing from the frame cache are read from it before being rasterized
+                (None: no persistent cache).
+            segment_library: The library of pre-encoded clips of each frame. If set, a
+                timeline video is saved by assembling the clips of its frames with a
+                stream copy, without encoding the video (None: the video is encoded).
 
         Raises:
             OverlayVideoCreatorError: An error occurred when validating the font file.
             OverlayVideoCreatorError: An error occurred when validating the background color.
             OverlayVideoCreatorError: An error occurred when validating the stroke width.
+            OverlayVideoCreatorError: An error occurred when validating the renderer.
+            OverlayVideoCreatorError: An error occurred when validating the composition.
+            OverlayVideoCreatorError: An error occurred when validating the number of jobs.
         """
         self.font = font
         self.fontsize = int(
@@ -81,6 +157,43 @@ class OverlayVideoCreator:
         self.size = size
         self.bitrate = bitrate
         self.fps = fps
+        self.renderer = renderer
+        self.composition = composition
+        self.encoder = encoder
+        self.jobs = jobs
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        self.disk_cache = disk_cache
+        self.segment_library = segment_library
+        self.__disk_style_digest: Optional[str] = None
+        # Everything a rendered frame depends on, except the text
+        self.__style_key = (
+            renderer,
+            font,
+            self.fontsize,
+            interline,
+            color,
+            stroke_color,
+            stroke_width,
+            bg_color,
+            align,
+            size,
+        )
+        # The arguments to create the same text frames in another process
+        self.__style: dict[str, Any] = {
+            "font": font,
+            "interline": interline,
+            "color": color,
+            "bg_color": bg_color,
+            "stroke_color": stroke_color,
+            "stroke_width": stroke_width,
+            "align": align,
+            "size": size,
+            "fps": fps,
+            "renderer": renderer,
+            "disk_cache": disk_cache,
+        }
+        # One atlas per thread, the atlas composes the frames in its own buffer
+        self.__atlases = threading.local()
         self.progress_bar_logger_config = {
             "unit": "f",
             "color": "#23aae1",
@@ -96,6 +209,170 @@ class OverlayVideoCreator:
             raise OverlayVideoCreatorError(
                 "Invalid stroke width; must be a positive number."
             )
+        # Validate the renderer
+        if renderer not in RENDERERS:
+            raise OverlayVideoCreatorError(
+                f"Invalid renderer: {renderer}; must be one of {', '.join(RENDERERS)}."
+            )
+        # Validate the composition
+        if composition not in COMPOSITIONS:
+            raise OverlayVideoCreatorError(
+                f"Invalid composition: {composition}; "
+                f"must be one of {', '.join(COMPOSITIONS)}."
+            )
+        # Validate the number of jobs
+        if not isinstance(jobs, int) or jobs < 1:
+            raise OverlayVideoCreatorError(
+                "Invalid number of jobs; must be a positive number."
+            )
+
+    def get_glyph_atlas(self) -> GlyphAtlas:
+        """Returns the glyph atlas of the video style, creating it on first use.
+
+        Every thread gets its own atlas, so the frames can be rendered by several
+        threads (e.g., the rasterizer threads of the encoder).
+
+        Returns:
+            The glyph atlas.
+
+        Raises:
+            OverlayVideoCreatorError: An error occurred when rasterizing the glyphs.
+        """
+        atlas: Optional[GlyphAtlas] = getattr(self.__atlases, "atlas", None)
+        if atlas is None:
+            try:
+                atlas = GlyphAtlas(
+                    font=self.font,
+                    font_size=self.fontsize,
+                    color=self.color,
+                    stroke_color=self.stroke_color,
+                    stroke_width=self.stroke_width,
+                    bg_color=self.bg_color,
+                    size=self.size,
+                )
+            except GlyphAtlasError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            self.__atlases.atlas = atlas
+        return atlas
+
+    def create_subtitle_exporter(self) -> SubtitleExporter:
+        """Creates a subtitle exporter with the video style.
+
+        Returns:
+            The subtitle exporter.
+        """
+        return SubtitleExporter(
+            font=self.font,
+            font_size=self.fontsize,
+            color=self.color,
+            stroke_color=self.stroke_color,
+            stroke_width=self.stroke_width,
+            bg_color=self.bg_color,
+            size=self.size,
+        )
+
+    def create_text_clip(self, text: str, duration: float) -> VideoClip:
+        """Creates a clip showing a static text with the video style.
+
+        Args:
+            text: The text to show.
+            duration: The duration of the clip in seconds.
+
+        Returns:
+            The text clip.
+        """
+        if self.renderer in ("atlas", "libass"):
+            return GlyphTextClip(
+                text=text, render_frame=self.render_text_frame, duration=duration
+            )
+        return TextClip(
+            text=text,
+            font=self.font,
+            font_size=self.fontsize,
+            interline=self.interline,
+            color=self.color,
+            bg_color=self.bg_color,
+            stroke_color=self.stroke_color,
+            stroke_width=self.stroke_width,
+            text_align=self.align,
+            size=self.size,
+            duration=duration,
+        )
+
+    def render_text_frame(self, text: str) -> NDArray[np.uint8]:
+        """Renders the frame of a static text with the video style.
+
+        Args:
+            text: The text to render.
+
+        Returns:
+            The frame (H x W x 3, uint8). The frame is read-only when it comes from the
+            frame cache. When the cache is disabled, with the `atlas` renderer, this is
+            the reusable buffer of the atlas of the thread, which is only valid until
+            the thread renders its next frame.
+        """
+        if self.frame_cache.max_bytes == 0 and self.disk_cache is None:
+            return self.__rasterize_text_frame(text, copy=False)
+        return self.frame_cache.get_or_render(
+            (text, *self.__style_key), lambda: self.__load_text_frame(text)
+        )
+
+    def __load_text_frame(self, text: str) -> NDArray[np.uint8]:
+        """Reads the frame of a text from the disk cache, or rasterizes and stores it.
+
+        Args:
+            text: The text to render.
+
+        Returns:
+            A new frame (H x W x 3, uint8).
+
+        Raises:
+            OverlayVideoCreatorError: An error occurred when hashing the font file.
+        """
+        if self.disk_cache is None:
+            return self.__rasterize_text_frame(text, copy=True)
+        if self.__disk_style_digest is None:
+            try:
+                self.__disk_style_digest = self.disk_cache.style_digest(
+                    font=self.font,
+                    # Every style parameter except the font path (hashed by content)
+                    style=(self.__style_key[0], *self.__style_key[2:]),
+                )
+            except FrameCacheError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+        frame = self.disk_cache.get(self.__disk_style_digest, text)
+        if frame is None:
+            frame = self.__rasterize_text_frame(text, copy=True)
+            self.disk_cache.put(self.__disk_style_digest, text, frame)
+        return frame
+
+    def __rasterize_text_frame(self, text: str, copy: bool) -> NDArray[np.uint8]:
+        """Rasterizes the frame of a static text with the video style.
+
+        Args:
+            text: The text to render.
+            copy: Return a new array instead of the reusable buffer of the atlas.
+
+        Returns:
+            The frame (H x W x 3, uint8).
+        """
+        if self.renderer in ("atlas", "libass"):
+            atlas = self.get_glyph_atlas()
+            return atlas.render_copy(text) if copy else atlas.render(text)
+        frame: NDArray[np.uint8] = TextClip(
+            text=text,
+            font=self.font,
+            font_size=self.fontsize,
+            interline=self.interline,
+            color=self.color,
+            bg_color=self.bg_color,
+            stroke_color=self.stroke_color,
+            stroke_width=self.stroke_width,
+            text_align=self.align,
+            size=self.size,
+            duration=1,
+        ).get_frame(0)
+        return frame
 
     def render_text_video(
         self,
@@ -115,6 +392,12 @@ class OverlayVideoCreator:
             VideoNotRenderError: An error occurred when the video is not rendered yet.
             VideoFormatError: An error occurred when the file format is invalid.
         """
+        if self.composition == "timeline":
+            # A single clip, the frames are rendered on demand
+            return TextTimelineClip(
+                text_list=text_list, render_frame=self.render_text_frame
+            )
+
         # Create a text clip for each text value and track the progress with a progress bar
         clips = []
         clip_count = len(text_list)
@@ -127,24 +410,17 @@ class OverlayVideoCreator:
             bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} ({remaining} remaining)",
             leave=False,
         ):
-
-            clip = TextClip(
-                text=text_list[i]["text"],
-                font=self.font,
-                font_size=self.fontsize,
-                interline=self.interline,
-                color=self.color,
-                bg_color=self.bg_color,
-                stroke_color=self.stroke_color,
-                stroke_width=self.stroke_width,
-                text_align=self.align,
-                size=self.size,
-                duration=text_list[i]["duration"],
+            clip = self.create_text_clip(
+                text=str(text_list[i]["text"]),
+                duration=float(text_list[i]["duration"]),
             )
             clips.append(clip)
 
         # Concatenate all the clips into a single video
         full_video = concatenate_videoclips(clips)
+        # moviepy only keeps the sub-clips when they have a mask (TextClip),
+        # keep them for the atlas clips as well
+        full_video.clips = clips
         return full_video
 
     def save(
@@ -161,6 +437,7 @@ class OverlayVideoCreator:
             FileNotFoundError: An error occurred when the parent directory does not exist.
             VideoNotRenderError: An error occurred when the video is not rendered yet.
             VideoFormatError: An error occurred when the file format is invalid.
+            OverlayVideoCreatorError: An error occurred when encoding the video.
         """
         parent_dir = os.path.dirname(path)
         if parent_dir == "":
@@ -176,17 +453,15 @@ class OverlayVideoCreator:
                     raise VideoFormatError(
                         "Invalid file format: The file format must be .mp4"
                     )
-                video.write_videofile(
-                    path,
-                    fps=self.fps,
-                    bitrate=self.bitrate,
-                    logger=DepthVizProgessBarLogger(
-                        description=progress_bar_desc,
-                        unit=cast(str, self.progress_bar_logger_config["unit"]),
-                        color=cast(str, self.progress_bar_logger_config["color"]),
-                        ncols=cast(int, self.progress_bar_logger_config["ncols"]),
-                    ),
-                )
+                # The video is written next to the output and renamed into place, so an
+                # existing output is never overwritten in place and a failed encoding
+                # leaves no partial output
+                with tempfile.TemporaryDirectory(
+                    prefix=".depthviz-", dir=parent_dir
+                ) as temp_dir:
+                    temp_path = os.path.join(temp_dir, os.path.basename(path))
+                    self.__write_video(video, temp_path, progress_bar_desc)
+                    os.replace(temp_path, path)
             else:
                 raise VideoNotRenderError(
                     "Cannot save video because it has not been rendered yet."
@@ -194,6 +469,112 @@ class OverlayVideoCreator:
         else:
             raise FileNotFoundError(f"Parent directory does not exist: {parent_dir}")
 
+    def __write_video(
+        self, video: VideoClip, path: str, progress_bar_desc: str
+    ) -> None:
+        """Encodes the video to a file with the renderer and encoder of the creator.
+
+        Args:
+            video: The video to save.
+            path: The path to write the video to.
+            progress_bar_desc: The description for the progress bar.
+
+        Raises:
+            OverlayVideoCreatorError: An error occurred when encoding the video.
+        """
+        if self.renderer == "libass" and isinstance(video, TextTimelineClip):
+            # The texts are rendered by libass in the encoding pass
+            try:
+                (self.encoder or FFmpegPipeEncoder()).burn_subtitles(
+                    script=self.create_subtitle_exporter().to_ass(video.text_list),
+                    font=self.font,
+                    path=path,
+                    size=self.size,
+                    fps=self.fps,
+                    duration=video.duration,
+                    bg_color=self.bg_color,
+                )
+            except (SubtitleExporterError, VideoEncoderError) as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            return
+        if self.segment_library is not None and isinstance(video, TextTimelineClip):
+            # The clips of the frames are joined, nothing is encoded
+            try:
+                self.segment_library.assemble(video=video, path=path, fps=self.fps)
+            except VideoEncoderError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            return
+        if (
+            self.encoder is not None
+            and self.encoder.frame_rate_mode == "variable"
+            and isinstance(video, TextTimelineClip)
+        ):
+            # Only the changed frames are encoded, no need for parallel chunks
+            try:
+                self.encoder.encode_variable(video=video, path=path, fps=self.fps)
+            except VideoEncoderError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            return
+        if self.jobs > 1 and isinstance(video, TextTimelineClip):
+            try:
+                (self.encoder or FFmpegPipeEncoder()).encode_parallel(
+                    video=video,
+                    clip_factory=partial(
+                        _create_timeline_clip, self.__style, video.text_list
+                    ),
+                    path=path,
+                    fps=self.fps,
+                    jobs=self.jobs,
+                    progress_bar_config=self.progress_bar_logger_config,
+                    progress_bar_desc=progress_bar_desc,
+                )
+            except VideoEncoderError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            return
+        if self.encoder is not None:
+            try:
+                self.encoder.encode(
+                    video=video,
+                    path=path,
+                    fps=self.fps,
+                    progress_bar_config=self.progress_bar_logger_config,
+                    progress_bar_desc=progress_bar_desc,
+                )
+            except VideoEncoderError as e:
+                raise OverlayVideoCreatorError(str(e)) from e
+            return
+        video.write_videofile(
+            path,
+            fps=self.fps,
+            bitrate=self.bitrate,
+            logger=DepthVizProgessBarLogger(
+                description=progress_bar_desc,
+                unit=cast(str, self.progress_bar_logger_config["unit"]),
+                color=cast(str, self.progress_bar_logger_config["color"]),
+                ncols=cast(int, self.progress_bar_logger_config["ncols"]),
+            ),
+        )
+
+    def save_subtitles(
+        self, text_list: list[dict[str, Union[str, float]]], path: str
+    ) -> None:
+        """Saves the texts as subtitles with the video style, without rendering frames.
+
+        Args:
+            text_list: A list of dictionaries containing the text and duration (and
+                optionally the start time) of each segment, as given to
+                `render_text_video`.
+            path: The path to save the subtitles (.srt, .ass or .vtt).
+
+        Raises:
+            FileNotFoundError: An error occurred when the parent directory does not exist.
+            OverlayVideoCreatorError: An error occurred when exporting the subtitles.
+        """
+        try:
+            self.create_subtitle_exporter().save(text_list=text_list, path=path)
+        except SubtitleExporterError as e:
+            raise OverlayVideoCreatorError(str(e)) from e
+
     def __font_validate(self) -> None:
         """Validates the font file.
 
@@ -213,13 +594,14 @@ class OverlayVideoCreator:
             )
 
         # Check if the font file is a valid font file
-        try:
-            TextClip(font=self.font, text="Test", font_size=1)
-        except ValueError as e:
+        stat = os.stat(self.font)
+        if not _is_valid_font(
+            os.path.abspath(self.font), stat.st_size, stat.st_mtime_ns
+        ):
             raise OverlayVideoCreatorError(
                 f"Error loading font file: {self.font}, "
                 "make sure it's a valid font file (TrueType or OpenType font)."
-            ) from e
+            )
 
     def __bg_color_validate(self) -> None:
         """Validates the background color.
@@ -228,14 +610,67 @@ class OverlayVideoCreator:
             OverlayVideoCreatorError: An error occurred when the background color is invalid.
         """
         # Check if the background color is a valid color
-        try:
-            TextClip(
-                text="Test",
-                font=self.font,
-                font_size=self.fontsize,
-                bg_color=self.bg_color,
-            )
-        except ValueError as e:
-            raise OverlayVideoCreatorError(
-                f"Invalid background color: {self.bg_color}"
-            ) from e
+        if not _is_valid_color(self.bg_color):
+            raise OverlayVideoCreatorError(f"Invalid background color: {self.bg_color}")
+
+
+@lru_cache(maxsize=None)
+def _is_valid_font(font: str, size: int, mtime_ns: int) -> bool:
+    """Checks if a font file can be loaded (memoized per process).
+
+    Only the font header and tables are read, no text is rendered. The size and the
+    modification time of the file are part of the key, so a font that changes on disk
+    is checked again.
+
+    Args:
+        font: The absolute path of the font file.
+        size: The size of the font file in bytes.
+        mtime_ns: The modification time of the font file in nanoseconds.
+
+    Returns:
+        True if the font file is a valid TrueType or OpenType font, False otherwise.
+    """
+    try:
+        ImageFont.truetype(font, 1)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def _is_valid_color(color: str) -> bool:
+    """Checks if a color name or hexadecimal string is valid (memoized per process).
+
+    Args:
+        color: The color name (e.g., "black") or hexadecimal string (e.g., "#000000").
+
+    Returns:
+        True if the color is in the color table of PIL or a valid hexadecimal string.
+    """
+    try:
+        ImageColor.getrgb(color)
+    except (ValueError, AttributeError):
+        return False
+    return True
+
+
+def _create_timeline_clip(
+    style: dict[str, Any], text_list: list[dict[str, Union[str, float]]]
+) -> TextTimelineClip:
+    """Creates a timeline clip of a text list with a video style.
+
+    This is used to create the clip again in the worker processes of the parallel
+    encoding (the clips and the glyph atlas are not sent between processes).
+
+    Args:
+        style: The arguments of the video creator.
+        text_list: A list of dictionaries containing the text, start and duration of
+            each segment.
+
+    Returns:
+        The timeline clip.
+    """
+    video_creator = OverlayVideoCreator(**style)
+    return TextTimelineClip(
+        text_list=text_list, render_frame=video_creator.render_text_frame
+    )
@@ -0,0 +1,26 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the cache_dir module."""
+
+import os
+import pathlib
+import pytest
+from depthviz.cache_dir import default_cache_dir
+
+
+class TestDefaultCacheDir:
+    """Test the default_cache_dir function."""
+
+    def test_xdg_cache_home(self, isolated_cache_dir: pathlib.Path) -> None:
+        """Test the default cache directory follows XDG_CACHE_HOME."""
+        assert default_cache_dir() == str(isolated_cache_dir / "depthviz")
+
+    def test_home_cache(
+        self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the default cache directory is in ~/.cache without XDG_CACHE_HOME."""
+        monkeypatch.delenv("XDG_CACHE_HOME")
+        monkeypatch.setenv("HOME", str(tmp_path))
+        assert default_cache_dir() == os.path.join(str(tmp_path), ".cache", "depthviz")
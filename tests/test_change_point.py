@@ -0,0 +1,158 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the change_point module."""
+
+import math
+import random
+from typing import Union
+import pytest
+
+from depthviz.optimizer.change_point import ChangePointDepth, ChangePointDepthError
+from depthviz.optimizer.linear_interpolation import LinearInterpolationDepth
+from depthviz.video.depth import DepthReportVideoCreator
+
+
+def _round(depth: float, decimal_places: int) -> Union[int, float]:
+    """Round a depth value the same way as the depth report video."""
+    if decimal_places == 0:
+        return round(depth)
+    return round(depth, decimal_places)
+
+
+def _random_profile(seed: int) -> tuple[list[float], list[float]]:
+    """Create a random dive profile (descent, bottom and ascent) with jittered samples."""
+    rng = random.Random(seed)
+    times = [0.0]
+    depths = [0.0]
+    max_depth = rng.uniform(5, 60)
+    for _ in range(rng.randint(2, 60)):
+        times.append(times[-1] + rng.choice([0.25, 0.5, 1.0, 1.0, 2.0, 3.3]))
+        depths.append(
+            round(min(max(depths[-1] + rng.uniform(-2.5, 3.5), 0.0), max_depth), 2)
+        )
+    return times, depths
+
+
+class TestChangePointDepth:
+    """Test class for the ChangePointDepth class."""
+
+    def _expand(self, segments: list[dict[str, float]], fps: int) -> list[float]:
+        """Expand the segments to the rounded depth of every frame."""
+        frames: list[float] = []
+        for segment in segments:
+            assert math.isclose(segment["start"] * fps, len(frames), abs_tol=1e-6)
+            frames.extend([segment["depth"]] * round(segment["duration"] * fps))
+        return frames
+
+    def _expected(
+        self, times: list[float], depths: list[float], fps: int, decimal_places: int
+    ) -> list[float]:
+        """Interpolate and round the depth of every frame."""
+        interpolated = LinearInterpolationDepth(times=times, depths=depths, fps=fps)
+        return [
+            _round(depth, decimal_places)
+            for depth in interpolated.get_interpolated_depths().tolist()
+        ]
+
+    @pytest.mark.parametrize(
+        "times, depths, fps",
+        [
+            ([0, 2, 5], [10, 20, 40], 1),
+            ([0, 1, 2, 3], [0, 1, 2.5, 1], 4),
+            ([0, 1, 2, 3, 4, 5], [0, -1.5, -2.5, -1.5, -0.5, 0], 25),
+            ([0, 0.5, 1], [0, 0.5, 1], 25),
+            ([0, 1, 2], [0, 1, 1], 30),
+            ([0, 100], [0, 3], 25),
+            ([0, 0.1, 0.2, 0.3, 5], [0, 5, 10, 15, 15], 25),
+            ([0.5, 1.75, 4.25], [1.49, 1.51, 0.5], 60),
+        ],
+    )
+    @pytest.mark.parametrize("decimal_places", [0, 1, 2])
+    def test_segments_match_interpolation(
+        self,
+        times: list[float],
+        depths: list[float],
+        fps: int,
+        decimal_places: int,
+    ) -> None:
+        """Test the segments show the same rounded depth as the interpolation."""
+        change_point = ChangePointDepth(
+            times=times, depths=depths, fps=fps, decimal_places=decimal_places
+        )
+        segments = change_point.get_segments()
+
+        assert self._expand(segments, fps) == self._expected(
+            times, depths, fps, decimal_places
+        )
+        for previous, segment in zip(segments, segments[1:]):
+            assert previous["depth"] != segment["depth"]
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_segments_match_interpolation_random_profile(self, seed: int) -> None:
+        """Test the segments match the interpolation on random dive profiles."""
+        times, depths = _random_profile(seed)
+        for fps in (1, 24, 25, 60):
+            for decimal_places in (0, 1, 2):
+                change_point = ChangePointDepth(
+                    times=times, depths=depths, fps=fps, decimal_places=decimal_places
+                )
+                assert self._expand(change_point.get_segments(), fps) == (
+                    self._expected(times, depths, fps, decimal_places)
+                )
+
+    def test_single_sample(self) -> None:
+        """Test a single sample is shown for `fps` frames of one second."""
+        change_point = ChangePointDepth(
+            times=[0.0], depths=[3.2], fps=25, decimal_places=0
+        )
+
+        assert change_point.get_segments() == [
+            {"depth": 3, "start": 0.0, "duration": 25.0}
+        ]
+
+    @pytest.mark.parametrize(
+        "times, depths, fps, expected_error",
+        [
+            ((0, 1), [0, 1], 25, "Error: Input times and depths must be lists."),
+            (
+                [0, 1],
+                [0],
+                25,
+                "Error: Times and depths lists must have the same length.",
+            ),
+            ([0, 1], [0, 1], 0, "Error: FPS must be positive."),
+        ],
+    )
+    def test_invalid_input(
+        self, times: list[float], depths: list[float], fps: int, expected_error: str
+    ) -> None:
+        """Test the invalid inputs raise the same errors as the interpolation."""
+        with pytest.raises(ChangePointDepthError) as e:
+            ChangePointDepth(times=times, depths=depths, fps=fps, decimal_places=0)
+        assert str(e.value) == expected_error
+
+    @pytest.mark.parametrize("minus_sign", [True, False])
+    @pytest.mark.parametrize("decimal_places", [0, 1, 2])
+    def test_depth_text_list_engines(self, decimal_places: int, minus_sign: bool) -> None:
+        """Test both engines of the depth report video show the same text per frame."""
+        times, depths = _random_profile(42)
+        fps = 25
+        video_creator = DepthReportVideoCreator(fps=fps)
+        frame_texts = {}
+        for engine in ("change-point", "interpolation"):
+            text_list = video_creator.create_depth_text_list(
+                time_data=times,
+                depth_data=depths,
+                decimal_places=decimal_places,
+                minus_sign=minus_sign,
+                engine=engine,
+            )
+            frame_texts[engine] = [
+                str(item["text"])
+                for item in text_list
+                for _ in range(round(float(item["duration"]) * fps))
+            ]
+
+        assert frame_texts["change-point"] == frame_texts["interpolation"]
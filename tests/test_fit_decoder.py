@@ -0,0 +1,320 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the fit_decoder module."""
+
+import math
+import pathlib
+import random
+import struct
+import pytest
+from depthviz.parsers.generic.fit.fit_decoder import (
+    FitDecoder,
+    FitDecoderError,
+    FitDecoderTruncatedFileError,
+    fit_crc,
+)
+from depthviz.parsers.generic.fit.fit_reader import DIVE_LOG_FIELDS, read_fit_messages
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+FIT_FILES = sorted(
+    path for path in DATA_DIR.glob("*/*.fit") if path.name != "invalid_file.fit"
+)
+FIELDS = {key: names for key, names in DIVE_LOG_FIELDS.items() if key != "record_mesgs"}
+
+# The record definition: timestamp (uint32), heart_rate (uint8), depth (uint32)
+RECORD_FIELDS = ((253, 4, 0x86), (3, 1, 0x02), (92, 4, 0x86))
+
+
+def definition(
+    local_mesg_num: int,
+    global_mesg_num: int,
+    fields: tuple[tuple[int, int, int], ...],
+    big_endian: bool = False,
+    developer_fields: tuple[tuple[int, int, int], ...] = (),
+) -> bytes:
+    """Returns a definition message."""
+    header = 0x40 | local_mesg_num | (0x20 if developer_fields else 0)
+    byte_order = ">" if big_endian else "<"
+    data = bytes((header, 0, int(big_endian)))
+    data += struct.pack(f"{byte_order}HB", global_mesg_num, len(fields))
+    data += b"".join(bytes(field) for field in fields)
+    if developer_fields:
+        data += bytes((len(developer_fields),))
+        data += b"".join(bytes(field) for field in developer_fields)
+    return data
+
+
+def fit_file(records: bytes) -> bytes:
+    """Returns a FIT file of the given records (12 bytes header, CRC)."""
+    header = struct.pack("<BBHI4s", 12, 0x20, 2132, len(records), b".FIT")
+    data = header + records
+    return data + struct.pack("<H", fit_crc(data))
+
+
+def bytes_crc(data: bytes, crc: int = 0) -> int:
+    """Returns the CRC-16 of the FIT protocol, computed a bit at a time."""
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+class TestFitCrc:
+    """Test the fit_crc function."""
+
+    @pytest.mark.parametrize("size", [0, 1, 4095, 4096, 5000, 65537, 1_000_003])
+    def test_fit_crc(self, size: int) -> None:
+        """Test the CRC of small and large data (computed block by block)."""
+        rng = random.Random(size)
+        data = rng.randbytes(size)
+        crc = rng.randrange(0x10000)
+
+        assert fit_crc(data) == bytes_crc(data)
+        assert fit_crc(data, crc) == bytes_crc(data, crc)
+        assert fit_crc(memoryview(data)) == bytes_crc(data)
+
+    def test_fit_crc_of_file(self) -> None:
+        """Test the CRC of a file, with its CRC, is zero."""
+        data = (DATA_DIR / "garmin" / "18478819822_ACTIVITY.fit").read_bytes()
+
+        assert fit_crc(data) == 0
+        assert fit_crc(data[:-2]) == int.from_bytes(data[-2:], "little")
+
+    def test_fit_crc_memoryview(self) -> None:
+        """Test the CRC of a large view does not keep an export of the data."""
+        data = bytearray(100_000)
+        with memoryview(data) as view:
+            fit_crc(view)
+        data.append(0)
+
+
+class TestFitDecoder:
+    """Test the FitDecoder class."""
+
+    @pytest.mark.parametrize("file_path", FIT_FILES, ids=lambda path: path.name)
+    def test_decode_like_sdk(self, file_path: pathlib.Path) -> None:
+        """Test the decoded messages and records are the same as the SDK's."""
+        messages, records = FitDecoder(FIELDS).decode(file_path.read_bytes())
+
+        sdk_messages = read_fit_messages(str(file_path))
+        sdk_records = sdk_messages.pop("record_mesgs")
+        assert messages == sdk_messages
+        assert list(records) == ["timestamp", "depth"]
+        for name, column in records.items():
+            assert column.typecode == "d"
+            assert column.tolist() == [record[name] for record in sdk_records]
+
+    def test_decode_compressed_timestamps(self) -> None:
+        """Test decoding records with compressed timestamp headers."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS)
+            + struct.pack("<BIBI", 0, 1000, 60, 1500)
+            # Compressed timestamps: no timestamp field, offset in the header
+            + definition(1, 20, RECORD_FIELDS[1:])
+            + struct.pack("<BBI", 0x80 | (1 << 5) | (1001 & 0x1F), 60, 2500)
+            + struct.pack("<BBI", 0x80 | (1 << 5) | (1030 & 0x1F), 61, 3500)
+            # The 5 bits offset rolls over
+            + struct.pack("<BBI", 0x80 | (1 << 5) | (1033 & 0x1F), 62, 4500)
+        )
+
+        _, records = FitDecoder(FIELDS).decode(data)
+
+        assert records["timestamp"].tolist() == [1000, 1001, 1030, 1033]
+        assert records["depth"].tolist() == [1.5, 2.5, 3.5, 4.5]
+
+    def test_decode_compressed_timestamp_without_reference(self) -> None:
+        """Test a compressed timestamp before any timestamp is not supported."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS[1:]) + struct.pack("<BBI", 0x81, 60, 1500)
+        )
+        with pytest.raises(FitDecoderError):
+            FitDecoder(FIELDS).decode(data)
+
+    def test_decode_invalid_and_missing_values(self) -> None:
+        """Test the invalid and missing record values are NaN."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS)
+            + struct.pack("<BIBI", 0, 1000, 60, 0xFFFFFFFF)
+            + definition(0, 20, RECORD_FIELDS[:2])
+            + struct.pack("<BIB", 0, 1001, 60)
+            + definition(0, 20, RECORD_FIELDS[1:])
+            + struct.pack("<BBI", 0, 60, 1500)
+        )
+
+        _, records = FitDecoder(FIELDS).decode(data)
+
+        assert records["timestamp"].tolist()[:2] == [1000, 1001]
+        assert math.isnan(records["timestamp"][2])
+        assert math.isnan(records["depth"][0])
+        assert math.isnan(records["depth"][1])
+        assert records["depth"][2] == 1.5
+
+    def test_decode_invalid_float_values(self) -> None:
+        """Test the invalid float values (NaN bit patterns) are NaN or skipped."""
+        fields = ((253, 4, 0x86), (92, 4, 0x88))
+        data = fit_file(
+            definition(0, 20, fields)
+            + struct.pack("<BIf", 0, 1000, 1.5)
+            + struct.pack("<BII", 0, 1001, 0xFFFFFFFF)
+            # dive_summary: avg_depth (float64 instead of uint32)
+            + definition(1, 268, ((253, 4, 0x86), (2, 8, 0x89)))
+            + struct.pack("<BId", 1, 1000, 2500.0)
+            + struct.pack("<BIQ", 1, 1001, 0xFFFFFFFFFFFFFFFF)
+        )
+
+        messages, records = FitDecoder(FIELDS).decode(data)
+
+        assert records["depth"][0] == 1.5 / 1000
+        assert math.isnan(records["depth"][1])
+        assert [
+            message.get("avg_depth") for message in messages["dive_summary_mesgs"]
+        ] == [2.5, None]
+
+    def test_decode_big_endian_and_developer_fields(self) -> None:
+        """Test decoding big endian records with developer fields."""
+        data = fit_file(
+            definition(
+                0, 20, RECORD_FIELDS, big_endian=True, developer_fields=((0, 3, 0),)
+            )
+            + struct.pack(">BIBI3s", 0, 1000, 60, 1500, b"dev")
+            + struct.pack(">BIBI3s", 0, 1001, 61, 2500, b"dev")
+        )
+
+        _, records = FitDecoder(FIELDS).decode(data)
+
+        assert records["timestamp"].tolist() == [1000, 1001]
+        assert records["depth"].tolist() == [1.5, 2.5]
+
+    def test_decode_messages(self) -> None:
+        """Test decoding the wanted fields of the other messages."""
+        data = fit_file(
+            # file_id: type (enum), manufacturer (uint16), serial_number (uint32z)
+            definition(0, 0, ((0, 1, 0x00), (1, 2, 0x84), (3, 4, 0x8C)))
+            + struct.pack("<BBHI", 0, 4, 23, 12345)
+            # lap: timestamp, start_time
+            + definition(1, 19, ((253, 4, 0x86), (2, 4, 0x86)))
+            + struct.pack("<BII", 1, 1100, 1000)
+            + struct.pack("<BII", 1, 1200, 0xFFFFFFFF)
+        )
+
+        messages, records = FitDecoder(FIELDS).decode(data)
+
+        assert messages["file_id_mesgs"] == [
+            {"type": "activity", "manufacturer": "suunto"}
+        ]
+        assert messages["lap_mesgs"] == [{"start_time": 1000}, {}]
+        assert messages["dive_summary_mesgs"] == []
+        assert not records["timestamp"] and not records["depth"]
+
+    def test_decode_chained_files(self) -> None:
+        """Test decoding chained FIT files."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS) + struct.pack("<BIBI", 0, 1000, 60, 1500)
+        ) + fit_file(
+            definition(0, 20, RECORD_FIELDS) + struct.pack("<BIBI", 0, 2000, 60, 2500)
+        )
+
+        _, records = FitDecoder(FIELDS).decode(data)
+
+        assert records["timestamp"].tolist() == [1000, 2000]
+        assert records["depth"].tolist() == [1.5, 2.5]
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"",
+            (DATA_DIR / "garmin" / "invalid_file.fit").read_bytes(),
+            # CRC error
+            fit_file(
+                definition(0, 20, RECORD_FIELDS) + struct.pack("<BIBI", 0, 1, 6, 1)
+            )[:-1]
+            + b"\x00",
+            # Truncated data message
+            fit_file(definition(0, 20, RECORD_FIELDS) + struct.pack("<BIB", 0, 1, 6)),
+            # Data message without a definition
+            fit_file(struct.pack("<BIBI", 0, 1, 6, 1)),
+            # Invalid base type
+            fit_file(definition(0, 20, ((253, 4, 0x1F),)) + struct.pack("<BI", 0, 1)),
+            # Array of depths
+            fit_file(
+                definition(0, 20, ((92, 8, 0x86),)) + struct.pack("<BII", 0, 1, 2)
+            ),
+            # Depth which is not a number
+            fit_file(
+                definition(0, 20, ((92, 4, 0x07),)) + struct.pack("<B4s", 0, b"1")
+            ),
+        ],
+        ids=[
+            "empty",
+            "not_fit",
+            "crc_error",
+            "truncated",
+            "no_definition",
+            "invalid_base_type",
+            "array",
+            "string",
+        ],
+    )
+    def test_decode_unsupported(self, data: bytes) -> None:
+        """Test the data the decoder does not support raises a FitDecoderError."""
+        with pytest.raises(FitDecoderError):
+            FitDecoder(FIELDS).decode(data)
+
+    def test_decode_without_crc_check(self) -> None:
+        """Test decoding a file with a wrong CRC if the CRC is not checked."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS) + struct.pack("<BIBI", 0, 1000, 60, 1500)
+        )
+        data = data[:-2] + b"\x00\x00"
+
+        _, records = FitDecoder(FIELDS, check_crc=False).decode(data)
+
+        assert records["depth"].tolist() == [1.5]
+
+    @pytest.mark.parametrize(
+        "cut_size",
+        [
+            # In the CRC
+            1,
+            # In the last record
+            2 + 3,
+            # In the definition of the last record
+            2 + 9 + 4,
+        ],
+    )
+    def test_decode_truncated(self, cut_size: int) -> None:
+        """Test a truncated file is decoded up to its last complete record."""
+        data = fit_file(
+            definition(0, 20, RECORD_FIELDS)
+            + struct.pack("<BIBI", 0, 1000, 60, 1500)
+            + struct.pack("<BIBI", 0, 1001, 61, 2500)
+            + definition(1, 20, RECORD_FIELDS)
+            + struct.pack("<BIBI", 1, 1002, 62, 3500)
+        )
+        complete_records = 3 if cut_size <= 2 else 2
+
+        _, records = FitDecoder(FIELDS).decode(data[:-cut_size])
+
+        assert records["timestamp"].tolist() == [1000, 1001, 1002][:complete_records]
+        assert records["depth"].tolist() == [1.5, 2.5, 3.5][:complete_records]
+
+        with pytest.raises(FitDecoderTruncatedFileError):
+            FitDecoder(FIELDS, allow_truncated=False).decode(data[:-cut_size])
+
+    def test_decode_memoryview(self) -> None:
+        """Test decoding a view of the data, which can be released after decoding."""
+        data = bytearray(
+            fit_file(
+                definition(0, 20, RECORD_FIELDS)
+                + struct.pack("<BIBI", 0, 1000, 60, 1500)
+            )
+        )
+        with memoryview(data) as view:
+            _, records = FitDecoder(FIELDS).decode(view[:])
+
+        assert records["depth"].tolist() == [1.5]
+        # The decoder does not keep an export of the data
+        data.append(0)
@@ -0,0 +1,186 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the fit_reader module."""
+
+import mmap
+import pathlib
+from typing import Any, cast
+import pytest
+from garmin_fit_sdk import Decoder, Stream
+from depthviz.parsers.generic.generic_divelog_parser import DiveLogFileNotFoundError
+from depthviz.parsers.generic.fit.fit_parser import DiveLogFitInvalidFitFileError
+from depthviz.parsers.generic.fit.fit_reader import (
+    DIVE_LOG_FIELDS,
+    map_fit_file,
+    read_fit_dive_log,
+    read_fit_messages,
+)
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+
+
+class TestMapFitFile:
+    """Test the map_fit_file function."""
+
+    def test_map_file(self) -> None:
+        """Test a FIT file is memory-mapped read-only."""
+        file_path = DATA_DIR / "suunto" / "FreeDiving_2024-10-16T16_33_30.fit"
+        with map_fit_file(str(file_path)) as view:
+            assert isinstance(view.obj, mmap.mmap)
+            assert view.readonly
+            assert view == file_path.read_bytes()
+
+    def test_map_empty_file(self, tmp_path: pathlib.Path) -> None:
+        """Test mapping an empty file."""
+        file_path = tmp_path / "empty.fit"
+        file_path.touch()
+        with map_fit_file(str(file_path)) as view:
+            assert len(view) == 0
+
+    def test_map_file_not_found(self) -> None:
+        """Test mapping a file that does not exist."""
+        with pytest.raises(FileNotFoundError):
+            with map_fit_file("invalid_file_path"):
+                pass
+
+
+class TestReadFitMessages:
+    """Test the read_fit_messages function."""
+
+    @pytest.mark.parametrize(
+        "file_path",
+        [
+            DATA_DIR / "garmin" / "11211432883_ACTIVITY.fit",
+            DATA_DIR / "garmin" / "14087156326_ACTIVITY.fit",
+            DATA_DIR / "garmin" / "18478819822_ACTIVITY.fit",
+            DATA_DIR / "suunto" / "FreeDiving_2024-10-16T16_33_30.fit",
+        ],
+    )
+    def test_dive_log_fields(self, file_path: pathlib.Path) -> None:
+        """Test only the dive log fields are read, with the values of a full decode."""
+        messages, errors = Decoder(Stream.from_file(str(file_path))).read(
+            convert_datetimes_to_dates=False
+        )
+        assert not errors
+
+        filtered_messages = read_fit_messages(str(file_path))
+
+        assert list(filtered_messages) == list(DIVE_LOG_FIELDS)
+        for key, fields in DIVE_LOG_FIELDS.items():
+            assert filtered_messages[key] == [
+                {name: value for name, value in message.items() if name in fields}
+                for message in cast(list[dict[str, Any]], messages.get(key, []))
+            ]
+
+    def test_other_fields(self) -> None:
+        """Test reading other fields and a message type missing from the file."""
+        messages = read_fit_messages(
+            str(DATA_DIR / "garmin" / "11211432883_ACTIVITY.fit"),
+            fields={"record_mesgs": ("temperature",), "hrv_mesgs": ("time",)},
+        )
+
+        assert list(messages) == ["record_mesgs", "hrv_mesgs"]
+        assert messages["record_mesgs"]
+        assert all(
+            list(record) == ["temperature"] for record in messages["record_mesgs"]
+        )
+        assert messages["hrv_mesgs"] == []
+
+    def test_invalid_file(self) -> None:
+        """Test reading a file which is not a FIT file."""
+        file_path = str(DATA_DIR / "garmin" / "invalid_file.fit")
+        with pytest.raises(DiveLogFitInvalidFitFileError) as e:
+            read_fit_messages(file_path)
+        assert str(e.value) == f"Invalid FIT file: {file_path}"
+
+    def test_file_not_found(self) -> None:
+        """Test reading a FIT file that does not exist."""
+        with pytest.raises(DiveLogFileNotFoundError) as e:
+            read_fit_messages("invalid_file_path")
+        assert str(e.value) == "File not found: invalid_file_path"
+
+
+class TestReadFitDiveLog:
+    """Test the read_fit_dive_log function."""
+
+    @pytest.mark.parametrize(
+        "file_path",
+        [
+            DATA_DIR / "garmin" / "11211432883_ACTIVITY.fit",
+            DATA_DIR / "garmin" / "14087156326_ACTIVITY.fit",
+            DATA_DIR / "garmin" / "18478819822_ACTIVITY.fit",
+            DATA_DIR / "suunto" / "FreeDiving_2024-10-16T16_33_30.fit",
+        ],
+    )
+    def test_native_like_sdk(self, file_path: pathlib.Path) -> None:
+        """Test the built-in decoder reads the same dive log as the SDK."""
+        messages, records = read_fit_dive_log(str(file_path))
+        sdk_messages, sdk_records = read_fit_dive_log(str(file_path), native=False)
+
+        assert messages == sdk_messages
+        assert "record_mesgs" not in messages
+        assert list(records) == ["timestamp", "depth"]
+        assert records == sdk_records
+        assert len(records["timestamp"]) == len(records["depth"]) > 0
+
+    @pytest.mark.parametrize("native", [True, False])
+    def test_invalid_file(self, native: bool) -> None:
+        """Test reading a file which is not a FIT file (the SDK reports the error)."""
+        file_path = str(DATA_DIR / "suunto" / "invalid_file.fit")
+        with pytest.raises(DiveLogFitInvalidFitFileError) as e:
+            read_fit_dive_log(file_path, native=native)
+        assert str(e.value) == f"Invalid FIT file: {file_path}"
+
+    def test_file_not_found(self) -> None:
+        """Test reading a FIT file that does not exist."""
+        with pytest.raises(DiveLogFileNotFoundError) as e:
+            read_fit_dive_log("invalid_file_path")
+        assert str(e.value) == "File not found: invalid_file_path"
+
+    def test_truncated_file(self, tmp_path: pathlib.Path) -> None:
+        """Test reading a truncated FIT file up to its last complete record."""
+        full_path = DATA_DIR / "garmin" / "18478819822_ACTIVITY.fit"
+        file_path = tmp_path / "truncated.fit"
+        file_path.write_bytes(full_path.read_bytes()[:200000])
+
+        messages, records = read_fit_dive_log(str(file_path))
+        _, full_records = read_fit_dive_log(str(full_path))
+
+        assert messages["file_id_mesgs"]
+        count = len(records["depth"])
+        assert 0 < count < len(full_records["depth"])
+        assert records["timestamp"] == full_records["timestamp"][:count]
+        assert records["depth"] == full_records["depth"][:count]
+
+        with pytest.raises(DiveLogFitInvalidFitFileError):
+            read_fit_dive_log(str(file_path), allow_truncated=False)
+
+    @pytest.mark.parametrize("native", [True, False])
+    def test_crc_error(self, tmp_path: pathlib.Path, native: bool) -> None:
+        """Test reading a FIT file with a wrong CRC, with and without the CRC check."""
+        full_path = DATA_DIR / "garmin" / "11211432883_ACTIVITY.fit"
+        data = bytearray(full_path.read_bytes())
+        data[-1] ^= 0xFF
+        file_path = tmp_path / "crc_error.fit"
+        file_path.write_bytes(data)
+
+        with pytest.raises(DiveLogFitInvalidFitFileError):
+            read_fit_dive_log(str(file_path), native=native)
+        assert read_fit_dive_log(
+            str(file_path), native=native, check_crc=False
+        ) == read_fit_dive_log(str(full_path))
+
+    def test_crc_error_in_mapped_file(self, tmp_path: pathlib.Path) -> None:
+        """Test the CRC of a large mapped file is checked (block by block)."""
+        full_path = DATA_DIR / "garmin" / "18478819822_ACTIVITY.fit"
+        data = bytearray(full_path.read_bytes())
+        # A byte in the middle of a record, which is still decoded without the check
+        data[len(data) // 2] ^= 0xFF
+        file_path = tmp_path / "crc_error.fit"
+        file_path.write_bytes(data)
+
+        with pytest.raises(DiveLogFitInvalidFitFileError):
+            read_fit_dive_log(str(file_path))
+        assert read_fit_dive_log(str(file_path), check_crc=False)
@@ -17,6 +17,7 @@ from depthviz.parsers.generic.fit.fit_parser import (
 from depthviz.parsers.generic.generic_divelog_parser import (
     DiveLogFileNotFoundError,
 )
+from depthviz.parsers.generic.parse_cache import ParseCache
 
 
 class TestGarminFitParser:
@@ -1395,6 +1396,51 @@ class TestGarminFitParser:
             == f"Invalid Dive Data: Dive data not found in FIT file: {file_path}"
         )
 
+    @pytest.mark.parametrize("reverse_records", [False, True])
+    def test_parse_dive_window(
+        self, monkeypatch: pytest.MonkeyPatch, reverse_records: bool
+    ) -> None:
+        """Test parsing a dive among many, from records sorted or not."""
+        profile = [0.0, 0.0, 2.0, 10.0, 6.0, 2.0, 1.0, 0.4, 0.0, 0.0, 3.0]
+        records = [
+            {"timestamp": start_time - 2 + idx, "depth": depth}
+            for start_time in range(100, 10000, 100)
+            for idx, depth in enumerate(profile)
+        ]
+        if reverse_records:
+            records.reverse()
+
+        def mock_decoder_read(
+            *_args: Union[str, bool],
+            **_kwargs: Union[str, bool],
+        ) -> tuple[dict[str, list[Any]], list[Any]]:
+            """A mock function for the Decoder.read method."""
+            return {
+                "file_id_mesgs": [{"type": "activity"}],
+                "dive_summary_mesgs": [
+                    {
+                        "bottom_time": 4,
+                        "max_depth": 10.0,
+                        "reference_mesg": "lap",
+                        "reference_index": idx,
+                    }
+                    for idx in range(99)
+                ],
+                "lap_mesgs": [
+                    {"start_time": start_time} for start_time in range(100, 10000, 100)
+                ],
+                "record_mesgs": records,
+            }, []
+
+        fit_parser = GarminFitParser(selected_dive_idx=49)
+        monkeypatch.setattr(Stream, "from_file", self._mock_stream_from_file)
+        monkeypatch.setattr(Decoder, "__init__", self._mock_decoder_init)
+        monkeypatch.setattr(Decoder, "read", mock_decoder_read)
+        fit_parser.parse("mock")
+
+        assert fit_parser.get_time_data() == [float(idx) for idx in range(9)]
+        assert fit_parser.get_depth_data() == profile[:9]
+
     def test_file_not_found(self) -> None:
         """Test parsing a FIT file that does not exist."""
         file_path = "invalid_file_path"
@@ -1526,3 +1572,66 @@ class TestGarminFitParser:
         parser = GarminFitParser(depth_mode=depth_mode, selected_dive_idx=0)
         parser.parse(file_path)
         mock_depth_mode_execute.assert_called_once()
+
+    @pytest.mark.parametrize("depth_mode", ["raw", "zero-based"])
+    def test_parse_cached(
+        self,
+        depth_mode: str,
+        request: pytest.FixtureRequest,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test a FIT file parsed before is read from the parse cache."""
+        file_path = str(
+            request.path.parent.joinpath(
+                "data",
+                "garmin",
+                "11211432883_ACTIVITY.fit",
+            )
+        )
+        parse_cache = ParseCache()
+        parser = GarminFitParser(
+            depth_mode=depth_mode, selected_dive_idx=0, parse_cache=parse_cache
+        )
+        parser.parse(file_path)
+
+        def mock_decoder_read(*_: Any, **__: Any) -> None:
+            """A mock function for the Decoder.read method, which must not be called."""
+            raise AssertionError("The FIT file must not be decoded again")
+
+        monkeypatch.setattr(Decoder, "read", mock_decoder_read)
+        cached_parser = GarminFitParser(
+            depth_mode=depth_mode, selected_dive_idx=0, parse_cache=parse_cache
+        )
+        cached_parser.parse(file_path)
+        assert cached_parser.get_time_data() == parser.get_time_data()
+        assert cached_parser.get_depth_data() == parser.get_depth_data()
+        assert parse_cache.hits == 2
+
+    @patch("builtins.input", return_value="1")
+    def test_parse_cached_select_dive(
+        self, mock_input: Mock, request: pytest.FixtureRequest
+    ) -> None:
+        """Test the dive is selected from the cached dive summary."""
+        file_path = str(
+            request.path.parent.joinpath(
+                "data",
+                "garmin",
+                "11211432883_ACTIVITY.fit",
+            )
+        )
+        parse_cache = ParseCache()
+        parser = GarminFitParser(selected_dive_idx=0, parse_cache=parse_cache)
+        parser.parse(file_path)
+        dive_summary = parse_cache.get_summary(
+            file_path, "depthviz.parsers.garmin.fit_parser.GarminFitParser"
+        )
+        assert dive_summary
+
+        cached_parser = GarminFitParser(parse_cache=parse_cache)
+        with patch.object(
+            GarminFitParser, "select_dive", return_value=0
+        ) as mock_select_dive:
+            cached_parser.parse(file_path)
+        mock_select_dive.assert_called_once_with(dive_summary)
+        assert cached_parser.get_depth_data() == parser.get_depth_data()
+        assert mock_input.call_count == 0
@@ -4,9 +4,12 @@
 
 """Unit tests for the linear_interpolation."""
 
+import random
+import numpy as np
 import pytest
 
 from depthviz.optimizer.linear_interpolation import (
+    ENGINES,
     LinearInterpolationDepth,
     LinearInterpolationDepthError,
 )
@@ -1713,6 +1716,7 @@ class TestLinearInterpolation:
             ),
         ],
     )
+    @pytest.mark.parametrize("engine", ["numpy", "python"])
     # pylint: disable=too-many-arguments
     def test_linear_interpolation(
         self,
@@ -1721,11 +1725,14 @@ class TestLinearInterpolation:
         fps: int,
         expected_times: list[float],
         expected_depths: list[float],
+        engine: str,
     ) -> None:  # pylint: enable=too-many-arguments
         """Test the linear_interpolation function."""
-        handler = LinearInterpolationDepth(times, depths, fps)
-        assert handler.get_interpolated_times() == expected_times
-        assert handler.get_interpolated_depths() == expected_depths
+        handler = LinearInterpolationDepth(times, depths, fps, engine=engine)
+        assert isinstance(handler.get_interpolated_times(), np.ndarray)
+        assert isinstance(handler.get_interpolated_depths(), np.ndarray)
+        assert handler.get_interpolated_times().tolist() == expected_times
+        assert handler.get_interpolated_depths().tolist() == expected_depths
         assert len(handler.get_interpolated_times()) == len(
             handler.get_interpolated_depths()
         )
@@ -1786,3 +1793,55 @@ class TestLinearInterpolation:
         with pytest.raises(LinearInterpolationDepthError) as e:
             LinearInterpolationDepth(times, depths, fps)
         assert str(e.value) == "Error: Input times and depths must be lists."
+
+    @pytest.mark.parametrize("seed", range(10))
+    @pytest.mark.parametrize("fps", [1, 25, 60])
+    def test_numpy_engine_matches_python_engine(self, seed: int, fps: int) -> None:
+        """Test the numpy engine returns the same values as the python engine."""
+        rng = random.Random(seed)
+        times = [rng.uniform(0, 2)]
+        depths = [0.0]
+        # Irregular samples, including bursts of samples within a single frame
+        for _ in range(rng.randint(1, 200)):
+            times.append(times[-1] + rng.choice([0.001, 0.01, 0.25, 1.0, 1.0, 2.7]))
+            depths.append(round(depths[-1] + rng.uniform(-3, 3), 2))
+
+        numpy_handler = LinearInterpolationDepth(times, depths, fps, engine="numpy")
+        python_handler = LinearInterpolationDepth(times, depths, fps, engine="python")
+
+        assert np.array_equal(
+            numpy_handler.get_interpolated_times(),
+            python_handler.get_interpolated_times(),
+        )
+        assert np.array_equal(
+            numpy_handler.get_interpolated_depths(),
+            python_handler.get_interpolated_depths(),
+        )
+
+    def test_duplicate_times(self) -> None:
+        """Test both engines handle the samples with the same time alike."""
+        # Interpolated between the duplicate samples: a division by zero
+        for engine in ENGINES:
+            with pytest.raises(ZeroDivisionError):
+                LinearInterpolationDepth([0, 1, 1, 2], [0, 1, 2, 3], 4, engine=engine)
+
+        # Never interpolated between the duplicate samples
+        numpy_handler = LinearInterpolationDepth(
+            [0, 0, 1], [0, 1, 2], 4, engine="numpy"
+        )
+        python_handler = LinearInterpolationDepth(
+            [0, 0, 1], [0, 1, 2], 4, engine="python"
+        )
+        assert np.array_equal(
+            numpy_handler.get_interpolated_depths(),
+            python_handler.get_interpolated_depths(),
+        )
+        assert np.all(np.isfinite(numpy_handler.get_interpolated_depths()))
+
+    def test_invalid_engine(self) -> None:
+        """Test the linear_interpolation function with an invalid engine."""
+        with pytest.raises(LinearInterpolationDepthError) as e:
+            LinearInterpolationDepth([0, 1], [0, 1], 25, engine="invalid")
+        assert (
+            str(e.value) == "Error: Invalid engine: invalid; must be one of numpy, python."
+        )
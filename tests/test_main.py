@@ -4,6 +4,7 @@
 
 """Unit tests for the main CLI."""
 
+import os
 import sys
 import argparse
 import pathlib
@@ -18,6 +19,8 @@ from depthviz.video.video_creator import (
     DEFAULT_STROKE_WIDTH,
 )
 from depthviz.video.time import TimeReportVideoCreatorError
+from depthviz.video.encoder import FFmpegPipeEncoder
+from depthviz.video.defaults import DEFAULT_RENDER_THREADS, DEFAULT_QUEUE_DEPTH
 
 
 # Mock the DEFAULT_VIDEO_SIZE constant to lower the resolution for faster tests.
@@ -137,7 +140,8 @@ class TestMainCLI:
         app.main()
         captured = capsys.readouterr()
         assert (
-            "Invalid output file extension. Please provide a .mp4 file." in captured.out
+            "Invalid output file extension. "
+            "Please provide a .mp4, .srt, .ass or .vtt file." in captured.out
         )
 
     def test_main_with_invalid_source(
@@ -321,6 +325,15 @@ class TestMainCLI:
             font=DEFAULT_FONT,
             bg_color="black",
             stroke_width=DEFAULT_STROKE_WIDTH,
+            jobs=1,
+            render_threads=DEFAULT_RENDER_THREADS,
+            queue_depth=DEFAULT_QUEUE_DEPTH,
+            vfr=False,
+            cache_dir=None,
+            segment_library=False,
+            no_cache=False,
+            renderer="atlas",
+            frame_cache=False,
         )
 
     @pytest.mark.parametrize(
@@ -329,6 +342,9 @@ class TestMainCLI:
             (0, "test.mp4", True, ""),
             (1, "test.mp4", True, ""),
             (2, "test.mp4", True, ""),
+            (0, "test.srt", True, ""),
+            (0, "test.ass", True, ""),
+            (0, "test.vtt", True, ""),
             (
                 3,
                 "test.mp4",
@@ -345,13 +361,15 @@ class TestMainCLI:
                 0,
                 "test.mp3",
                 False,
-                "Invalid output file extension. Please provide a .mp4 file.",
+                "Invalid output file extension. "
+                "Please provide a .mp4, .srt, .ass or .vtt file.",
             ),
             (
                 0,
                 "xx",
                 False,
-                "Invalid output file extension. Please provide a .mp4 file.",
+                "Invalid output file extension. "
+                "Please provide a .mp4, .srt, .ass or .vtt file.",
             ),
         ],
     )
@@ -371,9 +389,11 @@ class TestMainCLI:
         assert is_valid is expected_is_valid
         assert output_message.strip() == expected_output_message
 
-    @mock.patch("depthviz.main.DepthReportVideoCreator.save")
-    @mock.patch("depthviz.main.DepthReportVideoCreator.render_depth_report_video")
-    @mock.patch("depthviz.main.DepthReportVideoCreator")
+    @mock.patch("depthviz.video.depth.DepthReportVideoCreator.save")
+    @mock.patch(
+        "depthviz.video.depth.DepthReportVideoCreator.render_depth_report_video"
+    )
+    @mock.patch("depthviz.video.depth.DepthReportVideoCreator")
     def test_create_depth_video_failure(
         self,
         mock_depth_report_video_creator: mock.Mock,
@@ -468,6 +488,15 @@ class TestMainCLI:
             font=DEFAULT_FONT,
             bg_color="black",
             stroke_width=DEFAULT_STROKE_WIDTH,
+            jobs=1,
+            render_threads=DEFAULT_RENDER_THREADS,
+            queue_depth=DEFAULT_QUEUE_DEPTH,
+            vfr=False,
+            cache_dir=None,
+            segment_library=False,
+            no_cache=False,
+            renderer="atlas",
+            frame_cache=False,
         )
 
     def test_main_with_args_font(
@@ -596,9 +625,277 @@ class TestMainCLI:
         )
         assert time_output_path.exists()
 
-    @mock.patch("depthviz.main.TimeReportVideoCreator.save")
-    @mock.patch("depthviz.main.TimeReportVideoCreator.render_time_report_video")
-    @mock.patch("depthviz.main.TimeReportVideoCreator")
+    def test_main_with_args_jobs(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function with arguments for parallel rendering."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_jobs.mp4"
+        time_output_path = tmp_path / "test_main_with_args_jobs_time.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+            "--jobs",
+            "2",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth video successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert output_path.exists()
+        assert time_output_path.exists()
+        # The temporary chunks are removed
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            output_path.name,
+            time_output_path.name,
+        ]
+
+    def test_main_with_args_vfr(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function with arguments for variable frame rate videos."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_vfr.mp4"
+        time_output_path = tmp_path / "test_main_with_args_vfr_time.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+            "--vfr",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth video successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert output_path.exists()
+        assert time_output_path.exists()
+
+    def test_main_with_args_renderer(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function with the libass renderer."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_renderer.mp4"
+        time_output_path = tmp_path / "test_main_with_args_renderer_time.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+            "--renderer",
+            "libass",
+        ]
+        app = DepthvizApplication()
+        with mock.patch.object(
+            FFmpegPipeEncoder,
+            "burn_subtitles",
+            autospec=True,
+            side_effect=FFmpegPipeEncoder.burn_subtitles,
+        ) as burn_subtitles:
+            ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth video successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert output_path.exists()
+        assert time_output_path.exists()
+        assert burn_subtitles.call_count == 2
+
+    @pytest.mark.parametrize("extension", [".srt", ".ass", ".vtt"])
+    def test_main_with_args_subtitles(
+        self,
+        extension: str,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function exports subtitles instead of videos."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / f"test_main_with_args_subtitles{extension}"
+        time_output_path = tmp_path / f"test_main_with_args_subtitles_time{extension}"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth subtitles successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert (
+            f"Time subtitles successfully created: {time_output_path.as_posix()}"
+            in captured.out
+        )
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [output_path.name, time_output_path.name]
+        )
+        assert "00:00" in time_output_path.read_text(encoding="utf-8")
+
+    def test_main_with_args_invalid_jobs(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function with an invalid number of jobs."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_invalid_jobs.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--jobs",
+            "0",
+        ]
+        app = DepthvizApplication()
+        with mock.patch.object(app, "load_divelog_parser") as load_divelog_parser:
+            ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 1
+        assert "Invalid number of jobs; must be a positive number." in captured.out
+        assert not output_path.exists()
+        # The dive log is not parsed before the arguments are checked
+        load_divelog_parser.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "option, value, expected_output_message",
+        [
+            (
+                "--render-threads",
+                "-1",
+                "Invalid number of render threads; must be a positive number.",
+            ),
+            ("--queue-depth", "0", "Invalid queue depth; must be a positive number."),
+        ],
+    )
+    def test_main_with_args_invalid_pipeline(
+        self,
+        option: str,
+        value: str,
+        expected_output_message: str,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function with invalid render threads or queue depth."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_invalid_pipeline.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            option,
+            value,
+        ]
+        app = DepthvizApplication()
+        with mock.patch.object(app, "load_divelog_parser") as load_divelog_parser:
+            ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 1
+        assert expected_output_message in captured.out
+        assert not output_path.exists()
+        # The dive log is not parsed before the arguments are checked
+        load_divelog_parser.assert_not_called()
+
+    def test_main_with_args_render_threads(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function rasterizing the frames in a pool of threads."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_render_threads.mp4"
+        time_output_path = tmp_path / "test_main_with_args_render_threads_time.mp4"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+            "--no-cache",
+            "--render-threads",
+            "2",
+            "--queue-depth",
+            "4",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth video successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert output_path.exists()
+        assert time_output_path.exists()
+
+    @mock.patch("depthviz.video.time.TimeReportVideoCreator.save")
+    @mock.patch("depthviz.video.time.TimeReportVideoCreator.render_time_report_video")
+    @mock.patch("depthviz.video.time.TimeReportVideoCreator")
     def test_create_time_video_failure(
         self,
         mock_time_report_video_creator: mock.Mock,
@@ -679,3 +976,265 @@ class TestMainCLI:
     #         f"Depth video successfully created: {output_path.as_posix()}"
     #         in captured.out
     #     )
+
+    def test_main_with_args_cache_dir(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function stores the rendered frames in the cache directory."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_cache_dir.mp4"
+        cache_dir = tmp_path / "cache"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--cache-dir",
+            str(cache_dir.as_posix()),
+            "--frame-cache",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        capsys.readouterr()
+        assert ret_code == 0
+        assert output_path.exists()
+        assert os.listdir(cache_dir / "frames")
+
+    def test_main_without_frame_cache(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function does not store the rendered frames by default."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_without_frame_cache.mp4"
+        cache_dir = tmp_path / "cache"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--cache-dir",
+            str(cache_dir.as_posix()),
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        capsys.readouterr()
+        assert ret_code == 0
+        assert output_path.exists()
+        assert not (cache_dir / "frames").exists()
+
+    def test_main_with_args_invalid_cache_dir(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function runs without cache if the cache cannot be created."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_invalid_cache_dir.mp4"
+        cache_dir = tmp_path / "file"
+        cache_dir.write_text("not a directory")
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--cache-dir",
+            str(cache_dir.as_posix()),
+            "--frame-cache",
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert (
+            "Cannot create the cache directory: "
+            f"{os.path.join(cache_dir.as_posix(), 'frames')}; "
+            "the rendered frames will not be cached."
+        ) in captured.out
+        assert output_path.exists()
+
+    @mock.patch("builtins.input", return_value="1")
+    @mock.patch("depthviz.main.DepthvizApplication.create_depth_video")
+    def test_main_with_cached_divelog(
+        self,
+        mock_create_depth_video: mock.Mock,
+        mock_input: mock.Mock,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function reads a FIT file parsed before from the cache."""
+        mock_create_depth_video.return_value = 0
+        input_path = (
+            request.path.parent / "data" / "garmin" / "11211432883_ACTIVITY.fit"
+        )
+        cache_dir = tmp_path / "cache"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "garmin",
+            "-o",
+            str((tmp_path / "test_main_with_cached_divelog.mp4").as_posix()),
+            "--cache-dir",
+            str(cache_dir.as_posix()),
+        ]
+        assert DepthvizApplication().main() == 0
+        assert len(os.listdir(cache_dir / "divelogs")) == 2
+
+        with mock.patch("garmin_fit_sdk.Decoder.read") as mock_decoder_read:
+            assert DepthvizApplication().main() == 0
+        capsys.readouterr()
+        mock_decoder_read.assert_not_called()
+        assert mock_input.call_count == 2
+        first_parser, second_parser = (
+            call.kwargs["divelog_parser"]
+            for call in mock_create_depth_video.call_args_list
+        )
+        assert second_parser.get_time_data() == first_parser.get_time_data()
+        assert second_parser.get_depth_data() == first_parser.get_depth_data()
+
+    def test_main_with_args_segment_library(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function assembles the videos from the segment library."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_args_segment_library.mp4"
+        time_output_path = tmp_path / "test_main_with_args_segment_library_time.mp4"
+        cache_dir = tmp_path / "cache"
+        sys.argv = [
+            "main",
+            "-i",
+            str(input_path.as_posix()),
+            "-s",
+            "apnealizer",
+            "-o",
+            str(output_path.as_posix()),
+            "--time",
+            "--segment-library",
+            "--cache-dir",
+            str(cache_dir.as_posix()),
+        ]
+        app = DepthvizApplication()
+        ret_code = app.main()
+        captured = capsys.readouterr()
+        assert ret_code == 0
+        assert f"Depth video successfully created: {output_path.as_posix()}" in (
+            captured.out
+        )
+        assert output_path.exists()
+        assert time_output_path.exists()
+        assert os.listdir(cache_dir / "segments")
+
+    def test_main_with_cached_output(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test the main function reuses the videos of identical inputs."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        cache_dir = tmp_path / "cache"
+        outputs = []
+        for i, extra_args in enumerate([[], [], ["--no-cache"]]):
+            output_path = tmp_path / f"test_main_with_cached_output_{i}.mp4"
+            sys.argv = [
+                "main",
+                "-i",
+                str(input_path.as_posix()),
+                "-s",
+                "apnealizer",
+                "-o",
+                str(output_path.as_posix()),
+                "--time",
+                "--cache-dir",
+                str(cache_dir.as_posix()),
+                *extra_args,
+            ]
+            app = DepthvizApplication()
+            assert app.main() == 0
+            outputs.append(capsys.readouterr().out)
+            assert output_path.exists()
+            assert (tmp_path / f"test_main_with_cached_output_{i}_time.mp4").exists()
+
+        assert "(cached)" not in outputs[0]
+        assert (
+            "Depth video successfully created (cached): "
+            f"{(tmp_path / 'test_main_with_cached_output_1.mp4').as_posix()}"
+        ) in outputs[1]
+        assert (
+            "Time video successfully created (cached): "
+            f"{(tmp_path / 'test_main_with_cached_output_1_time.mp4').as_posix()}"
+        ) in outputs[1]
+        assert "(cached)" not in outputs[2]
+        assert (tmp_path / "test_main_with_cached_output_1.mp4").read_bytes() == (
+            tmp_path / "test_main_with_cached_output_0.mp4"
+        ).read_bytes()
+
+    def test_main_with_cached_output_rendered_again(
+        self,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: pathlib.Path,
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test a video rendered to the path of a cached video keeps the cache intact."""
+        input_path = (
+            request.path.parent / "data" / "apnealizer" / "valid_depth_data_trimmed.csv"
+        )
+        output_path = tmp_path / "test_main_with_cached_output_rendered_again.mp4"
+        videos = []
+        for decimal_places in ("2", "0", "2"):
+            sys.argv = [
+                "main",
+                "-i",
+                str(input_path.as_posix()),
+                "-s",
+                "apnealizer",
+                "-o",
+                str(output_path.as_posix()),
+                "-d",
+                decimal_places,
+                "--cache-dir",
+                str((tmp_path / "cache").as_posix()),
+            ]
+            app = DepthvizApplication()
+            assert app.main() == 0
+            videos.append(output_path.read_bytes())
+        captured = capsys.readouterr()
+
+        assert captured.out.count("(cached)") == 1
+        assert videos[0] != videos[1]
+        assert videos[2] == videos[0]
+        assert sorted(os.listdir(tmp_path)) == [
+            "cache",
+            "test_main_with_cached_output_rendered_again.mp4",
+        ]
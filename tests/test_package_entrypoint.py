@@ -4,7 +4,11 @@
 
 """Unit tests for the main entrypoint of the package."""
 
+import os
+import subprocess
 import sys
+import pytest
+import depthviz
 
 
 def test_main_entrypoint() -> None:
@@ -19,3 +23,41 @@ def test_main_entrypoint() -> None:
     sys.argv = ["depthviz"]
     ret_code = run()
     assert ret_code == 1
+
+
+# Modules which must not be imported before the dive log is parsed
+HEAVY_MODULES = ("moviepy", "numpy", "PIL", "imageio", "garmin_fit_sdk", "tqdm")
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["-c", "import depthviz.main"],
+        ["-m", "depthviz", "--help"],
+        ["-m", "depthviz", "--version"],
+        ["-m", "depthviz", "-i", "dive.csv", "-s", "manual", "-o", "video.avi"],
+    ],
+)
+def test_startup_imports(args: list[str]) -> None:
+    """Test the CLI starts without importing the heavy modules (`-X importtime`)."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(depthviz.__file__)))
+    env = dict(os.environ, PYTHONPATH=src_dir)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+
+    # Lines: "import time: <self us> | <cumulative us> | <indented module name>"
+    imported_modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                imported_modules.add(module.strip())
+    assert "depthviz.main" in imported_modules
+    assert not [
+        module for module in imported_modules if module.split(".")[0] in HEAVY_MODULES
+    ]
@@ -0,0 +1,125 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the parse_cache module."""
+
+import os
+import pathlib
+import pytest
+from depthviz.parsers.generic.parse_cache import ParseCache, ParseCacheError
+
+
+class TestParseCache:
+    """Test the ParseCache class."""
+
+    def test_default_cache_dir(self, isolated_cache_dir: pathlib.Path) -> None:
+        """Test the dive logs are stored in the default cache directory."""
+        cache = ParseCache()
+        assert cache.cache_dir == os.path.join(
+            str(isolated_cache_dir), "depthviz", "divelogs"
+        )
+        assert os.path.isdir(cache.cache_dir)
+
+    def test_summary(self, tmp_path: pathlib.Path) -> None:
+        """Test the scalar fields of the dive summary list are cached."""
+        divelog = tmp_path / "dive.fit"
+        divelog.write_bytes(b"dive log")
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+        assert cache.get_summary(str(divelog), "Parser") is None
+        cache.put_summary(
+            str(divelog),
+            "Parser",
+            [
+                {"start_time": 10, "max_depth": 5.5, "avg_depth": None},
+                {"start_time": 20, "max_depth": 3.0, "raw_data": [{"depth": 1.0}]},
+            ],
+        )
+        assert cache.get_summary(str(divelog), "Parser") == [
+            {"start_time": 10, "max_depth": 5.5, "avg_depth": None},
+            {"start_time": 20, "max_depth": 3.0},
+        ]
+        assert cache.get_summary(str(divelog), "OtherParser") is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_dive(self, tmp_path: pathlib.Path) -> None:
+        """Test the dives are keyed by parser, depth mode and dive index."""
+        divelog = tmp_path / "dive.fit"
+        divelog.write_bytes(b"dive log")
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+        cache.put_dive(str(divelog), "Parser", "raw", 1, [0.0, 1.5], [0, 2.25])
+
+        assert cache.get_dive(str(divelog), "Parser", "raw", 1) == (
+            [0.0, 1.5],
+            [0.0, 2.25],
+        )
+        assert cache.get_dive(str(divelog), "Parser", "raw", 0) is None
+        assert cache.get_dive(str(divelog), "Parser", "zero-based", 1) is None
+        assert cache.get_dive(str(divelog), "OtherParser", "raw", 1) is None
+
+    def test_file_content_changed(self, tmp_path: pathlib.Path) -> None:
+        """Test a dive log is keyed by content, not by path."""
+        divelog = tmp_path / "dive.fit"
+        divelog.write_bytes(b"dive log")
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+        cache.put_dive(str(divelog), "Parser", "raw", 0, [0.0], [1.0])
+
+        copy = tmp_path / "copy.fit"
+        copy.write_bytes(b"dive log")
+        assert cache.get_dive(str(copy), "Parser", "raw", 0) == ([0.0], [1.0])
+
+        divelog.write_bytes(b"other dive log")
+        os.utime(divelog, ns=(0, 0))
+        assert cache.get_dive(str(divelog), "Parser", "raw", 0) is None
+
+    def test_unreadable_file(self, tmp_path: pathlib.Path) -> None:
+        """Test a dive log file which cannot be read is not cached."""
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+        missing = str(tmp_path / "missing.fit")
+        cache.put_dive(missing, "Parser", "raw", 0, [0.0], [1.0])
+        assert cache.get_dive(missing, "Parser", "raw", 0) is None
+        assert not os.listdir(cache.cache_dir)
+
+    def test_corrupted_entry(self, tmp_path: pathlib.Path) -> None:
+        """Test a corrupted cache entry is a miss."""
+        divelog = tmp_path / "dive.fit"
+        divelog.write_bytes(b"dive log")
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+        cache.put_dive(str(divelog), "Parser", "raw", 0, [0.0], [1.0])
+        (entry,) = os.listdir(cache.cache_dir)
+        pathlib.Path(cache.cache_dir, entry).write_bytes(b"corrupted")
+        assert cache.get_dive(str(divelog), "Parser", "raw", 0) is None
+
+    def test_prune(self, tmp_path: pathlib.Path) -> None:
+        """Test the least recently used entries are deleted past the size limit."""
+        divelog = tmp_path / "dive.fit"
+        divelog.write_bytes(b"dive log")
+        cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+        for dive_idx in range(3):
+            cache.put_dive(str(divelog), "Parser", "raw", dive_idx, [0.0], [1.0])
+        entries = sorted(os.listdir(cache.cache_dir))
+        size = os.path.getsize(os.path.join(cache.cache_dir, entries[0]))
+        for mtime, entry in enumerate(entries):
+            os.utime(os.path.join(cache.cache_dir, entry), (mtime, mtime))
+
+        cache.max_bytes = 2 * size
+        cache.prune()
+        assert sorted(os.listdir(cache.cache_dir)) == entries[1:]
+
+    def test_invalid_size(self) -> None:
+        """Test a negative size limit is rejected."""
+        with pytest.raises(ParseCacheError) as e:
+            ParseCache(max_bytes=-1)
+        assert str(e.value) == "Invalid parse cache size; must be a positive number."
+
+    def test_invalid_cache_dir(self, tmp_path: pathlib.Path) -> None:
+        """Test the error when the cache directory cannot be created."""
+        cache_dir = tmp_path / "file"
+        cache_dir.write_text("not a directory")
+        with pytest.raises(ParseCacheError) as e:
+            ParseCache(cache_dir=str(cache_dir))
+        assert str(e.value) == (
+            "Cannot create the parse cache directory: "
+            f"{os.path.join(str(cache_dir), 'divelogs')}"
+        )
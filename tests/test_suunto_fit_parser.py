@@ -17,6 +17,7 @@ from depthviz.parsers.generic.fit.fit_parser import (
 from depthviz.parsers.generic.generic_divelog_parser import (
     DiveLogFileNotFoundError,
 )
+from depthviz.parsers.generic.parse_cache import ParseCache
 
 
 class TestSuuntoFitParser:
@@ -997,6 +998,55 @@ class TestSuuntoFitParser:
         assert str(e.value) == "Invalid Dive: Please enter a number between 1 and 2"
         assert mock_input.call_count == 1
 
+    @pytest.mark.parametrize(
+        "depths, selected_dive_idx, expected_depth_data",
+        [
+            # Shallow descent and ascent before the dive (reset)
+            ([0.0, 1.0, 0.5, 2.0, 4.0, 2.0, 1.0, 0.0], 0, [0.5, 2.0, 4.0, 2.0, 1.0]),
+            # Descent again after ascending past the CUT_OFF_DEPTH (two dives)
+            ([0.0, 2.0, 5.0, 1.0, 2.0, 6.0, 3.0, 0.0], 0, [0.0, 2.0, 5.0, 1.0]),
+            ([0.0, 2.0, 5.0, 1.0, 2.0, 6.0, 3.0, 0.0], 1, [2.0, 6.0, 3.0]),
+            # Shallower start than the previous dive end (reset)
+            (
+                [0.0, 2.0, 5.0, 2.0, 0.0, 1.0, 2.0, 4.0, 1.0, 0.0],
+                1,
+                [1.0, 2.0, 4.0, 1.0],
+            ),
+        ],
+    )
+    def test_parse_dive_segmentation(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        depths: list[float],
+        selected_dive_idx: int,
+        expected_depth_data: list[float],
+    ) -> None:
+        """Test the dives are segmented at the surface and dive state resets."""
+
+        def mock_decoder_read(
+            *_args: Union[str, bool],
+            **_kwargs: Union[str, bool],
+        ) -> tuple[dict[str, list[Any]], list[Any]]:
+            """A mock function for the Decoder.read method."""
+            return {
+                "file_id_mesgs": [{"type": "activity", "manufacturer": "suunto"}],
+                "record_mesgs": [
+                    {"timestamp": timestamp, "depth": depth}
+                    for timestamp, depth in enumerate(depths)
+                ],
+            }, []
+
+        fit_parser = SuuntoFitParser(selected_dive_idx=selected_dive_idx)
+        monkeypatch.setattr(Stream, "from_file", self._mock_stream_from_file)
+        monkeypatch.setattr(Decoder, "__init__", self._mock_decoder_init)
+        monkeypatch.setattr(Decoder, "read", mock_decoder_read)
+        fit_parser.parse("mock")
+
+        assert fit_parser.get_depth_data() == expected_depth_data
+        assert fit_parser.get_time_data() == [
+            float(idx) for idx in range(len(expected_depth_data))
+        ]
+
     @pytest.mark.parametrize("depth_mode", ["raw", "zero-based"])
     @patch("depthviz.parsers.suunto.fit_parser.SuuntoFitParser.depth_mode_execute")
     def test_parse_valid_fit_depth_mode_exec(
@@ -1016,3 +1066,66 @@ class TestSuuntoFitParser:
         parser = SuuntoFitParser(depth_mode=depth_mode, selected_dive_idx=0)
         parser.parse(file_path)
         mock_depth_mode_execute.assert_called_once()
+
+    @pytest.mark.parametrize("depth_mode", ["raw", "zero-based"])
+    def test_parse_cached(
+        self,
+        depth_mode: str,
+        request: pytest.FixtureRequest,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test a FIT file parsed before is read from the parse cache."""
+        file_path = str(
+            request.path.parent.joinpath(
+                "data",
+                "suunto",
+                "FreeDiving_2024-10-16T16_33_30.fit",
+            )
+        )
+        parse_cache = ParseCache()
+        parser = SuuntoFitParser(
+            depth_mode=depth_mode, selected_dive_idx=0, parse_cache=parse_cache
+        )
+        parser.parse(file_path)
+
+        def mock_decoder_read(*_: Any, **__: Any) -> None:
+            """A mock function for the Decoder.read method, which must not be called."""
+            raise AssertionError("The FIT file must not be decoded again")
+
+        monkeypatch.setattr(Decoder, "read", mock_decoder_read)
+        cached_parser = SuuntoFitParser(
+            depth_mode=depth_mode, selected_dive_idx=0, parse_cache=parse_cache
+        )
+        cached_parser.parse(file_path)
+        assert cached_parser.get_time_data() == parser.get_time_data()
+        assert cached_parser.get_depth_data() == parser.get_depth_data()
+        assert parse_cache.hits == 2
+
+    @patch("builtins.input", return_value="1")
+    def test_parse_cached_select_dive(
+        self, mock_input: Mock, request: pytest.FixtureRequest
+    ) -> None:
+        """Test the dive is selected from the cached dive summary."""
+        file_path = str(
+            request.path.parent.joinpath(
+                "data",
+                "suunto",
+                "FreeDiving_2024-10-16T16_33_30.fit",
+            )
+        )
+        parse_cache = ParseCache()
+        parser = SuuntoFitParser(selected_dive_idx=0, parse_cache=parse_cache)
+        parser.parse(file_path)
+        dive_summary = parse_cache.get_summary(
+            file_path, "depthviz.parsers.suunto.fit_parser.SuuntoFitParser"
+        )
+        assert dive_summary
+
+        cached_parser = SuuntoFitParser(parse_cache=parse_cache)
+        with patch.object(
+            SuuntoFitParser, "select_dive", return_value=0
+        ) as mock_select_dive:
+            cached_parser.parse(file_path)
+        mock_select_dive.assert_called_once_with(dive_summary)
+        assert cached_parser.get_depth_data() == parser.get_depth_data()
+        assert mock_input.call_count == 0
@@ -7,11 +7,14 @@
 import os.path
 import pathlib
 from typing import Any
+from unittest import mock
 import pytest
+from PIL import ImageFont
 from depthviz.video.video_creator import (
     VideoNotRenderError,
     VideoFormatError,
     OverlayVideoCreatorError,
+    DEFAULT_FONT,
 )
 from depthviz.video.depth import DepthReportVideoCreator, DepthReportVideoCreatorError
 
@@ -340,6 +343,29 @@ class TestDepthReportVideoCreator:
 
         assert f"{expected_error_prefix}{file_path}" in str(e.value)
 
+    def test_style_validation_without_rendering(self, tmp_path: pathlib.Path) -> None:
+        """Test the font and color are validated once per process, without rendering."""
+        font = tmp_path / "font.ttf"
+        font.write_bytes(pathlib.Path(DEFAULT_FONT).read_bytes())
+        with (
+            mock.patch(
+                "depthviz.video.video_creator.TextClip",
+                side_effect=AssertionError("No text must be rendered"),
+            ),
+            mock.patch.object(
+                ImageFont, "truetype", wraps=ImageFont.truetype
+            ) as mock_truetype,
+        ):
+            for _ in range(3):
+                _ = DepthReportVideoCreator(fps=1, font=str(font), bg_color="#123456")
+        mock_truetype.assert_called_once()
+
+        # A font that changes on disk is validated again
+        font.write_bytes(b"not a font anymore")
+        with pytest.raises(OverlayVideoCreatorError) as e:
+            _ = DepthReportVideoCreator(fps=1, font=str(font))
+        assert f"Error loading font file: {font}" in str(e.value)
+
     @pytest.mark.parametrize(
         "bg_color",
         [
@@ -387,3 +413,41 @@ class TestDepthReportVideoCreator:
             _ = DepthReportVideoCreator(fps=1, stroke_width=stroke_width)
 
         assert "Invalid stroke width; must be a positive number." in str(e.value)
+
+    @pytest.mark.parametrize("renderer", ["atlas", "textclip"])
+    def test_render_depth_report_video_with_renderer(self, renderer: str) -> None:
+        """Test the render_depth_report_video method with each text renderer."""
+        depth_report_video_creator = DepthReportVideoCreator(fps=1, renderer=renderer)
+
+        time_data = [0.0, 1.0, 2.0, 3.0]
+        depth_data = [0.0, 1.0, 2.0, 3.0]
+        video = depth_report_video_creator.render_depth_report_video(
+            time_data=time_data, depth_data=depth_data
+        )
+
+        assert video.duration == 4
+        video_clip_texts = [video.clips[i].text for i in range(len(video.clips))]
+        assert video_clip_texts == ["0m", "-1m", "-2m", "-3m"]
+        assert video.get_frame(0).shape == (360, 640, 3)
+
+    def test_render_depth_report_video_with_invalid_renderer(self) -> None:
+        """Test the DepthReportVideoCreator with an invalid text renderer."""
+        with pytest.raises(OverlayVideoCreatorError) as e:
+            _ = DepthReportVideoCreator(fps=1, renderer="invalid")
+
+        assert str(e.value) == (
+            "Invalid renderer: invalid; must be one of atlas, textclip, libass."
+        )
+
+    def test_render_depth_report_video_with_invalid_engine(self) -> None:
+        """Test the DepthReportVideoCreator with an invalid depth engine."""
+        video_creator = DepthReportVideoCreator(fps=1)
+        with pytest.raises(DepthReportVideoCreatorError) as e:
+            video_creator.render_depth_report_video(
+                time_data=[0, 1], depth_data=[0, 1], engine="invalid"
+            )
+
+        assert (
+            str(e.value)
+            == "Invalid engine: invalid; must be one of change-point, interpolation."
+        )
@@ -0,0 +1,376 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the encoder module."""
+
+import os
+import pathlib
+import subprocess
+import numpy as np
+import pytest
+from numpy.typing import NDArray
+from moviepy import VideoClip, VideoFileClip
+from depthviz.video.encoder import FFmpegPipeEncoder, VideoEncoderError
+from depthviz.video.frame_cache import FrameCache
+from depthviz.video.depth import DepthReportVideoCreator
+from depthviz.video.video_creator import OverlayVideoCreatorError
+
+
+class TestFFmpegPipeEncoder:
+    """Test the FFmpegPipeEncoder class."""
+
+    def test_build_command(self) -> None:
+        """Test the ffmpeg command uses the encoder settings."""
+        encoder = FFmpegPipeEncoder(
+            codec="libx265", preset="ultrafast", crf=18, threads=2, ffmpeg_binary="ff"
+        )
+
+        command = encoder.build_command(path="out.mp4", size=(640, 360), fps=25)
+
+        assert command[0] == "ff"
+        assert command[-1] == "out.mp4"
+        assert " ".join(command[1:-1]) == (
+            "-y -loglevel error -f rawvideo -vcodec rawvideo -s 640x360 "
+            "-pix_fmt rgb24 -r 25.00 -i - -an -vcodec libx265 -preset ultrafast "
+            "-crf 18 -threads 2 -pix_fmt yuv420p"
+        )
+
+    def test_encode(self, tmp_path: pathlib.Path) -> None:
+        """Test the encoded video has the frames of the clip."""
+        video_creator = DepthReportVideoCreator(
+            fps=4, composition="timeline", encoder=FFmpegPipeEncoder(preset="ultrafast")
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0], depth_data=[0.0, 1.0, 2.0, 3.0]
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        with VideoFileClip(path) as encoded:
+            assert encoded.size == [640, 360]
+            assert encoded.fps == 4
+            assert encoded.duration == pytest.approx(4, abs=0.3)
+            for i in range(16):
+                expected = video.get_frame(i / 4).astype(int)
+                frame = encoded.get_frame(i / 4).astype(int)
+                assert np.mean(np.abs(frame - expected)) < 4
+
+    def test_encode_converted_frames(self, tmp_path: pathlib.Path) -> None:
+        """Test frames which cannot be written as they are (dtype, layout)."""
+        frames = [
+            np.full((36, 64, 3), 200, dtype=np.uint8),
+            np.full((36, 128, 3), 50, dtype=np.uint8)[:, ::2],
+            np.full((36, 64, 3), 120.0),
+        ]
+        video = VideoClip(frame_function=lambda t: frames[int(t * 4)], duration=0.75)
+        path = str(tmp_path / "test_video.mp4")
+
+        FFmpegPipeEncoder(preset="ultrafast").encode(
+            video=video, path=path, fps=4, disable_progress_bar=True
+        )
+
+        with VideoFileClip(path) as encoded:
+            for i, expected in enumerate([200, 50, 120]):
+                frame = encoded.get_frame(i / 4).astype(int)
+                assert np.mean(np.abs(frame - expected)) < 4
+
+    @pytest.mark.parametrize("frame_cache_size", [0, 64 * 1024 * 1024])
+    def test_encode_threaded(
+        self, frame_cache_size: int, tmp_path: pathlib.Path
+    ) -> None:
+        """Test the frames rasterized by several threads are encoded in order."""
+        video_creator = DepthReportVideoCreator(
+            fps=4,
+            composition="timeline",
+            frame_cache=FrameCache(max_bytes=frame_cache_size),
+            encoder=FFmpegPipeEncoder(
+                preset="ultrafast", render_threads=3, queue_depth=2
+            ),
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[i / 4 for i in range(24)],
+            depth_data=[float(i % 7) for i in range(24)],
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        with VideoFileClip(path) as encoded:
+            for i in range(24):
+                expected = video.get_frame(i / 4).astype(int)
+                frame = encoded.get_frame(i / 4).astype(int)
+                assert np.mean(np.abs(frame - expected)) < 4
+
+    def test_encode_threaded_like_sequential(self, tmp_path: pathlib.Path) -> None:
+        """Test the threads encode the same frames as a single thread (no cache)."""
+        videos = []
+        for render_threads in (0, 8):
+            video_creator = DepthReportVideoCreator(
+                fps=4,
+                composition="timeline",
+                frame_cache=FrameCache(max_bytes=0),
+                encoder=FFmpegPipeEncoder(
+                    preset="ultrafast", render_threads=render_threads, queue_depth=2
+                ),
+            )
+            video = video_creator.render_depth_report_video(
+                time_data=[i / 4 for i in range(80)],
+                depth_data=[float(i // 2 % 9) for i in range(80)],
+            )
+            path = str(tmp_path / f"test_video_{render_threads}.mp4")
+            video_creator.save(video=video, path=path)
+            videos.append(path)
+
+        with (
+            VideoFileClip(videos[0]) as sequential,
+            VideoFileClip(videos[1]) as threaded,
+        ):
+            assert threaded.n_frames == sequential.n_frames
+            for i in range(sequential.n_frames):
+                assert np.array_equal(
+                    threaded.get_frame(i / 4), sequential.get_frame(i / 4)
+                )
+
+    def test_encode_threaded_reused_buffer(self, tmp_path: pathlib.Path) -> None:
+        """Test a frame buffer reused by the clip is copied before it is queued."""
+        buffer = np.empty((36, 64, 3), dtype=np.uint8)
+
+        def render(t: float) -> NDArray[np.uint8]:
+            """Renders a frame into the same buffer at every call."""
+            buffer[:] = int(t * 4) * 20
+            return buffer
+
+        path = str(tmp_path / "test_video.mp4")
+        FFmpegPipeEncoder(preset="ultrafast", render_threads=1, queue_depth=4).encode(
+            video=VideoClip(frame_function=render, duration=3),
+            path=path,
+            fps=4,
+            disable_progress_bar=True,
+        )
+
+        with VideoFileClip(path) as encoded:
+            for i in range(12):
+                frame = encoded.get_frame(i / 4).astype(int)
+                assert np.mean(np.abs(frame - i * 20)) < 4
+
+    def test_encode_threaded_error(self, tmp_path: pathlib.Path) -> None:
+        """Test an error of a rasterizer thread is raised and stops the pipeline."""
+        rendered = []
+
+        def render(t: float) -> NDArray[np.uint8]:
+            """Renders a black frame, or raises an error from the second second."""
+            rendered.append(t)
+            if t >= 1:
+                raise ValueError("Cannot render the frame")
+            return np.zeros((36, 64, 3), dtype=np.uint8)
+
+        with pytest.raises(ValueError) as e:
+            FFmpegPipeEncoder(
+                preset="ultrafast", render_threads=2, queue_depth=2
+            ).encode(
+                video=VideoClip(frame_function=render, duration=100),
+                path=str(tmp_path / "test_video.mp4"),
+                fps=4,
+                disable_progress_bar=True,
+            )
+        assert str(e.value) == "Cannot render the frame"
+        assert len(rendered) < 400
+
+    @pytest.mark.parametrize(
+        "render_threads, queue_depth, expected_error",
+        [
+            (-1, 16, "Invalid number of render threads; must be a positive number."),
+            (2, 0, "Invalid queue depth; must be a positive number."),
+        ],
+    )
+    def test_invalid_pipeline_settings(
+        self, render_threads: int, queue_depth: int, expected_error: str
+    ) -> None:
+        """Test invalid render threads or queue depth raise an error."""
+        with pytest.raises(VideoEncoderError) as e:
+            FFmpegPipeEncoder(render_threads=render_threads, queue_depth=queue_depth)
+        assert str(e.value) == expected_error
+
+    @pytest.mark.parametrize(
+        "crf, threads, expected_error",
+        [
+            (52, 0, "Invalid CRF value; must be a number between 0 and 51."),
+            (-1, 0, "Invalid CRF value; must be a number between 0 and 51."),
+            (23, -1, "Invalid number of threads; must be a positive number."),
+        ],
+    )
+    def test_invalid_settings(
+        self, crf: int, threads: int, expected_error: str
+    ) -> None:
+        """Test invalid encoder settings raise an error."""
+        with pytest.raises(VideoEncoderError) as e:
+            FFmpegPipeEncoder(crf=crf, threads=threads)
+        assert str(e.value) == expected_error
+
+    def test_encode_failure(self, tmp_path: pathlib.Path) -> None:
+        """Test an ffmpeg failure is raised as an OverlayVideoCreatorError."""
+        video_creator = DepthReportVideoCreator(
+            fps=4, encoder=FFmpegPipeEncoder(codec="nonexistent_codec")
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0], depth_data=[0.0, 1.0]
+        )
+
+        with pytest.raises(OverlayVideoCreatorError) as e:
+            video_creator.save(video=video, path=str(tmp_path / "test_video.mp4"))
+        assert str(e.value).startswith("ffmpeg failed to encode the video: ")
+
+    def test_ffmpeg_not_found(self, tmp_path: pathlib.Path) -> None:
+        """Test a missing ffmpeg executable raises an error."""
+        encoder = FFmpegPipeEncoder(ffmpeg_binary=str(tmp_path / "nonexistent"))
+        video = DepthReportVideoCreator(fps=4).render_depth_report_video(
+            time_data=[0.0, 1.0], depth_data=[0.0, 1.0]
+        )
+
+        with pytest.raises(VideoEncoderError) as e:
+            encoder.encode(video=video, path=str(tmp_path / "test_video.mp4"), fps=4)
+        assert str(e.value).startswith("Cannot start ffmpeg: ")
+
+    @pytest.mark.parametrize(
+        "frame_count, jobs, gop, expected_chunks",
+        [
+            (100, 4, 10, [(0, 30), (30, 60), (60, 90), (90, 100)]),
+            (100, 2, 25, [(0, 50), (50, 100)]),
+            (100, 1, 25, [(0, 100)]),
+            (10, 4, 25, [(0, 10)]),
+            (0, 4, 25, []),
+        ],
+    )
+    def test_chunk_ranges(
+        self,
+        frame_count: int,
+        jobs: int,
+        gop: int,
+        expected_chunks: list[tuple[int, int]],
+    ) -> None:
+        """Test the chunks are contiguous and start on keyframe boundaries."""
+        chunks = FFmpegPipeEncoder.chunk_ranges(frame_count, jobs, gop)
+
+        assert [(chunk.start, chunk.stop) for chunk in chunks] == expected_chunks
+
+    def test_encode_parallel(self, tmp_path: pathlib.Path) -> None:
+        """Test the chunks encoded in parallel are joined into the whole video."""
+        video_creator = DepthReportVideoCreator(
+            fps=4,
+            composition="timeline",
+            encoder=FFmpegPipeEncoder(preset="ultrafast", gop=4),
+            jobs=3,
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+            depth_data=[0.0, 1.0, 2.0, 3.0, 2.0, 1.0],
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        assert os.listdir(tmp_path) == ["test_video.mp4"]
+        with VideoFileClip(path) as encoded:
+            assert encoded.n_frames == 24
+            for i in range(24):
+                expected = video.get_frame(i / 4).astype(int)
+                frame = encoded.get_frame(i / 4).astype(int)
+                assert np.mean(np.abs(frame - expected)) < 4
+
+    def test_invalid_gop(self) -> None:
+        """Test an invalid GOP size raises an error."""
+        with pytest.raises(VideoEncoderError) as e:
+            FFmpegPipeEncoder(gop=0)
+        assert str(e.value) == "Invalid GOP size; must be a positive number."
+
+    def test_invalid_jobs(self) -> None:
+        """Test an invalid number of jobs raises an error."""
+        with pytest.raises(OverlayVideoCreatorError) as e:
+            DepthReportVideoCreator(fps=4, jobs=0)
+        assert str(e.value) == "Invalid number of jobs; must be a positive number."
+
+    @pytest.mark.parametrize("fps", [4, 24, 25, 30, 60])
+    def test_encode_variable(self, fps: int, tmp_path: pathlib.Path) -> None:
+        """Test the variable frame rate video shows the same frames on the frame grid."""
+        encoder = FFmpegPipeEncoder(frame_rate_mode="variable", tune="stillimage")
+        video_creator = DepthReportVideoCreator(
+            fps=fps, composition="timeline", encoder=encoder
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+            depth_data=[0.0, 1.0, 2.0, 3.0, 2.0, 1.0],
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        # Decode the video back to a constant frame rate
+        decoded = subprocess.run(
+            [encoder.ffmpeg_binary, "-i", path, "-vf", f"fps={fps}"]
+            + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+            capture_output=True,
+            check=True,
+        )
+        frames = np.frombuffer(decoded.stdout, dtype=np.uint8).reshape(-1, 360, 640, 3)
+        frame_count = int(video.duration * fps)
+        assert len(frames) == frame_count
+        for i in range(frame_count):
+            expected = video.get_frame(i / fps).astype(int)
+            assert np.mean(np.abs(frames[i].astype(int) - expected)) < 4
+        # Only the frames where the text changes are encoded
+        with VideoFileClip(path) as encoded:
+            assert encoded.duration == pytest.approx(frame_count / fps, abs=0.05)
+        assert os.listdir(tmp_path) == ["test_video.mp4"]
+
+    def test_invalid_frame_rate_mode(self) -> None:
+        """Test an invalid frame rate mode raises an error."""
+        with pytest.raises(VideoEncoderError) as e:
+            FFmpegPipeEncoder(frame_rate_mode="invalid")
+        assert str(e.value) == (
+            "Invalid frame rate mode: invalid; must be one of constant, variable."
+        )
+
+    def test_burn_subtitles(self, tmp_path: pathlib.Path) -> None:
+        """Test the libass video changes frame exactly where the text changes."""
+        encoder = FFmpegPipeEncoder(preset="ultrafast")
+        video_creator = DepthReportVideoCreator(
+            fps=4, renderer="libass", composition="timeline", encoder=encoder
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0], depth_data=[0.0, 1.0, 2.0, 3.0]
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        decoded = subprocess.run(
+            [encoder.ffmpeg_binary, "-i", path]
+            + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+            capture_output=True,
+            check=True,
+        )
+        frames = np.frombuffer(decoded.stdout, dtype=np.uint8).reshape(-1, 360, 640, 3)
+        assert len(frames) == int(video.duration * 4)
+        for i in range(1, len(frames)):
+            changed = np.mean(np.abs(frames[i].astype(int) - frames[i - 1])) > 1
+            assert changed == (video.text_at(i / 4) != video.text_at((i - 1) / 4))
+        # The text is drawn in the middle of the solid background
+        assert frames[0][:, :100].max() < 20
+        assert frames[0][150:210, 250:390].max() > 200
+        assert os.listdir(tmp_path) == ["test_video.mp4"]
+
+    def test_burn_subtitles_invalid_background(self, tmp_path: pathlib.Path) -> None:
+        """Test an invalid background color raises an error."""
+        with pytest.raises(VideoEncoderError) as e:
+            FFmpegPipeEncoder().burn_subtitles(
+                script="",
+                font=DepthReportVideoCreator().font,
+                path=str(tmp_path / "test_video.mp4"),
+                size=(640, 360),
+                fps=4,
+                duration=1.0,
+                bg_color="not-a-color",
+            )
+        assert str(e.value) == "Invalid background color: not-a-color"
@@ -0,0 +1,279 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the frame_cache module."""
+
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+from unittest import mock
+import numpy as np
+from numpy.typing import NDArray
+import pytest
+from depthviz.cache_dir import default_cache_dir
+from depthviz.video.frame_cache import DiskFrameCache, FrameCache, FrameCacheError
+from depthviz.video.depth import DepthReportVideoCreator
+from depthviz.video.encoder import FFmpegPipeEncoder
+
+
+def _frame(value: int) -> NDArray[np.uint8]:
+    """Create a 10x10 frame (300 bytes) filled with a value."""
+    return np.full((10, 10, 3), value, dtype=np.uint8)
+
+
+class TestFrameCache:
+    """Test the FrameCache class."""
+
+    def test_hits_and_misses(self) -> None:
+        """Test a cached frame is found and the lookups are counted."""
+        cache = FrameCache(max_bytes=1000)
+
+        assert cache.get("a") is None
+        frame = cache.put("a", _frame(1))
+
+        assert cache.get("a") is frame
+        assert not frame.flags.writeable
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert len(cache) == 1
+        assert cache.nbytes == 300
+
+    def test_lru_eviction(self) -> None:
+        """Test the least recently used frames are evicted past the memory cap."""
+        cache = FrameCache(max_bytes=900)
+        for key in ("a", "b", "c"):
+            cache.put(key, _frame(0))
+        cache.get("a")
+
+        cache.put("d", _frame(0))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.get("d") is not None
+        assert cache.evictions == 1
+        assert cache.nbytes == 900
+
+    def test_get_or_render(self) -> None:
+        """Test a frame is only rendered on a miss."""
+        cache = FrameCache(max_bytes=1000)
+        rendered = []
+
+        def render() -> NDArray[np.uint8]:
+            """Renders a new frame and counts the renders."""
+            rendered.append(1)
+            return _frame(len(rendered))
+
+        first = cache.get_or_render("a", render)
+        second = cache.get_or_render("a", render)
+
+        assert first is second
+        assert len(rendered) == 1
+
+    def test_disabled_cache(self) -> None:
+        """Test nothing is cached with a memory cap of zero."""
+        cache = FrameCache(max_bytes=0)
+
+        cache.put("a", _frame(0))
+
+        assert len(cache) == 0
+        assert cache.get("a") is None
+
+    def test_clear(self) -> None:
+        """Test clearing the cache removes every frame."""
+        cache = FrameCache(max_bytes=1000)
+        cache.put("a", _frame(0))
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    @pytest.mark.parametrize("max_bytes", [-1, 1.5])
+    def test_invalid_size(self, max_bytes: int) -> None:
+        """Test an invalid memory cap raises an error."""
+        with pytest.raises(FrameCacheError) as e:
+            FrameCache(max_bytes=max_bytes)
+        assert str(e.value) == "Invalid frame cache size; must be a positive number."
+
+    @pytest.mark.parametrize("composition", ["concatenate", "timeline"])
+    def test_dive_profile_rasterizes_each_depth_once(self, composition: str) -> None:
+        """Test the depths shown on the way down and up are rasterized once."""
+        video_creator = DepthReportVideoCreator(fps=4, composition=composition)
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+            depth_data=[0.0, 1.0, 2.0, 3.0, 2.0, 1.0, 0.0],
+        )
+
+        for i in range(int(video.duration * 4)):
+            video.get_frame(i / 4)
+
+        cache = video_creator.frame_cache
+        assert cache.misses == len(cache) == 4
+        assert cache.hits > 0
+
+    def test_shared_cache(self) -> None:
+        """Test a cache shared by two video creators keys the frames by style."""
+        cache = FrameCache()
+        white = DepthReportVideoCreator(fps=4, frame_cache=cache)
+        green = DepthReportVideoCreator(fps=4, bg_color="green", frame_cache=cache)
+
+        first = white.render_text_frame("-1m")
+        second = green.render_text_frame("-1m")
+
+        assert not np.array_equal(first, second)
+        assert white.render_text_frame("-1m") is first
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+class TestDiskFrameCache:
+    """Test the DiskFrameCache class."""
+
+    def test_default_cache_dir(self, isolated_cache_dir: pathlib.Path) -> None:
+        """Test the default cache directory follows XDG_CACHE_HOME."""
+        assert default_cache_dir() == str(isolated_cache_dir / "depthviz")
+        assert DiskFrameCache().cache_dir == str(
+            isolated_cache_dir / "depthviz" / "frames"
+        )
+
+    def test_warm_run_skips_rasterization(self, tmp_path: pathlib.Path) -> None:
+        """Test a second run reads the same frames back from the disk cache."""
+        text_list: list[dict[str, Union[str, float]]] = [
+            {"text": "-1m", "duration": 1.0},
+            {"text": "-2m", "duration": 1.0},
+        ]
+        cold = DepthReportVideoCreator(
+            fps=4, composition="timeline", disk_cache=DiskFrameCache(str(tmp_path))
+        )
+        cold_video = cold.render_text_video(text_list)
+        cold_frames = [cold_video.get_frame(t).copy() for t in (0, 1)]
+
+        warm_cache = DiskFrameCache(str(tmp_path))
+        warm = DepthReportVideoCreator(
+            fps=4, composition="timeline", disk_cache=warm_cache
+        )
+        warm_video = warm.render_text_video(text_list)
+
+        with mock.patch.object(
+            DepthReportVideoCreator, "get_glyph_atlas", side_effect=AssertionError
+        ):
+            for t, frame in zip((0, 1), cold_frames):
+                assert np.array_equal(warm_video.get_frame(t), frame)
+        assert (warm_cache.hits, warm_cache.misses) == (2, 0)
+
+    def test_style_changes_key(self, tmp_path: pathlib.Path) -> None:
+        """Test a different style does not reuse the cached frames."""
+        disk_cache = DiskFrameCache(str(tmp_path))
+        DepthReportVideoCreator(fps=4, disk_cache=disk_cache).render_text_frame("-1m")
+        DepthReportVideoCreator(
+            fps=4, stroke_width=2, disk_cache=disk_cache
+        ).render_text_frame("-1m")
+
+        assert disk_cache.misses == 2
+        assert len(os.listdir(disk_cache.cache_dir)) == 2
+
+    def test_size_limit(self, tmp_path: pathlib.Path) -> None:
+        """Test the least recently used frames are deleted past the size limit."""
+        disk_cache = DiskFrameCache(str(tmp_path))
+        digest = disk_cache.style_digest(
+            font=DepthReportVideoCreator().font, style=("test",)
+        )
+        frame = np.zeros((10, 10, 3), dtype=np.uint8)
+        paths: list[str] = []
+        for last_use, text in enumerate(("a", "b")):
+            disk_cache.put(digest, text, frame)
+            (file,) = set(os.listdir(disk_cache.cache_dir)) - {
+                os.path.basename(path) for path in paths
+            }
+            paths.append(os.path.join(disk_cache.cache_dir, file))
+            os.utime(paths[-1], (last_use, last_use))
+        file_size = os.path.getsize(paths[0])
+
+        limited_cache = DiskFrameCache(str(tmp_path), max_bytes=2 * file_size)
+        limited_cache.put(digest, "c", frame)
+
+        assert not os.path.exists(paths[0])
+        assert os.path.exists(paths[1])
+        assert limited_cache.get(digest, "c") is not None
+
+    def test_rewritten_frame_size(self, tmp_path: pathlib.Path) -> None:
+        """Test rewriting a cached frame does not count its size twice."""
+        disk_cache = DiskFrameCache(str(tmp_path))
+        digest = disk_cache.style_digest(
+            font=DepthReportVideoCreator().font, style=("test",)
+        )
+        disk_cache.put(digest, "a", _frame(1))
+        (file,) = os.listdir(disk_cache.cache_dir)
+        file_size = os.path.getsize(os.path.join(disk_cache.cache_dir, file))
+
+        for _ in range(3):
+            disk_cache.put(digest, "b", _frame(2))
+
+        assert disk_cache.nbytes == 2 * file_size
+        assert len(os.listdir(disk_cache.cache_dir)) == 2
+
+    def test_shared_by_threads(self, tmp_path: pathlib.Path) -> None:
+        """Test the lookups of several threads are all counted."""
+        disk_cache = DiskFrameCache(str(tmp_path))
+        digest = disk_cache.style_digest(
+            font=DepthReportVideoCreator().font, style=("test",)
+        )
+
+        def lookup(text: str) -> None:
+            """Reads a frame back, writing it on a miss."""
+            if disk_cache.get(digest, text) is None:
+                disk_cache.put(digest, text, _frame(len(text)))
+
+        texts = [str(i % 10) for i in range(400)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lookup, texts))
+
+        assert disk_cache.hits + disk_cache.misses == len(texts)
+        assert disk_cache.misses >= 10
+        assert len(os.listdir(disk_cache.cache_dir)) == 10
+
+    def test_parallel_encoding(self, tmp_path: pathlib.Path) -> None:
+        """Test the cache is sent to the worker processes of the parallel encoding."""
+        disk_cache = DiskFrameCache(str(tmp_path / "cache"))
+        video_creator = DepthReportVideoCreator(
+            fps=4,
+            composition="timeline",
+            encoder=FFmpegPipeEncoder(preset="ultrafast", gop=4),
+            jobs=2,
+            disk_cache=disk_cache,
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0], depth_data=[0.0, 1.0, 2.0, 1.0]
+        )
+        path = tmp_path / "test_video.mp4"
+
+        video_creator.save(video=video, path=str(path))
+
+        assert path.exists()
+        # The workers rasterized the frames into the cache
+        assert len(os.listdir(disk_cache.cache_dir)) == len(video.texts)
+
+    def test_corrupted_file_is_a_miss(self, tmp_path: pathlib.Path) -> None:
+        """Test an unreadable cached frame is treated as a miss."""
+        disk_cache = DiskFrameCache(str(tmp_path))
+        digest = disk_cache.style_digest(
+            font=DepthReportVideoCreator().font, style=("test",)
+        )
+        disk_cache.put(digest, "a", np.zeros((10, 10, 3), dtype=np.uint8))
+        (file,) = os.listdir(disk_cache.cache_dir)
+        with open(os.path.join(disk_cache.cache_dir, file), "wb") as f:
+            f.write(b"corrupted")
+
+        assert disk_cache.get(digest, "a") is None
+        assert disk_cache.misses == 1
+
+    def test_invalid_cache_dir(self, tmp_path: pathlib.Path) -> None:
+        """Test a cache directory which cannot be created raises an error."""
+        (tmp_path / "file").write_text("not a directory")
+
+        with pytest.raises(FrameCacheError) as e:
+            DiskFrameCache(str(tmp_path / "file"))
+        assert str(e.value) == (
+            f"Cannot create the cache directory: {tmp_path / 'file' / 'frames'}"
+        )
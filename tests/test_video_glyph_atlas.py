@@ -0,0 +1,213 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the glyph_atlas module."""
+
+import tracemalloc
+from unittest import mock
+import numpy as np
+import pytest
+from moviepy import TextClip
+from depthviz.video.glyph_atlas import GlyphAtlas, GlyphAtlasError
+from depthviz.video.video_creator import DEFAULT_FONT
+
+
+class TestGlyphAtlas:
+    """Test the GlyphAtlas class."""
+
+    def _create_atlas(self, bg_color: str = "black") -> GlyphAtlas:
+        """Create a GlyphAtlas instance with the default style for 640x360."""
+        return GlyphAtlas(
+            font=DEFAULT_FONT,
+            font_size=120,
+            color="white",
+            stroke_color="black",
+            stroke_width=5,
+            bg_color=bg_color,
+            size=(640, 360),
+        )
+
+    @pytest.mark.parametrize("text", ["0m", "12:34", "-3343.33m"])
+    def test_render_matches_text_clip(self, text: str) -> None:
+        """Test the rendered frame matches the one rendered by TextClip.
+
+        Note:
+            TextClip renders at sub-pixel positions, so a few anti-aliased pixels
+            at the edges of the glyphs may differ.
+        """
+        atlas = self._create_atlas()
+        expected = TextClip(
+            text=text,
+            font=DEFAULT_FONT,
+            font_size=120,
+            color="white",
+            bg_color="black",
+            stroke_color="black",
+            stroke_width=5,
+            size=(640, 360),
+        ).get_frame(0)
+
+        frame = atlas.render(text)
+
+        assert frame.shape == (360, 640, 3)
+        assert frame.dtype == np.uint8
+        difference = np.abs(frame.astype(int) - expected.astype(int))
+        assert np.mean(difference > 8) < 0.03
+
+    @pytest.mark.parametrize("text", ["01:23", "0m", "-3343.33m"])
+    @pytest.mark.parametrize("font_size", [73, 120, 150])
+    def test_render_glyph_positions(self, text: str, font_size: int) -> None:
+        """Test the glyphs are placed at the same pixels as TextClip's (no drift)."""
+        atlas = GlyphAtlas(
+            font=DEFAULT_FONT,
+            font_size=font_size,
+            color="white",
+            stroke_color="black",
+            stroke_width=5,
+            bg_color="black",
+            size=(640, 360),
+        )
+        expected = TextClip(
+            text=text,
+            font=DEFAULT_FONT,
+            font_size=font_size,
+            color="white",
+            bg_color="black",
+            stroke_color="black",
+            stroke_width=5,
+            size=(640, 360),
+        ).get_frame(0)
+
+        frame = atlas.render(text)
+
+        difference = np.abs(frame.astype(int) - expected.astype(int))
+        assert np.mean(difference > 8) < 0.002
+
+    def test_render_background(self) -> None:
+        """Test the frame is filled with the background color outside of the text."""
+        atlas = self._create_atlas(bg_color="#00ff00")
+
+        frame = atlas.render("-1m")
+
+        assert (frame[0, 0] == [0, 255, 0]).all()
+        assert (frame[-1, -1] == [0, 255, 0]).all()
+        assert (frame == [255, 255, 255]).all(axis=2).any()
+
+    def test_render_reuses_buffer(self) -> None:
+        """Test the frame buffer is reused and render_copy returns an owned copy."""
+        atlas = self._create_atlas()
+
+        first = atlas.render("-1m")
+        copy = atlas.render_copy("-1m")
+        second = atlas.render("-2m")
+
+        assert first is second
+        assert not np.array_equal(copy, second)
+
+    def test_render_sequence(self) -> None:
+        """Test a frame redrawn over a previous text is the same as a fresh frame."""
+        atlas = self._create_atlas(bg_color="#102030")
+        texts = ["-1m", "-10m", "-9m", "-100.5m", "", "12:34", "-9m"]
+
+        for text in texts:
+            frame = atlas.render(text)
+            expected = self._create_atlas(bg_color="#102030").render(text)
+            assert np.array_equal(frame, expected)
+
+    def test_render_changed_cells_only(self) -> None:
+        """Test only the glyph cells that changed are drawn again."""
+        atlas = self._create_atlas()
+        previous = atlas.render_copy("-23m")
+        layout = atlas.layout("-24m")
+        changed_cells = [
+            atlas.clip_box(previous, *placed)
+            for placed in (atlas.layout("-23m")[2], layout[2])
+        ]
+
+        with mock.patch.object(atlas, "blit", wraps=atlas.blit) as mock_blit:
+            frame = atlas.render("-24m")
+        drawn = [
+            call
+            for call in mock_blit.call_args_list
+            if atlas.clip_box(
+                previous,
+                glyph=call.args[1],
+                x=call.args[2],
+                y=call.args[3],
+                clip=call.kwargs["clip"],
+            )
+        ]
+        assert 0 < len(drawn) < len(layout)
+
+        # The pixels outside of the changed cells are not touched
+        changed = np.argwhere((frame != previous).any(axis=2))
+        left = min(box[2] for box in changed_cells if box)
+        right = max(box[3] for box in changed_cells if box)
+        assert changed[:, 1].min() >= left
+        assert changed[:, 1].max() < right
+
+    def test_render_width_change(self) -> None:
+        """Test the text is centered again when its width changes."""
+        atlas = self._create_atlas()
+        atlas.render("-9m")
+
+        frame = atlas.render("-10m")
+
+        assert np.array_equal(frame, self._create_atlas().render("-10m"))
+
+    def test_render_without_allocation(self) -> None:
+        """Test composing frames allocates no frame sized array (only ufunc buffers)."""
+        atlas = self._create_atlas()
+        texts = [f"-{depth}m" for depth in range(100)]
+        for text in texts:
+            atlas.render(text)
+
+        tracemalloc.start()
+        try:
+            for text in reversed(texts):
+                atlas.render(text)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak < 360 * 640 * 3 // 8
+
+    def test_render_character_outside_charset(self) -> None:
+        """Test characters outside of the charset are rasterized on first use."""
+        atlas = self._create_atlas()
+
+        frame = atlas.render("ft")
+
+        assert (frame == [255, 255, 255]).all(axis=2).any()
+        assert atlas.get_glyph("f").width > 0
+
+    def test_render_empty_text(self) -> None:
+        """Test an empty text renders the background only."""
+        atlas = self._create_atlas()
+
+        frame = atlas.render("")
+
+        assert not frame.any()
+
+    @pytest.mark.parametrize(
+        "font, bg_color, expected_error",
+        [
+            ("nonexistent.ttf", "black", "Error loading font file: nonexistent.ttf"),
+            (DEFAULT_FONT, "blackk", "Invalid color: blackk"),
+        ],
+    )
+    def test_invalid_style(
+        self, font: str, bg_color: str, expected_error: str
+    ) -> None:
+        """Test an invalid font or color raises an error."""
+        with pytest.raises(GlyphAtlasError) as e:
+            GlyphAtlas(
+                font=font,
+                font_size=120,
+                color="white",
+                stroke_color="black",
+                stroke_width=5,
+                bg_color=bg_color,
+                size=(640, 360),
+            )
+        assert str(e.value) == expected_error
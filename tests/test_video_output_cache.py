@@ -0,0 +1,118 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the output_cache module."""
+
+import os
+import pathlib
+import pytest
+from depthviz.video.output_cache import OutputCache, OutputCacheError
+from depthviz.video.video_creator import DEFAULT_FONT
+
+
+class TestOutputCache:
+    """Test the OutputCache class."""
+
+    def test_digest(self, tmp_path: pathlib.Path) -> None:
+        """Test the digest changes with every input of the video."""
+        font_copy = tmp_path / "font.ttf"
+        font_copy.write_bytes(pathlib.Path(DEFAULT_FONT).read_bytes())
+        other_font = tmp_path / "other.ttf"
+        other_font.write_bytes(b"other")
+        digest = OutputCache.digest(
+            [0.0, 1.0], [0.0, 1.0], {"decimal_places": 0}, DEFAULT_FONT
+        )
+
+        # The font is hashed by content, not by path
+        assert digest == OutputCache.digest(
+            [0.0, 1.0], [0.0, 1.0], {"decimal_places": 0}, str(font_copy)
+        )
+        assert (
+            len(
+                {
+                    digest,
+                    OutputCache.digest(
+                        [0.0, 2.0], [0.0, 1.0], {"decimal_places": 0}, DEFAULT_FONT
+                    ),
+                    OutputCache.digest(
+                        [0.0, 1.0], [0.0, 2.0], {"decimal_places": 0}, DEFAULT_FONT
+                    ),
+                    OutputCache.digest(
+                        [0.0, 1.0], None, {"decimal_places": 0}, DEFAULT_FONT
+                    ),
+                    OutputCache.digest(
+                        [0.0, 1.0], [0.0, 1.0], {"decimal_places": 1}, DEFAULT_FONT
+                    ),
+                    OutputCache.digest(
+                        [0.0, 1.0], [0.0, 1.0], {"decimal_places": 0}, str(other_font)
+                    ),
+                }
+            )
+            == 6
+        )
+
+    def test_digest_font_not_found(self, tmp_path: pathlib.Path) -> None:
+        """Test a missing font file raises an error."""
+        with pytest.raises(OutputCacheError) as e:
+            OutputCache.digest([0.0], None, {}, str(tmp_path / "nonexistent.ttf"))
+        assert str(e.value).startswith("Cannot read the font file: ")
+
+    def test_store_and_fetch(self, tmp_path: pathlib.Path) -> None:
+        """Test a stored video is fetched to another path."""
+        cache = OutputCache(cache_dir=str(tmp_path / "cache"))
+        video_path = tmp_path / "video.mp4"
+        video_path.write_bytes(b"video")
+        fetched_path = tmp_path / "fetched.mp4"
+        fetched_path.write_bytes(b"old video")
+
+        assert not cache.fetch("digest", str(fetched_path))
+        cache.store("digest", str(video_path))
+
+        assert cache.fetch("digest", str(fetched_path))
+        assert fetched_path.read_bytes() == b"video"
+        assert sorted(os.listdir(tmp_path)) == ["cache", "fetched.mp4", "video.mp4"]
+
+    def test_outputs_do_not_share_the_cached_file(self, tmp_path: pathlib.Path) -> None:
+        """Test writing to a stored or fetched video does not change the cached one."""
+        cache = OutputCache(cache_dir=str(tmp_path / "cache"))
+        video_path = tmp_path / "video.mp4"
+        video_path.write_bytes(b"video")
+        cache.store("digest", str(video_path))
+        fetched_path = tmp_path / "fetched.mp4"
+        assert cache.fetch("digest", str(fetched_path))
+
+        # Overwritten in place, e.g., by another render to the same path
+        for path in (video_path, fetched_path):
+            with open(path, "r+b") as video_file:
+                video_file.write(b"other")
+
+        assert cache.fetch("digest", str(fetched_path))
+        assert fetched_path.read_bytes() == b"video"
+
+    def test_size_limit(self, tmp_path: pathlib.Path) -> None:
+        """Test the least recently used videos are deleted past the size limit."""
+        cache = OutputCache(cache_dir=str(tmp_path / "cache"), max_bytes=10)
+        for last_use, digest in enumerate(("a", "b")):
+            video_path = tmp_path / f"{digest}.mp4"
+            video_path.write_bytes(b"12345")
+            cache.store(digest, str(video_path))
+            os.utime(
+                os.path.join(cache.cache_dir, f"{digest}.mp4"), (last_use, last_use)
+            )
+
+        video_path = tmp_path / "c.mp4"
+        video_path.write_bytes(b"12345")
+        cache.store("c", str(video_path))
+
+        assert sorted(os.listdir(cache.cache_dir)) == ["b.mp4", "c.mp4"]
+
+    def test_invalid_cache_dir(self, tmp_path: pathlib.Path) -> None:
+        """Test a cache directory which cannot be created raises an error."""
+        (tmp_path / "file").write_text("not a directory")
+
+        with pytest.raises(OutputCacheError) as e:
+            OutputCache(cache_dir=str(tmp_path / "file"))
+        assert str(e.value) == (
+            f"Cannot create the output cache directory: {tmp_path / 'file' / 'outputs'}"
+        )
@@ -0,0 +1,107 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the segment_library module."""
+
+import os
+import pathlib
+import subprocess
+from unittest import mock
+import numpy as np
+import pytest
+from moviepy import VideoFileClip
+from depthviz.video.encoder import FFmpegPipeEncoder
+from depthviz.video.depth import DepthReportVideoCreator
+from depthviz.video.segment_library import SegmentLibrary, SegmentLibraryError
+
+
+class TestSegmentLibrary:
+    """Test the SegmentLibrary class."""
+
+    @pytest.mark.parametrize("fps", [4, 24, 25, 30, 60])
+    def test_assemble(self, fps: int, tmp_path: pathlib.Path) -> None:
+        """Test the assembled video shows the same frames on the frame grid."""
+        library = SegmentLibrary(cache_dir=str(tmp_path / "cache"))
+        video_creator = DepthReportVideoCreator(
+            fps=fps, composition="timeline", segment_library=library
+        )
+        video = video_creator.render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+            depth_data=[0.0, 1.0, 2.0, 3.0, 2.0, 1.0],
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        video_creator.save(video=video, path=path)
+
+        decoded = subprocess.run(
+            [library.encoder.ffmpeg_binary, "-i", path, "-vf", f"fps={fps}"]
+            + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+            capture_output=True,
+            check=True,
+        )
+        frames = np.frombuffer(decoded.stdout, dtype=np.uint8).reshape(-1, 360, 640, 3)
+        frame_count = int(video.duration * fps)
+        assert len(frames) == frame_count
+        for i in range(frame_count):
+            expected = video.get_frame(i / fps).astype(int)
+            assert np.mean(np.abs(frames[i].astype(int) - expected)) < 4
+        with VideoFileClip(path) as encoded:
+            assert encoded.duration == pytest.approx(frame_count / fps, abs=0.05)
+        # One clip per distinct depth
+        assert library.misses == len(video.texts) == 4
+        assert len(os.listdir(library.cache_dir)) == 4
+
+    def test_assemble_quoted_cache_dir(self, tmp_path: pathlib.Path) -> None:
+        """Test the clips are assembled from a cache directory with a quote."""
+        library = SegmentLibrary(cache_dir=str(tmp_path / "diver's cache"))
+        video = DepthReportVideoCreator(
+            composition="timeline"
+        ).render_depth_report_video(
+            time_data=[0.0, 1.0, 2.0], depth_data=[0.0, 1.0, 2.0]
+        )
+        path = str(tmp_path / "test_video.mp4")
+
+        library.assemble(video=video, path=path, fps=25)
+
+        with VideoFileClip(path) as encoded:
+            assert encoded.duration == pytest.approx(video.duration, abs=0.05)
+
+    def test_assemble_from_library(self, tmp_path: pathlib.Path) -> None:
+        """Test a video is assembled without encoding once the clips are cached."""
+        cache_dir = str(tmp_path / "cache")
+        time_data = [0.0, 1.0, 2.0, 3.0]
+        depth_data = [0.0, 1.0, 2.0, 1.0]
+        SegmentLibrary(cache_dir=cache_dir).assemble(
+            video=DepthReportVideoCreator(
+                composition="timeline"
+            ).render_depth_report_video(time_data=time_data, depth_data=depth_data),
+            path=str(tmp_path / "first.mp4"),
+            fps=25,
+        )
+        library = SegmentLibrary(cache_dir=cache_dir)
+        video = DepthReportVideoCreator(
+            composition="timeline"
+        ).render_depth_report_video(
+            time_data=time_data + [4.0, 5.0], depth_data=depth_data + [2.0, 1.0]
+        )
+
+        with mock.patch.object(
+            FFmpegPipeEncoder, "run_ffmpeg", autospec=True
+        ) as run_ffmpeg:
+            library.assemble(video=video, path=str(tmp_path / "second.mp4"), fps=25)
+
+        assert (library.hits, library.misses) == (3, 0)
+        run_ffmpeg.assert_called_once()
+        assert "-c" in run_ffmpeg.call_args.args[1]
+
+    def test_invalid_cache_dir(self, tmp_path: pathlib.Path) -> None:
+        """Test a library directory which cannot be created raises an error."""
+        (tmp_path / "file").write_text("not a directory")
+
+        with pytest.raises(SegmentLibraryError) as e:
+            SegmentLibrary(cache_dir=str(tmp_path / "file"))
+        assert str(e.value) == (
+            "Cannot create the segment library directory: "
+            f"{tmp_path / 'file' / 'segments'}"
+        )
@@ -0,0 +1,144 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the subtitles module."""
+
+import pathlib
+from typing import Union
+import pytest
+from depthviz.video.subtitles import SubtitleExporter, SubtitleExporterError
+from depthviz.video.depth import DepthReportVideoCreator
+from depthviz.video.time import TimeReportVideoCreator
+from depthviz.video.video_creator import OverlayVideoCreatorError
+
+TEXT_LIST: list[dict[str, Union[str, float]]] = [
+    {"text": "0m", "duration": 1.5},
+    {"text": "-1m", "duration": 0.25},
+    {"text": "-2m", "duration": 3601.0},
+]
+
+
+class TestSubtitleExporter:
+    """Test the SubtitleExporter class."""
+
+    def test_to_srt(self) -> None:
+        """Test the SRT cues follow each other."""
+        exporter = DepthReportVideoCreator().create_subtitle_exporter()
+
+        assert exporter.to_srt(TEXT_LIST) == (
+            "1\n00:00:00,000 --> 00:00:01,500\n0m\n\n"
+            "2\n00:00:01,500 --> 00:00:01,750\n-1m\n\n"
+            "3\n00:00:01,750 --> 01:00:02,750\n-2m\n"
+        )
+
+    def test_to_vtt(self) -> None:
+        """Test the WebVTT cues use the start times of the segments."""
+        exporter = DepthReportVideoCreator().create_subtitle_exporter()
+        text_list: list[dict[str, Union[str, float]]] = [
+            {"text": "00:00", "start": 0.0, "duration": 1.0},
+            {"text": "00:01", "start": 1.0, "duration": 1.0},
+        ]
+
+        assert exporter.to_vtt(text_list) == (
+            "WEBVTT\n\n"
+            "00:00:00.000 --> 00:00:01.000\n00:00\n\n"
+            "00:00:01.000 --> 00:00:02.000\n00:01\n"
+        )
+
+    def test_to_ass(self) -> None:
+        """Test the ASS style matches the video style."""
+        exporter = DepthReportVideoCreator(
+            bg_color="#00FF00", stroke_width=3
+        ).create_subtitle_exporter()
+
+        ass = exporter.to_ass(TEXT_LIST)
+
+        assert "PlayResX: 640\nPlayResY: 360\n" in ass
+        assert (
+            "Style: Default,Open Sans,165,&H00FFFFFF,&H00FFFFFF,&H00000000,&H0000FF00,"
+            "-1,0,0,0,100,100,0,0,1,3,0,5,0,0,0,1\n"
+        ) in ass
+        assert ass.endswith(
+            "Dialogue: 0,0:00:00.00,0:00:01.50,Default,,0,0,0,,0m\n"
+            "Dialogue: 0,0:00:01.50,0:00:01.75,Default,,0,0,0,,-1m\n"
+            "Dialogue: 0,0:00:01.75,1:00:02.75,Default,,0,0,0,,-2m\n"
+        )
+
+    def test_to_ass_long_timeline(self) -> None:
+        """Test the ASS times keep every digit of the hours past 10 hours."""
+        exporter = DepthReportVideoCreator().create_subtitle_exporter()
+        text_list: list[dict[str, Union[str, float]]] = [
+            {"text": "0m", "start": 35999.5, "duration": 1.0},
+            {"text": "-1m", "start": 36000.5, "duration": 3600.0},
+        ]
+
+        assert exporter.to_ass(text_list).endswith(
+            "Dialogue: 0,9:59:59.50,10:00:00.50,Default,,0,0,0,,0m\n"
+            "Dialogue: 0,10:00:00.50,11:00:00.50,Default,,0,0,0,,-1m\n"
+        )
+
+    @pytest.mark.parametrize(
+        "path, expected_is_subtitle",
+        [
+            ("test.srt", True),
+            ("test.ASS", True),
+            ("path/to/test.vtt", True),
+            ("test.mp4", False),
+            ("srt", False),
+        ],
+    )
+    def test_is_subtitle_path(self, path: str, expected_is_subtitle: bool) -> None:
+        """Test the subtitle file extensions are recognized."""
+        assert SubtitleExporter.is_subtitle_path(path) == expected_is_subtitle
+
+    def test_save_time_subtitles(self, tmp_path: pathlib.Path) -> None:
+        """Test the time subtitles are saved with the `_time` suffix."""
+        video_creator = TimeReportVideoCreator()
+        text_list = video_creator.create_time_text_list(time_data=[0.0, 1.0, 2.5])
+
+        video_creator.save_subtitles(
+            text_list=text_list, path=str(tmp_path / "test.srt")
+        )
+
+        assert (tmp_path / "test_time.srt").read_text(encoding="utf-8") == (
+            "1\n00:00:00,000 --> 00:00:01,000\n00:00\n\n"
+            "2\n00:00:01,000 --> 00:00:02,000\n00:01\n\n"
+            "3\n00:00:02,000 --> 00:00:03,000\n00:02\n\n"
+            "4\n00:00:03,000 --> 00:00:04,000\n00:03\n"
+        )
+
+    def test_save_invalid_format(self, tmp_path: pathlib.Path) -> None:
+        """Test an unsupported subtitle format raises an error."""
+        video_creator = DepthReportVideoCreator()
+
+        with pytest.raises(OverlayVideoCreatorError) as e:
+            video_creator.save_subtitles(
+                text_list=TEXT_LIST, path=str(tmp_path / "test.txt")
+            )
+        assert str(e.value) == (
+            "Invalid file format: The file format must be one of .srt, .ass, .vtt"
+        )
+
+    def test_save_nonexistent_directory(self, tmp_path: pathlib.Path) -> None:
+        """Test saving to a nonexistent directory raises an error."""
+        exporter = DepthReportVideoCreator().create_subtitle_exporter()
+
+        with pytest.raises(FileNotFoundError):
+            exporter.save(text_list=TEXT_LIST, path=str(tmp_path / "x" / "test.srt"))
+
+    def test_invalid_color(self) -> None:
+        """Test an invalid color raises an error."""
+        exporter = SubtitleExporter(
+            font=DepthReportVideoCreator().font,
+            font_size=120,
+            color="not-a-color",
+            stroke_color="black",
+            stroke_width=1,
+            bg_color="black",
+            size=(640, 360),
+        )
+
+        with pytest.raises(SubtitleExporterError) as e:
+            exporter.to_ass(TEXT_LIST)
+        assert str(e.value) == "Invalid color: not-a-color"
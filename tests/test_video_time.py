@@ -31,100 +31,80 @@ class TestTimeReportVideoCreator:
                     3.0,
                 ],
                 4,
-                16,
+                4,
                 [
                     "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:01",
-                    "00:01",
                     "00:01",
-                    "00:01",
-                    "00:02",
-                    "00:02",
                     "00:02",
-                    "00:02",
-                    "00:03",
-                    "00:03",
-                    "00:03",
                     "00:03",
                 ],
             ),
-            ([0.0], 1, 4, ["00:00", "00:00", "00:00", "00:00"]),
             (
-                [0.0, 1.0],
-                2,
-                8,
+                [
+                    0.0,
+                ],
+                1,
+                1,
                 [
                     "00:00",
+                ],
+            ),
+            (
+                [
+                    0.0,
+                    1.0,
+                ],
+                2,
+                2,
+                [
                     "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:01",
-                    "00:01",
-                    "00:01",
                     "00:01",
                 ],
             ),
             (
-                [123123412, 123123413, 123123414],
+                [
+                    123123412,
+                    123123413,
+                    123123414,
+                ],
+                3,
                 3,
-                12,
                 [
                     "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:01",
-                    "00:01",
                     "00:01",
-                    "00:01",
-                    "00:02",
-                    "00:02",
-                    "00:02",
                     "00:02",
                 ],
             ),
             (
-                [1.0, 2.0, 3.0, 4.0],
+                [
+                    1.0,
+                    2.0,
+                    3.0,
+                    4.0,
+                ],
+                4,
                 4,
-                16,
                 [
-                    "00:00",
-                    "00:00",
-                    "00:00",
                     "00:00",
                     "00:01",
-                    "00:01",
-                    "00:01",
-                    "00:01",
-                    "00:02",
-                    "00:02",
                     "00:02",
-                    "00:02",
-                    "00:03",
-                    "00:03",
-                    "00:03",
                     "00:03",
                 ],
             ),
             (
-                [0.25, 0.5, 0.75, 1.0, 1.25, 1.5],
+                [
+                    0.25,
+                    0.5,
+                    0.75,
+                    1.0,
+                    1.25,
+                    1.5,
+                ],
+                3,
                 3,
-                12,
                 [
                     "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:00",
-                    "00:01",
-                    "00:01",
                     "00:01",
-                    "00:01",
-                    "00:02",
-                    "00:02",
-                    "00:02",
                     "00:02",
                 ],
             ),
@@ -178,3 +158,16 @@ class TestTimeReportVideoCreator:
             time_report_video_creator.render_time_report_video(time_data=time_data)
 
         assert str(e.value) == expected_error_message
+
+    def test_render_time_report_video_timeline(self) -> None:
+        """Test the timeline composition shows one text per second at every frame."""
+        time_report_video_creator = TimeReportVideoCreator(composition="timeline")
+
+        video = time_report_video_creator.render_time_report_video(
+            time_data=[0.0, 1.0, 2.5]
+        )
+
+        assert video.duration == pytest.approx(4)
+        assert len(video.text_list) == 4
+        frame_texts = [video.text_at(i / 4) for i in range(16)]
+        assert frame_texts == [f"00:0{i // 4}" for i in range(16)]
@@ -0,0 +1,133 @@
+# Copyright (c) 2024 - 2025 Noppanut Ploywong (@noppanut15) <noppanut.connect@gmail.com>
+# Apache License 2.0 (see LICENSE file or http://www.apache.org/licenses/LICENSE-2.0)
+
+
+"""Unit tests for the timeline module."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, cast
+import numpy as np
+from numpy.typing import NDArray
+import pytest
+from depthviz.video.timeline import TextTimelineClip
+from depthviz.video.depth import DepthReportVideoCreator
+
+
+class TestTextTimelineClip:
+    """Test the TextTimelineClip class."""
+
+    text_list: list[dict[str, Union[str, float]]] = [
+        {"text": "0m", "duration": 1.0},
+        {"text": "-1m", "duration": 0.5},
+        {"text": "-2m", "duration": 2.0},
+        {"text": "-1m", "duration": 0.5},
+    ]
+
+    def _render_frame(self, text: str) -> NDArray[np.uint8]:
+        """Render a frame filled with the length of the text (for testing)."""
+        self.rendered.append(text)
+        return np.full((2, 4, 3), len(text), dtype=np.uint8)
+
+    def test_timeline(self) -> None:
+        """Test the segments of the timeline."""
+        self.rendered: list[str] = []
+        clip = TextTimelineClip(self.text_list, render_frame=self._render_frame)
+
+        assert clip.duration == pytest.approx(4.0)
+        assert clip.size == (4, 2)
+        assert clip.texts == ["0m", "-1m", "-2m"]
+        assert clip.text_index.tolist() == [0, 1, 2, 1]
+        assert clip.starts.tolist() == [0.0, 1.0, 1.5, 3.5]
+        assert clip.text_list == [
+            {"text": "0m", "start": 0.0, "duration": 1.0},
+            {"text": "-1m", "start": 1.0, "duration": 0.5},
+            {"text": "-2m", "start": 1.5, "duration": 2.0},
+            {"text": "-1m", "start": 3.5, "duration": 0.5},
+        ]
+
+    @pytest.mark.parametrize(
+        "t, expected_text",
+        [
+            (0.0, "0m"),
+            (0.99, "0m"),
+            (1.0, "-1m"),
+            (1.5, "-2m"),
+            (3.49, "-2m"),
+            (3.5, "-1m"),
+            (4.0, "-1m"),
+        ],
+    )
+    def test_text_at(self, t: float, expected_text: str) -> None:
+        """Test the text shown at a given time."""
+        self.rendered = []
+        clip = TextTimelineClip(self.text_list, render_frame=self._render_frame)
+
+        assert clip.text_at(t) == expected_text
+        assert int(clip.get_frame(t)[0, 0, 0]) == len(expected_text)
+
+    def test_frame_cache(self) -> None:
+        """Test a frame is only rendered again when the text changes."""
+        self.rendered = []
+        clip = TextTimelineClip(self.text_list, render_frame=self._render_frame)
+        self.rendered = []
+
+        for i in range(16):
+            clip.get_frame(i / 4)
+
+        # The first frame has already been rendered when the clip was created
+        assert self.rendered == ["-1m", "-2m", "-1m"]
+
+    def test_threads(self) -> None:
+        """Test the frames rendered by several threads are the frames of their times.
+
+        Like the glyph atlas, every thread renders into its own reusable buffer, which
+        is only valid until the thread renders its next frame.
+        """
+        buffers = threading.local()
+
+        def render_frame(text: str) -> NDArray[np.uint8]:
+            """Renders a frame into the buffer of the thread."""
+            if not hasattr(buffers, "frame"):
+                buffers.frame = np.empty((2, 4, 3), dtype=np.uint8)
+            buffers.frame[:] = len(text)
+            return cast(NDArray[np.uint8], buffers.frame)
+
+        def rasterize(t: float) -> int:
+            """Reads a frame a little later, like the rasterizer threads."""
+            frame = clip.get_frame(t)
+            time.sleep(0.001)
+            return int(frame[0, 0, 0])
+
+        text_list: list[dict[str, Union[str, float]]] = [
+            {"text": "-" * (i // 4 % 7 + 1), "duration": 0.25} for i in range(400)
+        ]
+        clip = TextTimelineClip(text_list, render_frame=render_frame)
+        times = [i / 4 for i in range(400)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            values = list(executor.map(rasterize, times))
+
+        assert values == [len(clip.text_at(t)) for t in times]
+
+    def test_render_depth_report_video_timeline(self) -> None:
+        """Test the timeline clip shows the same frames as the concatenated clips."""
+        time_data = [0.0, 1.0, 2.0, 3.0]
+        depth_data = [0.0, 1.0, 2.5, 1.0]
+        concatenated = DepthReportVideoCreator(fps=4).render_depth_report_video(
+            time_data=time_data, depth_data=depth_data
+        )
+        timeline = DepthReportVideoCreator(
+            fps=4, composition="timeline"
+        ).render_depth_report_video(time_data=time_data, depth_data=depth_data)
+
+        assert isinstance(timeline, TextTimelineClip)
+        assert timeline.duration == pytest.approx(concatenated.duration)
+        assert [item["text"] for item in timeline.text_list] == [
+            clip.text for clip in concatenated.clips
+        ]
+        for i in range(int(timeline.duration * 4)):
+            assert np.array_equal(
+                timeline.get_frame(i / 4), concatenated.get_frame(i / 4)
+            )